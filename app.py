@@ -1,14 +1,35 @@
-from flask import Flask, render_template, request, jsonify
+from flask import (
+    Flask,
+    Response,
+    render_template,
+    request,
+    jsonify,
+    stream_with_context,
+)
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
-from utils.nlp_utils import extract_text_from_file
+from utils.nlp_utils import (
+    extract_text_from_file,
+    extract_text_from_spooled_file,
+    spool_upload,
+)
 from utils.financial_email_classifier import FinancialEmailClassifier
+from utils.result_cache import result_cache
+from utils.job_queue import JobQueueFullError, job_queue
+from utils import metrics
+import json
 import os
+import time
 
 config = Config()
 
 app = Flask(__name__)
 
 email_classifier = FinancialEmailClassifier()
+if config.PRELOAD_MODELS:
+    email_classifier.preload_models()
+batch_executor = ThreadPoolExecutor(max_workers=config.BATCH_MAX_WORKERS)
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
@@ -25,28 +46,423 @@ def analyze_email():
     """
     Análise completa: categoria + resposta automática
     """
+    fields, error = _read_analyze_request()
+    if error:
+        return error
+
+    email_text, budget_ms, extract_ms = fields
+    try:
+        result = email_classifier.analyze_email(email_text, budget_ms)
+    except Exception as e:
+        return _analysis_error(e)
+    return _analysis_response(result, extract_ms)
+
+
+@app.post("/analyze/stream")
+def analyze_email_stream():
+    """
+    Análise em Server-Sent Events: o evento "classification" sai assim que a
+    categoria é conhecida, "token" traz cada trecho da resposta gerada e
+    "done" o resultado completo, no mesmo formato de /analyze
+    """
+    request_started = time.perf_counter()
+    fields, error = _read_analyze_request()
+    if error:
+        return error
+
+    email_text, budget_ms, extract_ms = fields
+
+    def events():
+        first_token = True
+        try:
+            for kind, payload in email_classifier.analyze_email_stream(
+                email_text, budget_ms
+            ):
+                elapsed_ms = (time.perf_counter() - request_started) * 1000
+                if kind == "classification":
+                    metrics.observe_stages({"stream_classification": elapsed_ms})
+                    yield _sse("classification", _format_classification(payload))
+                elif kind == "token":
+                    if first_token:
+                        metrics.observe_stages({"stream_first_token": elapsed_ms})
+                        first_token = False
+                    yield _sse("token", {"texto": payload})
+                else:
+                    _observe_result(payload, extract_ms)
+                    yield _sse("done", _format_result(payload))
+        except Exception as e:
+            metrics.record_error("analyze", e)
+            yield _sse("error", {"error": f"Erro na análise: {str(e)}"})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/analyze/batch")
+def analyze_batch():
+    """
+    Análise em lote: recebe um array JSON ou JSONL de emails e devolve
+    os resultados em NDJSON, na ordem de entrada, conforme ficam prontos
+    """
+    if request.mimetype == "application/json":
+        try:
+            items = json.loads(request.get_data(cache=False))
+        except ValueError as e:
+            return jsonify({"error": f"JSON inválido: {str(e)}"}), 400
+
+        if not isinstance(items, list):
+            return jsonify({"error": "O corpo deve ser um array JSON de emails"}), 400
+    else:
+        items = _iter_jsonl(request.stream)
+
+    return Response(
+        stream_with_context(_stream_batch_results(items)),
+        mimetype="application/x-ndjson",
+    )
+
+
+@app.post("/jobs")
+def create_job():
+    """
+    Cria um job de análise e responde imediatamente (202) com o id; a
+    extração do arquivo e a análise rodam no pool de jobs do processo.
+    O resultado é consultado em GET /jobs/<id>.
+    """
+    try:
+        budget_ms = _parse_budget_ms(
+            request.headers.get("X-Request-Budget-Ms") or request.form.get("budget_ms")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    upload_path = None
+    if _has_upload():
+        try:
+            upload_path = spool_upload(request.files["email_file"])
+        except ValueError as e:
+            metrics.record_error("extract", e)
+            return jsonify({"error": f"Erro no arquivo: {str(e)}"}), 400
+
+    email_text = request.form.get("email_text", "").strip()
+    if upload_path is None and not email_text:
+        return (
+            jsonify(
+                {
+                    "error": "Nenhum texto ou arquivo (.txt, .pdf, .eml) de e-mail fornecido"
+                }
+            ),
+            400,
+        )
+
+    cleanup = (lambda: os.unlink(upload_path)) if upload_path else None
+    try:
+        job = job_queue.submit(
+            _run_job, upload_path, email_text, budget_ms, cleanup=cleanup
+        )
+    except JobQueueFullError as e:
+        response = jsonify({"error": str(e)})
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+        return response
+
+    response = jsonify(_format_job(job))
+    response.status_code = 202
+    response.headers["Location"] = f"/jobs/{job['id']}"
+    return response
+
+
+@app.get("/jobs/<job_id>")
+def get_job(job_id):
+    """
+    Estado e resultado de um job. Com ``?wait=<segundos>`` a resposta
+    aguarda o término do job (long-poll), até JOBS_MAX_WAIT_SECONDS.
+    """
+    try:
+        wait = float(request.args.get("wait", 0))
+    except ValueError:
+        return jsonify({"error": "Parâmetro wait inválido"}), 400
+
+    wait = min(max(wait, 0.0), config.JOBS_MAX_WAIT_SECONDS)
+    job = job_queue.wait(job_id, wait) if wait else job_queue.store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job não encontrado ou expirado"}), 404
+
+    return jsonify(_format_job(job))
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Contadores de acertos e falhas do cache de classificação e respostas
+    e do índice de quase duplicatas
+    """
+    return jsonify(
+        {
+            **result_cache.stats(),
+            "near_duplicate": email_classifier.near_duplicates.stats(),
+        }
+    )
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """
+    Métricas do processo no formato texto do Prometheus
+    """
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.get("/openai/status")
+def openai_status():
+    """
+    Estado do cliente OpenAI e do seu disjuntor (circuit breaker)
+    """
+    return jsonify(email_classifier.openai_client.status())
+
+
+def _read_analyze_request():
+    """
+    Texto do email, orçamento de latência e tempo de extração (ms, None sem
+    arquivo) da requisição de análise, ou a resposta de erro de validação
+    """
+    extract_started = time.perf_counter()
     email_text = _extract_email_text()
+    extract_ms = (
+        (time.perf_counter() - extract_started) * 1000 if _has_upload() else None
+    )
 
     if isinstance(email_text, tuple):
-        return email_text
+        return None, email_text
 
     try:
-        result = email_classifier.analyze_email(email_text)
-
-        return jsonify(
-            {
-                "categoria": result["category"].upper(),
-                "confianca": f"{result['confidence']:.1%}",
-                "resposta_automatica": result["response"],
-                "acoes_sugeridas": result["suggested_actions"],
-                "metodo_classificacao": result["method"],
-                "gerado_por": result["generated_by"],
-                "justificativa": result.get("reasoning", ""),
-            }
+        budget_ms = _parse_budget_ms(
+            request.headers.get("X-Request-Budget-Ms") or request.form.get("budget_ms")
         )
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 400)
 
-    except Exception as e:
-        return jsonify({"error": f"Erro na análise: {str(e)}"}), 500
+    return (email_text, budget_ms, extract_ms), None
+
+
+def _analysis_response(result, extract_ms):
+    """
+    Resposta JSON de /analyze, com as etapas no cabeçalho Server-Timing
+    """
+    stages = _observe_result(result, extract_ms)
+    response = jsonify(_format_result(result))
+    response.headers["Server-Timing"] = metrics.server_timing_header(stages)
+    return response
+
+
+def _analysis_error(error):
+    metrics.record_error("analyze", error)
+    return jsonify({"error": f"Erro na análise: {str(error)}"}), 500
+
+
+def _format_classification(classification):
+    """
+    Campos da classificação no formato de resposta da API
+    """
+    return {
+        "categoria": classification["category"].upper(),
+        "confianca": f"{classification['confidence']:.1%}",
+        "metodo_classificacao": classification["method"],
+        "justificativa": classification.get("reasoning", ""),
+        "cascata": classification.get("cascade"),
+        "duplicata_aproximada": classification.get("near_duplicate"),
+    }
+
+
+def _format_result(result):
+    """
+    Converte o resultado do classificador no formato de resposta da API
+    """
+    return {
+        **_format_classification(result),
+        "resposta_automatica": result["response"],
+        "acoes_sugeridas": result["suggested_actions"],
+        "gerado_por": result["generated_by"],
+        "orcamento_latencia": result.get("budget"),
+        "condensacao": result.get("condensation"),
+    }
+
+
+def _sse(event, data):
+    """
+    Formata um evento Server-Sent Events com dados em JSON
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _format_job(job):
+    """
+    Converte o registro do job no formato de resposta da API
+    """
+    formatted = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "deadline": job["deadline"],
+    }
+    for field in ("started_at", "finished_at", "result", "error"):
+        if job.get(field) is not None:
+            formatted[field] = job[field]
+    return formatted
+
+
+def _run_job(deadline, upload_path, email_text, budget_ms):
+    """
+    Executa um job no pool: extrai o texto do upload (se houver) e analisa,
+    com o orçamento de latência limitado ao prazo restante do job
+    """
+    extract_ms = None
+    if upload_path:
+        extract_started = time.perf_counter()
+        try:
+            email_text = extract_text_from_spooled_file(upload_path).strip()
+        except Exception as e:
+            metrics.record_error("extract", e)
+            raise
+        extract_ms = (time.perf_counter() - extract_started) * 1000
+
+    if not email_text:
+        raise ValueError("Nenhum texto de e-mail encontrado no arquivo")
+
+    remaining_ms = (deadline - time.time()) * 1000
+    budget_ms = min(budget_ms, remaining_ms) if budget_ms else remaining_ms
+    if budget_ms <= 0:
+        raise TimeoutError("Tempo limite do job excedido")
+
+    result = email_classifier.analyze_email(email_text, budget_ms)
+    _observe_result(result, extract_ms)
+    return _format_result(result)
+
+
+def _observe_result(result, extract_ms=None):
+    """
+    Registra nas métricas as durações por etapa e a camada vencedora,
+    devolvendo as etapas (em ms) para o cabeçalho Server-Timing. A etapa
+    "extract" só entra quando um arquivo foi de fato extraído.
+    """
+    budget = result.get("budget") or {}
+    stages = {} if extract_ms is None else {"extract": extract_ms}
+    stages.update(budget.get("tiers_ms", {}))
+    if "elapsed_ms" in budget:
+        stages["total"] = budget["elapsed_ms"] + (extract_ms or 0.0)
+
+    metrics.observe_stages(stages)
+    metrics.record_result(result["method"], result["generated_by"])
+    return stages
+
+
+def _parse_budget_ms(value):
+    """
+    Valida o orçamento de latência (em ms) informado pelo cliente
+    """
+    if value in (None, ""):
+        return None
+
+    try:
+        budget_ms = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("Orçamento de latência inválido")
+
+    if budget_ms <= 0:
+        raise ValueError("O orçamento de latência deve ser maior que zero")
+
+    return budget_ms
+
+
+def _iter_jsonl(stream):
+    """
+    Lê um corpo JSONL linha a linha, sem carregar o lote inteiro em memória
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"JSON inválido: {str(e)}")
+
+
+def _analyze_batch_item(item):
+    """
+    Analisa um item do lote, aceitando uma string ou um objeto com email_text
+    """
+    if isinstance(item, Exception):
+        raise item
+
+    budget_ms = None
+    if isinstance(item, dict):
+        email_text = item.get("email_text", "")
+        budget_ms = _parse_budget_ms(item.get("budget_ms"))
+    else:
+        email_text = item
+
+    if not isinstance(email_text, str) or not email_text.strip():
+        raise ValueError("Nenhum texto de e-mail fornecido")
+
+    result = email_classifier.analyze_email(email_text.strip(), budget_ms)
+    _observe_result(result)
+    return _format_result(result)
+
+
+def _stream_batch_results(items):
+    """
+    Envia os itens ao pool de threads com uma janela limitada de tarefas
+    em andamento e produz as linhas NDJSON na ordem de entrada
+    """
+    pending = deque()
+
+    def _drain_one():
+        index, item_id, future = pending.popleft()
+        line = {"index": index}
+        if item_id is not None:
+            line["id"] = item_id
+        try:
+            line.update(future.result())
+        except ValueError as e:
+            metrics.record_error("batch_item", e)
+            line["error"] = f"Erro no item: {str(e)}"
+        except Exception as e:
+            metrics.record_error("analyze", e)
+            line["error"] = f"Erro na análise: {str(e)}"
+        return json.dumps(line, ensure_ascii=False) + "\n"
+
+    truncated = False
+    for index, item in enumerate(items):
+        if index >= config.BATCH_MAX_EMAILS:
+            truncated = True
+            break
+
+        item_id = item.get("id") if isinstance(item, dict) else None
+        pending.append(
+            (index, item_id, batch_executor.submit(_analyze_batch_item, item))
+        )
+
+        while len(pending) >= config.BATCH_MAX_IN_FLIGHT or (
+            pending and pending[0][2].done()
+        ):
+            yield _drain_one()
+
+    while pending:
+        yield _drain_one()
+
+    if truncated:
+        yield json.dumps(
+            {"error": f"Lote excede o limite de {config.BATCH_MAX_EMAILS} emails"},
+            ensure_ascii=False,
+        ) + "\n"
+
+
+def _has_upload():
+    """Indica se a requisição traz um arquivo de email"""
+    return "email_file" in request.files and request.files["email_file"].filename != ""
 
 
 def _extract_email_text():
@@ -55,14 +471,16 @@ def _extract_email_text():
     """
     email_text = ""
 
-    if "email_file" in request.files and request.files["email_file"].filename != "":
+    if _has_upload():
         file = request.files["email_file"]
 
         try:
             email_text = extract_text_from_file(file)
         except ValueError as e:
+            metrics.record_error("extract", e)
             return jsonify({"error": f"Erro no arquivo: {str(e)}"}), 400
         except Exception as e:
+            metrics.record_error("extract", e)
             return (
                 jsonify({"error": f"Erro inesperado ao processar arquivo: {str(e)}"}),
                 500,
@@ -74,7 +492,9 @@ def _extract_email_text():
     if not email_text:
         return (
             jsonify(
-                {"error": "Nenhum texto ou arquivo (.txt, .pdf) de e-mail fornecido"}
+                {
+                    "error": "Nenhum texto ou arquivo (.txt, .pdf, .eml) de e-mail fornecido"
+                }
             ),
             400,
         )
@@ -0,0 +1,176 @@
+"""
+Modo de serviço assíncrono (ASGI) do EmailFlow.
+
+    OPENAI_ASYNC_ENABLED=True gunicorn asgi:application -k uvicorn_worker.UvicornWorker
+
+No modo síncrono (``gunicorn app:app``), cada requisição ocupa um worker
+inteiro enquanto espera a OpenAI. Aqui, POST /analyze é atendido no event
+loop do worker: a leitura do corpo e as chamadas à OpenAI (pelo cliente
+assíncrono) são multiplexadas, enquanto a extração do arquivo, o
+pré-processamento e as camadas locais da cascata rodam em um pool de
+ASYNC_EXECUTOR_WORKERS threads. As demais rotas continuam no app Flask,
+executado em ASYNC_WSGI_THREADS threads.
+"""
+
+import asyncio
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from a2wsgi import WSGIMiddleware
+from a2wsgi.wsgi import build_environ
+
+from app import (
+    app,
+    config,
+    email_classifier,
+    _analysis_error,
+    _analysis_response,
+    _read_analyze_request,
+)
+from utils import async_runner
+
+logger = logging.getLogger(__name__)
+
+SPOOL_MAX_MEMORY_BYTES = 1024 * 1024
+# campos do formulário enviados junto com o arquivo
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+wsgi_application = WSGIMiddleware(app, workers=config.ASYNC_WSGI_THREADS)
+
+
+async def application(scope: Dict[str, Any], receive: Callable, send: Callable):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+    elif (
+        scope["type"] == "http"
+        and scope["method"] == "POST"
+        and scope["path"] == "/analyze"
+    ):
+        await _analyze(scope, receive, send)
+    else:
+        await wsgi_application(scope, receive, send)
+
+
+async def _lifespan(receive: Callable, send: Callable) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # executado em cada worker, depois do fork
+            loop = asyncio.get_running_loop()
+            loop.set_default_executor(
+                ThreadPoolExecutor(
+                    max_workers=config.ASYNC_EXECUTOR_WORKERS,
+                    thread_name_prefix="async-executor",
+                )
+            )
+            async_runner.use_running_loop()
+            if (
+                email_classifier.openai_client.client is not None
+                and email_classifier.openai_client.async_client is None
+            ):
+                logger.warning(
+                    "OPENAI_ASYNC_ENABLED=False: as chamadas à OpenAI vão ocupar "
+                    "threads do executor em vez de aguardar no event loop"
+                )
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def _analyze(scope: Dict[str, Any], receive: Callable, send: Callable):
+    """
+    POST /analyze com as mesmas validações e o mesmo formato de resposta
+    da rota do Flask
+    """
+    loop = asyncio.get_running_loop()
+    received = await _receive_body(receive)
+    if received is None:
+        return
+
+    body, size = received
+    if size > config.UPLOAD_MAX_BYTES + FORM_OVERHEAD_BYTES:
+        body.close()
+        await _send_response(
+            send, _render(lambda: ({"error": "Requisição grande demais"}, 413))
+        )
+        return
+
+    environ = build_environ(scope, body)
+    environ["CONTENT_LENGTH"] = str(size)
+    try:
+        fields, error = await loop.run_in_executor(None, _read_request, environ)
+    finally:
+        body.close()
+    if error is not None:
+        await _send_response(send, error)
+        return
+
+    email_text, budget_ms, extract_ms = fields
+    try:
+        if (
+            config.OPENAI_ASYNC_ENABLED
+            and email_classifier.openai_client.is_async_available()
+        ):
+            result = await email_classifier.analyze_email_async(email_text, budget_ms)
+        else:
+            result = await loop.run_in_executor(
+                None, email_classifier.analyze_email, email_text, budget_ms
+            )
+        response = _render(lambda: _analysis_response(result, extract_ms))
+    except Exception as e:
+        response = _render(lambda: _analysis_error(e))
+    await _send_response(send, response)
+
+
+async def _receive_body(receive: Callable) -> Optional[Tuple[Any, int]]:
+    """
+    Lê o corpo da requisição (em memória até 1 MB, depois em disco); None
+    se o cliente desconectar. Acima do limite, o restante é descartado.
+    """
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY_BYTES)
+    limit = config.UPLOAD_MAX_BYTES + FORM_OVERHEAD_BYTES
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            body.close()
+            return None
+
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size <= limit:
+            body.write(chunk)
+        if not message.get("more_body", False):
+            break
+
+    body.seek(0)
+    return body, size
+
+
+def _read_request(environ: Dict[str, Any]):
+    """Validação e extração do texto no contexto de requisição do Flask"""
+    with app.request_context(environ):
+        fields, error = _read_analyze_request()
+        return fields, app.make_response(error) if error else None
+
+
+def _render(build: Callable[[], Any]):
+    with app.app_context():
+        return app.make_response(build())
+
+
+async def _send_response(send: Callable, response) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in response.headers.items()
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": response.get_data()})
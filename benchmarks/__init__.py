@@ -0,0 +1,3 @@
+"""
+Suíte de benchmarks com corpus sintético de emails financeiros em português
+"""
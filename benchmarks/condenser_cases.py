@@ -0,0 +1,93 @@
+"""
+Casos de referência do EmailCondenser: o que deve ser removido (histórico
+citado, assinatura) e o que nunca pode ser removido (linhas do corpo).
+
+    python -m benchmarks.condenser_cases
+
+Termina com código 1 se algum caso falhar; também conferido pelo
+``benchmarks.run``.
+"""
+
+import sys
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+# (nome, email, texto esperado depois da condensação)
+CASES: List[Tuple[str, str, str]] = [
+    (
+        "despedida_antes_do_pedido",
+        "Bom dia,\nObrigado!\nAinda não recebi o boleto de março, podem verificar"
+        " a cobrança do cartão? Preciso de uma solução urgente.\nProtocolo 1234",
+        "Bom dia,\nObrigado!\nAinda não recebi o boleto de março, podem verificar"
+        " a cobrança do cartão? Preciso de uma solução urgente.\nProtocolo 1234",
+    ),
+    (
+        "despedida_antes_de_frase_curta",
+        "Bom dia, segue o comprovante do pagamento.\nObrigado,\n"
+        "Preciso da baixa até sexta.",
+        "Bom dia, segue o comprovante do pagamento.\nObrigado,\n"
+        "Preciso da baixa até sexta.",
+    ),
+    (
+        "assinatura_com_cargo_e_contatos",
+        "Bom dia,\nPoderiam enviar a segunda via do boleto de março?\n\n"
+        "Atenciosamente,\nAna Souza\nGerente Financeira\nXPTO Comércio Ltda.\n"
+        "Tel: (11) 91234-5678\nana.souza@xpto.com.br",
+        "Bom dia,\nPoderiam enviar a segunda via do boleto de março?\n\n"
+        "Atenciosamente,",
+    ),
+    (
+        "assinatura_maior_que_o_corpo",
+        "Pago.\nAbraços,\nAna Souza\nGerente Financeira\nXPTO Comércio",
+        "Pago.\nAbraços,\nAna Souza\nGerente Financeira\nXPTO Comércio",
+    ),
+    (
+        "linha_do_corpo_com_em",
+        "Oi,\nsegue o pedido.\nEm anexo o comprovante.\nEm 10/10 fulano escreveu:\n> abc",
+        "Oi,\nsegue o pedido.\nEm anexo o comprovante.",
+    ),
+    (
+        "linha_do_corpo_com_em_sem_ponto",
+        "Oi, segue o pedido\nEm anexo o comprovante\n"
+        "Em 10 de out. de 2022, Bob <bob@example.com> escreveu:\n> abc",
+        "Oi, segue o pedido\nEm anexo o comprovante",
+    ),
+    (
+        "cabecalho_do_gmail_quebrado",
+        "Podem confirmar o pagamento da fatura?\n\n"
+        "Em seg., 10 de out. de 2022 às 10:00, Fulano da Silva <\n"
+        "fulano@banco.com.br> escreveu:\n> texto antigo\n> mais texto",
+        "Podem confirmar o pagamento da fatura?",
+    ),
+    (
+        "cabecalho_em_ingles",
+        "Please check the invoice.\n\n"
+        "On Mon, Oct 10, 2022 at 10:00 AM Bob <bob@example.com> wrote:\n> abc",
+        "Please check the invoice.",
+    ),
+]
+
+
+def failures(condenser: Any) -> List[str]:
+    """Nomes dos casos em que o texto condensado difere do esperado"""
+    return [
+        name
+        for name, email_text, expected in CASES
+        if condenser.condense(email_text).text != expected
+    ]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from utils.condenser import EmailCondenser
+
+    failed = failures(EmailCondenser())
+    print(
+        json.dumps(
+            {"cases": len(CASES), "failures": failed}, indent=2, ensure_ascii=False
+        )
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,202 @@
+import sys
+import json
+import random
+import argparse
+from typing import Dict, List, Optional, Sequence
+
+GREETINGS = ["Olá", "Bom dia", "Boa tarde", "Prezados", "Caro time", "Oi"]
+CLOSINGS = [
+    "Atenciosamente",
+    "Obrigado",
+    "Abraços",
+    "Cordialmente",
+    "Fico no aguardo",
+]
+NAMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Felipe", "Giovana", "Hugo"]
+PRODUCTS = ["cartão", "empréstimo", "financiamento", "crédito", "conta corrente"]
+DOCUMENTS = ["comprovante", "extrato", "relatório", "boleto", "fatura", "contrato"]
+
+PRODUTIVO_SENTENCES = [
+    "Gostaria de saber o status da solicitação {protocolo} referente ao {product}.",
+    "Preciso de uma atualização sobre o pedido de crédito aberto na semana passada.",
+    "O boleto de R$ {amount} venceu em {date} e o pagamento ainda não foi confirmado.",
+    "Segue em anexo o {document} solicitado para validar o cadastro.",
+    "Estou com um problema no aplicativo: o acesso à conta não funciona desde {date}.",
+    "Por favor, verificar a cobrança duplicada na fatura de {month}.",
+    "Quando será liberado o valor de R$ {amount} do {product}?",
+    "Poderiam agendar uma reunião para revisar o relatório de auditoria?",
+    "O chamado {protocolo} continua sem resposta, é urgente.",
+    "Solicito a emissão do {document} do último trimestre para compliance.",
+]
+IMPRODUTIVO_SENTENCES = [
+    "Feliz Natal a toda a equipe, boas festas!",
+    "Parabéns pelo aniversário, {name}! Muitas felicidades.",
+    "Só passando para dizer que adorei o evento de ontem.",
+    "Espero que esteja bem, como vai a família?",
+    "Confira nossa promoção com desconto de {percent}% para clientes.",
+    "Compartilhando as fotos da confraternização nas redes sociais.",
+    "Tudo bem por aí? Vamos marcar um café qualquer dia.",
+    "Boas férias, {name}! Aproveite bastante.",
+    "Curtir e seguir nossa página no instagram rende cupom de {percent}%.",
+    "Apenas para cumprimentar e desejar uma ótima semana.",
+]
+FILLER_SENTENCES = [
+    "Agradeço desde já a atenção.",
+    "Qualquer dúvida estou à disposição.",
+    "Fico no aguardo de um retorno.",
+    "Obrigado pela parceria de sempre.",
+]
+MONTHS = ["janeiro", "fevereiro", "março", "abril", "maio", "junho"]
+
+LENGTHS = {"short": (1, 2), "long": (12, 24)}
+LINES_PER_PDF_PAGE = 45
+PDF_LINE_WIDTH = 90
+
+
+def _fill(sentence: str, rng: random.Random) -> str:
+    return sentence.format(
+        protocolo=f"#{rng.randint(10000, 99999)}",
+        product=rng.choice(PRODUCTS),
+        document=rng.choice(DOCUMENTS),
+        amount=f"{rng.randint(100, 99999):,}".replace(",", "."),
+        date=f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}",
+        month=rng.choice(MONTHS),
+        name=rng.choice(NAMES),
+        percent=rng.choice([10, 15, 20, 30, 50]),
+    )
+
+
+def generate_email(rng: random.Random, category: str, length: str) -> str:
+    """
+    Monta um email sintético em português: saudação, frases da categoria
+    (com frases neutras intercaladas nos longos) e despedida
+    """
+    sentences = (
+        PRODUTIVO_SENTENCES if category == "produtivo" else IMPRODUTIVO_SENTENCES
+    )
+    low, high = LENGTHS[length]
+
+    body = []
+    for _ in range(rng.randint(low, high)):
+        body.append(_fill(rng.choice(sentences), rng))
+        if length == "long" and rng.random() < 0.3:
+            body.append(rng.choice(FILLER_SENTENCES))
+
+    signature = rng.choice(NAMES)
+    return f"{rng.choice(GREETINGS)},\n\n{' '.join(body)}\n\n{rng.choice(CLOSINGS)},\n{signature}"
+
+
+def generate_corpus(size: int, seed: int = 42) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Gera um corpus reproduzível com ``size`` emails por tamanho (curto e
+    longo), metade produtivos e metade improdutivos
+    """
+    rng = random.Random(seed)
+    corpus: Dict[str, List[Dict[str, str]]] = {}
+
+    for length in LENGTHS:
+        emails = []
+        for i in range(size):
+            category = "produtivo" if i % 2 == 0 else "improdutivo"
+            emails.append(
+                {
+                    "category": category,
+                    "length": length,
+                    "text": generate_email(rng, category, length),
+                }
+            )
+        corpus[length] = emails
+
+    return corpus
+
+
+def render_txt(text: str) -> bytes:
+    return text.encode("utf-8")
+
+
+def _wrap(text: str, width: int) -> List[str]:
+    lines = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split():
+            if line and len(line) + len(word) + 1 > width:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+    return lines
+
+
+def _escape_pdf_text(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_pdf(text: str) -> bytes:
+    """
+    Gera um PDF mínimo (Helvetica, WinAnsiEncoding) com o texto do email,
+    sem dependências externas
+    """
+    lines = _wrap(text, PDF_LINE_WIDTH)
+    pages = [
+        lines[i : i + LINES_PER_PDF_PAGE]
+        for i in range(0, len(lines), LINES_PER_PDF_PAGE)
+    ] or [[""]]
+
+    font_id = 3 + 2 * len(pages)
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode(),
+    ]
+    for i, page_lines in enumerate(pages):
+        objects.append(
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                f"/Contents {4 + 2 * i} 0 R /Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+            ).encode()
+        )
+        shown = " ".join(f"({_escape_pdf_text(line)}) '" for line in page_lines)
+        stream = f"BT /F1 11 Tf 50 760 Td 14 TL {shown} ET".encode("cp1252", "replace")
+        objects.append(
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+    objects.append(
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    )
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode()
+    return output
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Grava o corpus rotulado em JSONL ({"text", "category"}), ex. para treino"""
+    parser = argparse.ArgumentParser(description="Exporta o corpus sintético")
+    parser.add_argument("output", help="arquivo JSONL de saída")
+    parser.add_argument("--size", type=int, default=500, help="emails por tamanho")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    corpus = generate_corpus(args.size, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        for email in corpus["short"] + corpus["long"]:
+            record = {"text": email["text"], "category": email["category"]}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
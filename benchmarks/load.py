@@ -0,0 +1,275 @@
+"""
+Gerador de carga para o endpoint /analyze.
+
+    python -m benchmarks.load --url http://127.0.0.1:5000/analyze --concurrency 16 --requests 1000
+    python -m benchmarks.load --duration 60 --output carga.json
+    python -m benchmarks.load --url http://127.0.0.1:5000/analyze/stream --stream
+
+Envia emails do corpus sintético com N conexões simultâneas (HTTP/1.1
+com keep-alive) e informa vazão, percentis de latência, códigos de status,
+a distribuição de métodos de classificação e origens da resposta e a
+fração de requisições em que cada camada da cascata foi consultada. Com
+``--stream`` (endpoint SSE), mede também o tempo até o primeiro evento
+(categoria) e até o primeiro trecho da resposta.
+"""
+
+import sys
+import json
+import time
+import threading
+import argparse
+import http.client
+import statistics
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from .corpus import generate_corpus
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _percentile(ordered: Sequence[float], percentile: float) -> float:
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    return {
+        "mean_ms": round(statistics.fmean(ordered), 2),
+        **{f"p{p}_ms": round(_percentile(ordered, p), 2) for p in PERCENTILES},
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+class LoadRun:
+    """Estado compartilhado entre as threads de um teste de carga"""
+
+    def __init__(
+        self,
+        url: str,
+        bodies: List[bytes],
+        total_requests: Optional[int],
+        deadline: Optional[float],
+        budget_ms: Optional[float],
+        timeout: float,
+        stream: bool = False,
+    ):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.path = parts.path or "/analyze"
+        self.bodies = bodies
+        self.total_requests = total_requests
+        self.deadline = deadline
+        self.budget_ms = budget_ms
+        self.timeout = timeout
+        self.stream = stream
+        self._sequence = count()
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.methods: Counter = Counter()
+        self.generated_by: Counter = Counter()
+        self.cascade_tiers: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.first_event: List[float] = []
+        self.first_token: List[float] = []
+
+    def next_index(self) -> Optional[int]:
+        index = next(self._sequence)
+        if self.total_requests is not None and index >= self.total_requests:
+            return None
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return None
+        return index
+
+    def _connect(self) -> http.client.HTTPConnection:
+        connection_class = (
+            http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        )
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def worker(self) -> None:
+        connection = self._connect()
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        if self.budget_ms:
+            headers["X-Request-Budget-Ms"] = f"{self.budget_ms:g}"
+
+        try:
+            while True:
+                index = self.next_index()
+                if index is None:
+                    return
+
+                body = self.bodies[index % len(self.bodies)]
+                started = time.perf_counter()
+                try:
+                    connection.request("POST", self.path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    if self.stream and response.status == 200:
+                        payload, firsts = self._read_events(response, started)
+                    else:
+                        payload, firsts = response.read(), {}
+                except (OSError, http.client.HTTPException) as e:
+                    with self._lock:
+                        self.errors[type(e).__name__] += 1
+                    connection.close()
+                    connection = self._connect()
+                    continue
+
+                elapsed = (time.perf_counter() - started) * 1000
+                self._record(response.status, payload, elapsed, firsts)
+        finally:
+            connection.close()
+
+    def _read_events(
+        self, response: http.client.HTTPResponse, started: float
+    ) -> Tuple[bytes, Dict[str, float]]:
+        """
+        Lê o stream SSE até o fim; devolve os dados do evento final e o
+        instante (ms) em que cada tipo de evento chegou pela primeira vez
+        """
+        firsts: Dict[str, float] = {}
+        event, payload = None, b""
+        for line in iter(response.readline, b""):
+            line = line.rstrip(b"\r\n")
+            if line.startswith(b"event: "):
+                event = line[7:].decode()
+                firsts.setdefault(event, (time.perf_counter() - started) * 1000)
+            elif line.startswith(b"data: ") and event in ("done", "error"):
+                payload = line[6:]
+        return payload, firsts
+
+    def _record(
+        self,
+        status: int,
+        payload: bytes,
+        elapsed_ms: float,
+        firsts: Dict[str, float],
+    ) -> None:
+        try:
+            result = json.loads(payload)
+        except ValueError:
+            result = {}
+
+        with self._lock:
+            self.latencies.append(elapsed_ms)
+            if "classification" in firsts:
+                self.first_event.append(firsts["classification"])
+            if "token" in firsts:
+                self.first_token.append(firsts["token"])
+            self.statuses[str(status)] += 1
+            if status == 200:
+                self.methods[result.get("metodo_classificacao", "?")] += 1
+                self.generated_by[result.get("gerado_por", "?")] += 1
+                cascade = result.get("cascata") or {}
+                self.cascade_tiers.update(cascade.get("tiers", []))
+
+    def report(self, elapsed_seconds: float) -> Dict[str, Any]:
+        requests = len(self.latencies)
+        succeeded = self.statuses.get("200", 0)
+        report = {
+            "requests": requests,
+            "duration_s": round(elapsed_seconds, 3),
+            "throughput_rps": round(requests / max(elapsed_seconds, 1e-9), 2),
+            "latency": _summarize(self.latencies),
+            "status": dict(self.statuses),
+            "metodo_classificacao": dict(self.methods),
+            "gerado_por": dict(self.generated_by),
+            # fração das respostas em que cada camada da cascata foi consultada
+            "camadas_consultadas": {
+                tier: round(hits / max(succeeded, 1), 4)
+                for tier, hits in self.cascade_tiers.items()
+            },
+            "connection_errors": dict(self.errors),
+        }
+        if self.stream:
+            report["time_to_first_event"] = _summarize(self.first_event)
+            report["time_to_first_token"] = _summarize(self.first_token)
+        return report
+
+
+def run_load(
+    url: str,
+    concurrency: int,
+    total_requests: Optional[int],
+    duration: Optional[float],
+    seed: int = 42,
+    size: int = 200,
+    length: str = "mixed",
+    budget_ms: Optional[float] = None,
+    timeout: float = 60.0,
+    stream: bool = False,
+) -> Dict[str, Any]:
+    corpus = generate_corpus(size, seed)
+    emails = corpus["short"] + corpus["long"] if length == "mixed" else corpus[length]
+    bodies = [urlencode({"email_text": email["text"]}).encode() for email in emails]
+
+    started = time.monotonic()
+    deadline = started + duration if duration else None
+    run = LoadRun(url, bodies, total_requests, deadline, budget_ms, timeout, stream)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(run.worker)
+
+    report = run.report(time.monotonic() - started)
+    report["concurrency"] = concurrency
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Gerador de carga para /analyze")
+    parser.add_argument("--url", default="http://127.0.0.1:5000/analyze")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, help="total de requisições")
+    parser.add_argument("--duration", type=float, help="duração em segundos")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--size", type=int, default=200, help="emails por tamanho")
+    parser.add_argument("--length", choices=("short", "long", "mixed"), default="mixed")
+    parser.add_argument(
+        "--budget-ms", type=float, help="orçamento de latência por requisição"
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="lê respostas SSE (use com /analyze/stream)",
+    )
+    parser.add_argument("--output", help="arquivo JSON com o relatório")
+    args = parser.parse_args(argv)
+
+    total_requests = args.requests
+    if total_requests is None and args.duration is None:
+        total_requests = 500
+
+    report = run_load(
+        args.url,
+        args.concurrency,
+        total_requests,
+        args.duration,
+        seed=args.seed,
+        size=args.size,
+        length=args.length,
+        budget_ms=args.budget_ms,
+        timeout=args.timeout,
+        stream=args.stream,
+    )
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0 if report["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Compara o backend ONNX int8 com o pipeline torch do HuggingFaceClient:
+concordância de rótulos e categorias, diferença de confiança e latência.
+
+    python -m benchmarks.onnx_parity --model nlptown/bert-base-multilingual-uncased-sentiment
+    python -m benchmarks.onnx_parity --tiny-model /tmp/tiny-bert   # sem rede
+
+Com ``--tiny-model`` um BERT minúsculo com pesos aleatórios e vocabulário
+tirado do corpus sintético é criado localmente, o que basta para validar a
+exportação, a quantização e o mapeamento de rótulos sem baixar nada.
+Requer torch, transformers, onnx e onnxruntime.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .corpus import generate_corpus
+
+TINY_LABELS = {0: "NEGATIVE", 1: "POSITIVE"}
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+
+
+def create_tiny_model(output_dir: str, texts: Sequence[str], seed: int = 42) -> str:
+    """Cria um BertForSequenceClassification minúsculo e seu tokenizer em disco"""
+    import torch
+    from transformers import (
+        BertConfig,
+        BertForSequenceClassification,
+        BertTokenizerFast,
+    )
+
+    os.makedirs(output_dir, exist_ok=True)
+    words = sorted({word for text in texts for word in text.lower().split()})
+    vocab_path = os.path.join(output_dir, "vocab.txt")
+    with open(vocab_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(SPECIAL_TOKENS + words) + "\n")
+
+    tokenizer = BertTokenizerFast(
+        vocab_file=vocab_path, do_lower_case=True, model_max_length=512
+    )
+    config = BertConfig(
+        vocab_size=len(SPECIAL_TOKENS) + len(words),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=512,
+        num_labels=len(TINY_LABELS),
+        id2label=TINY_LABELS,
+        label2id={label: i for i, label in TINY_LABELS.items()},
+    )
+    torch.manual_seed(seed)
+    model = BertForSequenceClassification(config)
+    model.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    return output_dir
+
+
+def _time_calls(fn: Callable[[Any], Any], items: Sequence[Any]) -> Dict[str, float]:
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(statistics.median(samples), 3),
+    }
+
+
+def compare_backends(
+    model_name: str,
+    texts: List[str],
+    onnx_dir: str,
+    intra_op_threads: int,
+    batch_size: int,
+) -> Dict[str, Any]:
+    from transformers import pipeline
+
+    from utils.huggingface_client import HuggingFaceClient
+    from utils.onnx_backend import MODEL_FILENAME, load_onnx_classifier
+
+    torch_pipeline = pipeline("sentiment-analysis", model=model_name, device=-1)
+    onnx_classifier = load_onnx_classifier(model_name, onnx_dir, intra_op_threads)
+    parser = HuggingFaceClient(model_name)
+
+    torch_outputs = torch_pipeline(texts, batch_size=batch_size, truncation=True)
+    onnx_outputs = onnx_classifier(texts, batch_size=batch_size, truncation=True)
+
+    same_label = 0
+    same_category = 0
+    score_diffs = []
+    for torch_output, onnx_output in zip(torch_outputs, onnx_outputs):
+        if torch_output["label"] == onnx_output["label"]:
+            same_label += 1
+            score_diffs.append(abs(torch_output["score"] - onnx_output["score"]))
+        torch_category = parser._parse_pipeline_results([torch_output])["category"]
+        onnx_category = parser._parse_pipeline_results([onnx_output])["category"]
+        same_category += torch_category == onnx_category
+
+    def batched(classifier: Callable[..., Any]) -> Callable[[List[str]], Any]:
+        return lambda chunk: classifier(chunk, batch_size=len(chunk), truncation=True)
+
+    chunks = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+    for classifier in (torch_pipeline, onnx_classifier):
+        classifier(texts[0], truncation=True)
+
+    torch_single = _time_calls(lambda t: torch_pipeline(t, truncation=True), texts)
+    onnx_single = _time_calls(lambda t: onnx_classifier(t, truncation=True), texts)
+    torch_batch = _time_calls(batched(torch_pipeline), chunks)
+    onnx_batch = _time_calls(batched(onnx_classifier), chunks)
+
+    onnx_model_path = onnx_classifier.model_path
+    torch_bytes = sum(
+        p.numel() * p.element_size() for p in torch_pipeline.model.parameters()
+    )
+
+    return {
+        "model": model_name,
+        "texts": len(texts),
+        "parity": {
+            "label_agreement": round(same_label / len(texts), 4),
+            "category_agreement": round(same_category / len(texts), 4),
+            "max_score_diff": round(max(score_diffs), 4) if score_diffs else None,
+            "mean_score_diff": (
+                round(statistics.fmean(score_diffs), 4) if score_diffs else None
+            ),
+        },
+        "latency": {
+            "torch_single": torch_single,
+            "onnx_single": onnx_single,
+            "torch_batch": torch_batch,
+            "onnx_batch": onnx_batch,
+            "single_speedup": round(torch_single["p50_ms"] / onnx_single["p50_ms"], 2),
+            "batch_speedup": round(torch_batch["p50_ms"] / onnx_batch["p50_ms"], 2),
+        },
+        "size_mb": {
+            "torch_fp32": round(torch_bytes / 2**20, 1),
+            "onnx_int8": round(os.path.getsize(onnx_model_path) / 2**20, 1),
+        },
+        "onnx_model": os.path.basename(os.path.dirname(onnx_model_path))
+        + "/"
+        + MODEL_FILENAME,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Paridade e velocidade: ONNX int8 x pipeline torch"
+    )
+    parser.add_argument("--model", help="nome no Hub ou diretório local do modelo")
+    parser.add_argument(
+        "--tiny-model",
+        metavar="DIR",
+        help="cria um modelo minúsculo local em DIR e o usa na comparação",
+    )
+    parser.add_argument("--onnx-dir", help="diretório dos modelos exportados")
+    parser.add_argument("--size", type=int, default=100, help="emails por tamanho")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threads", type=int, default=1, help="threads intra-op")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument(
+        "--min-agreement",
+        type=float,
+        default=0.95,
+        help="concordância mínima de categorias para sucesso",
+    )
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("NLTK_OFFLINE", "True")
+    from utils.nlp_utils import preprocess_text
+
+    corpus = generate_corpus(args.size, args.seed)
+    texts = [
+        " ".join(preprocess_text(email["text"]))
+        for email in corpus["short"] + corpus["long"]
+    ]
+
+    model_name = args.model
+    if args.tiny_model:
+        model_name = create_tiny_model(args.tiny_model, texts, args.seed)
+    if not model_name:
+        from config import Config
+
+        model_name = Config.HUGGINGFACE_MODEL
+
+    onnx_dir = args.onnx_dir or tempfile.mkdtemp(prefix="onnx-parity-")
+    report = compare_backends(
+        model_name, texts, onnx_dir, args.threads, args.batch_size
+    )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    return 0 if report["parity"]["category_agreement"] >= args.min_agreement else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,465 @@
+"""
+Servidor local compatível com o endpoint de chat completions da OpenAI,
+para testes de carga e de falhas sem acessar a API real.
+
+    python -m benchmarks.openai_stub --port 8001 --latency-ms 300 --latency-dist lognormal
+    OPENAI_API_KEY=teste OPENAI_BASE_URL=http://127.0.0.1:8001/v1 gunicorn app:app
+
+Responde às chamadas de classificação, de resposta e do modo estruturado
+do OpenAIClient, com latência sorteada de uma distribuição configurável e
+erros injetáveis (429 de rate limit, quota esgotada, 500 e conexão
+encerrada). Pedidos com ``stream: true`` recebem a resposta em trechos. GET /stats devolve as contagens por tipo de chamada e resultado.
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+EMAIL_PATTERN = re.compile(r"Email: (.*?)\n\nRespon", re.DOTALL)
+
+# prefixos de palavras (já stemizadas pelo pré-processamento) usados nas
+# respostas derivadas de regras
+PRODUTIVO_HINTS = (
+    "status",
+    "solicit",
+    "pedid",
+    "protocol",
+    "chamad",
+    "problem",
+    "err",
+    "falh",
+    "pagament",
+    "boleto",
+    "fatur",
+    "cobranç",
+    "document",
+    "comprov",
+    "extrat",
+    "relatóri",
+    "urgent",
+    "crédit",
+    "cartã",
+    "empréstim",
+    "financ",
+    "cadastr",
+    "atualiz",
+    "reuniã",
+    "preciso",
+    "gostari",
+)
+IMPRODUTIVO_HINTS = (
+    "natal",
+    "parabén",
+    "feliz",
+    "felicit",
+    "féri",
+    "promoç",
+    "descont",
+    "cupom",
+    "instagram",
+    "facebook",
+    "curt",
+    "segu",
+    "confratern",
+    "famíli",
+    "café",
+    "cumpriment",
+)
+
+RESPONSES = {
+    "produtivo": "Olá! Recebemos sua solicitação e ela já está em análise pela nossa equipe. Retornaremos com uma atualização em breve.",
+    "improdutivo": "Olá! Agradecemos muito a sua mensagem. Desejamos um ótimo dia!",
+}
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+
+class StubSettings:
+    """Comportamento do servidor: latência, respostas e erros injetados"""
+
+    def __init__(
+        self,
+        latency_ms: float = 200.0,
+        latency_dist: str = "fixed",
+        jitter_ms: float = 50.0,
+        answers: str = "rules",
+        canned_category: str = "produtivo",
+        rate_limit_rate: float = 0.0,
+        quota_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        disconnect_rate: float = 0.0,
+        retry_after: Optional[float] = None,
+        stream_interval_ms: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Distribuição de latência inválida: {latency_dist}")
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.jitter_ms = jitter_ms
+        self.answers = answers
+        self.canned_category = canned_category
+        self.rate_limit_rate = rate_limit_rate
+        self.quota_rate = quota_rate
+        self.server_error_rate = server_error_rate
+        self.disconnect_rate = disconnect_rate
+        self.retry_after = retry_after
+        self.stream_interval_ms = stream_interval_ms
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats: Counter = Counter()
+
+    def random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def sample_latency(self) -> float:
+        """Latência em segundos sorteada da distribuição configurada"""
+        mean, jitter = self.latency_ms, self.jitter_ms
+        with self._lock:
+            if self.latency_dist == "fixed":
+                value = mean
+            elif self.latency_dist == "uniform":
+                value = self._rng.uniform(mean - jitter, mean + jitter)
+            elif self.latency_dist == "normal":
+                value = self._rng.gauss(mean, jitter)
+            elif self.latency_dist == "lognormal":
+                # mediana = latency_ms; jitter_ms / latency_ms controla a cauda
+                value = mean * self._rng.lognormvariate(0, jitter / max(mean, 1))
+            else:
+                value = self._rng.expovariate(1 / max(mean, 1))
+        return max(0.0, value) / 1000.0
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+
+def classify_text(email_text: str) -> Tuple[str, float]:
+    """Categoria e confiança derivadas de palavras-chave"""
+    words = re.findall(r"\w+", email_text.lower())
+    produtivo = sum(1 for word in words if word.startswith(PRODUTIVO_HINTS))
+    improdutivo = sum(1 for word in words if word.startswith(IMPRODUTIVO_HINTS))
+    if produtivo == improdutivo:
+        return "improdutivo", 0.6
+    category = "produtivo" if produtivo > improdutivo else "improdutivo"
+    return category, min(0.99, 0.7 + 0.05 * abs(produtivo - improdutivo))
+
+
+def _request_kind(body: Dict[str, Any], prompt: str) -> str:
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return "structured"
+    if prompt.startswith("Classifique"):
+        return "classify"
+    return "response"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "openai-stub/1.0"
+
+    @property
+    def settings(self) -> StubSettings:
+        return self.server.settings
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format % args)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send_json(200, dict(self.settings.stats))
+        elif self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": []})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length)
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        try:
+            body = json.loads(raw_body or b"{}")
+            prompt = body["messages"][-1]["content"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            self._send_json(
+                400,
+                {"error": {"message": "Invalid request", "type": "invalid_request"}},
+            )
+            return
+
+        kind = _request_kind(body, prompt)
+        time.sleep(self.settings.sample_latency())
+
+        if self._inject_error(kind):
+            return
+
+        match = EMAIL_PATTERN.search(prompt)
+        email_text = match.group(1) if match else prompt
+        content = self._answer(kind, email_text, prompt)
+        self.settings.count(f"{kind}:ok")
+
+        prompt_tokens = sum(
+            len(str(message.get("content", "")).split()) for message in body["messages"]
+        )
+        completion_tokens = len(content.split())
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if body.get("stream"):
+            self._send_stream(body, content, usage)
+            return
+
+        self._send_json(
+            200,
+            {
+                "id": f"chatcmpl-stub-{time.time_ns()}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            },
+        )
+
+    def _send_stream(
+        self, body: Dict[str, Any], content: str, usage: Dict[str, int]
+    ) -> None:
+        """
+        Resposta em Server-Sent Events, uma palavra por trecho, com
+        ``stream_interval_ms`` entre os trechos (após a latência inicial)
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        base = {
+            "id": f"chatcmpl-stub-{time.time_ns()}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+        }
+        pieces = re.findall(r"\S+\s*", content)
+        chunks = [
+            {"choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}}]}
+        ]
+        chunks += [
+            {"choices": [{"index": 0, "delta": {"content": piece}}]} for piece in pieces
+        ]
+        chunks.append({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunks.append({"choices": [], "usage": usage})
+
+        try:
+            for index, chunk in enumerate(chunks):
+                if index and self.settings.stream_interval_ms:
+                    time.sleep(self.settings.stream_interval_ms / 1000.0)
+                self._write_chunk(
+                    f"data: {json.dumps({**base, **chunk}, ensure_ascii=False)}\n\n"
+                )
+            self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _write_chunk(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _answer(self, kind: str, email_text: str, prompt: str) -> str:
+        if self.settings.answers == "canned":
+            category, confidence = self.settings.canned_category, 0.9
+        else:
+            category, confidence = classify_text(email_text)
+
+        if kind == "classify":
+            return category.upper()
+
+        if kind == "structured":
+            return json.dumps(
+                {
+                    "categoria": category.upper(),
+                    "confianca": round(confidence, 2),
+                    "justificativa": "Resposta do servidor local de testes",
+                    "resposta": RESPONSES[category],
+                },
+                ensure_ascii=False,
+            )
+
+        if "email produtivo" in prompt:
+            return RESPONSES["produtivo"]
+        return RESPONSES["improdutivo"]
+
+    def _inject_error(self, kind: str) -> bool:
+        settings = self.settings
+        roll = settings.random()
+
+        threshold = settings.disconnect_rate
+        if roll < threshold:
+            settings.count(f"{kind}:disconnect")
+            self.close_connection = True
+            self.connection.close()
+            return True
+
+        threshold += settings.rate_limit_rate
+        if roll < threshold:
+            settings.count(f"{kind}:rate_limit")
+            headers = {}
+            if settings.retry_after is not None:
+                headers["Retry-After"] = f"{settings.retry_after:g}"
+            self._send_json(
+                429,
+                {
+                    "error": {
+                        "message": "Rate limit reached for requests",
+                        "type": "requests",
+                        "code": "rate_limit_exceeded",
+                    }
+                },
+                headers,
+            )
+            return True
+
+        threshold += settings.quota_rate
+        if roll < threshold:
+            settings.count(f"{kind}:insufficient_quota")
+            self._send_json(
+                429,
+                {
+                    "error": {
+                        "message": "You exceeded your current quota, please check your plan and billing details.",
+                        "type": "insufficient_quota",
+                        "code": "insufficient_quota",
+                    }
+                },
+            )
+            return True
+
+        threshold += settings.server_error_rate
+        if roll < threshold:
+            settings.count(f"{kind}:server_error")
+            self._send_json(
+                500,
+                {
+                    "error": {
+                        "message": "The server had an error",
+                        "type": "server_error",
+                    }
+                },
+            )
+            return True
+
+        return False
+
+    def _send_json(
+        self,
+        status: int,
+        payload: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def create_server(
+    settings: StubSettings, host: str = "127.0.0.1", port: int = 8001
+) -> ThreadingHTTPServer:
+    """Cria o servidor (porta 0 escolhe uma porta livre); use serve_forever()"""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.settings = settings
+    return server
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Servidor local compatível com a OpenAI"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument(
+        "--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="fixed"
+    )
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--answers", choices=("rules", "canned"), default="rules")
+    parser.add_argument(
+        "--canned-category", choices=("produtivo", "improdutivo"), default="produtivo"
+    )
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--quota-rate", type=float, default=0.0)
+    parser.add_argument("--server-error-rate", type=float, default=0.0)
+    parser.add_argument("--disconnect-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--retry-after", type=float, help="valor do cabeçalho Retry-After nos 429"
+    )
+    parser.add_argument(
+        "--stream-interval-ms",
+        type=float,
+        default=0.0,
+        help="intervalo entre os trechos das respostas em streaming",
+    )
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    settings = StubSettings(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        jitter_ms=args.jitter_ms,
+        answers=args.answers,
+        canned_category=args.canned_category,
+        rate_limit_rate=args.rate_limit_rate,
+        quota_rate=args.quota_rate,
+        server_error_rate=args.server_error_rate,
+        disconnect_rate=args.disconnect_rate,
+        retry_after=args.retry_after,
+        stream_interval_ms=args.stream_interval_ms,
+        seed=args.seed,
+    )
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    server = create_server(settings, args.host, args.port)
+    logger.info(
+        f"Servidor OpenAI local em http://{args.host}:{server.server_port}/v1 "
+        f"(latência {args.latency_dist} {args.latency_ms:g} ms)"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
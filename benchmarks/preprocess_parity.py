@@ -0,0 +1,216 @@
+"""
+Compara o TextPreprocessor com o preprocess_text original (substituições
+sequenciais por regex, tokenização e stemming a cada chamada).
+
+    python -m benchmarks.preprocess_parity
+    python -m benchmarks.preprocess_parity --texts 10000 --seed 7 --repeat 5
+
+Confere os tokens gerados para o corpus sintético e para textos aleatórios
+com e-mails, URLs, telefones, CPFs, números, acentos e pontuação, e mede as
+duas implementações nos emails longos do corpus. A cópia original chama
+word_tokenize sempre; sem os dados do punkt, cai no tratamento de erro e
+devolve as palavras sem stemming, o que o TextPreprocessor também faz.
+"""
+
+import os
+
+for _name, _value in {
+    "OPENAI_API_KEY": "",
+    "HUGGINGFACE_ENABLED": "False",
+    "NLTK_OFFLINE": "True",
+    "PRELOAD_MODELS": "False",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import re
+import sys
+import logging
+import json
+import time
+import random
+import argparse
+import statistics
+from typing import Any, Callable, List, Optional, Sequence
+
+from .corpus import generate_corpus
+
+# sem o punkt, a cópia original registra um erro a cada chamada
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.CRITICAL)
+
+NUMBERS_PATTERN = r"\b\d+\b"
+WHITESPACE_PATTERN = r"\s+"
+
+WORDS = [
+    "boleto",
+    "cartão",
+    "não",
+    "de",
+    "para",
+    "pagamento",
+    "transferência",
+    "cliente",
+    "solicitação",
+    "urgente",
+    "é",
+    "o",
+    "a",
+    "sr",
+    "ok",
+    "ação",
+    "crédito",
+    "débito",
+    "aniversário",
+    "parabéns",
+    "com",
+    "fatura",
+    "protocolo",
+    "R$",
+]
+SEPARATORS = [" ", " ", " ", "  ", "\n", "\t", ", ", ". ", "! ", "? ", "-", "/"]
+
+
+def legacy_preprocess_text(email_text: str) -> List[str]:
+    """Cópia do preprocess_text original (antes do modo offline e do TextPreprocessor)"""
+    from utils import nlp_utils
+
+    if not email_text or not email_text.strip():
+        return []
+
+    if len(email_text.strip()) < nlp_utils.MIN_TEXT_LENGTH:
+        return []
+
+    email_text = email_text.lower().strip()
+
+    email_text = re.sub(nlp_utils.EMAIL_PATTERN, " ", email_text)
+    email_text = re.sub(nlp_utils.URL_PATTERN, " ", email_text)
+
+    email_text = re.sub(nlp_utils.PHONE_PATTERN, " ", email_text)
+    email_text = re.sub(nlp_utils.CPF_PATTERN, " ", email_text)
+
+    email_text = re.sub(nlp_utils.PUNCTUATION_PATTERN, "", email_text)
+    email_text = re.sub(NUMBERS_PATTERN, "", email_text)
+    email_text = re.sub(WHITESPACE_PATTERN, " ", email_text).strip()
+
+    stop_words_filtered = nlp_utils.stop_words - nlp_utils.IMPORTANT_WORDS
+
+    try:
+        tokens = nlp_utils.word_tokenize(email_text)
+        processed_tokens: List[str] = []
+
+        for token in tokens:
+            if (
+                token.strip()
+                and len(token) > nlp_utils.MIN_TOKEN_LENGTH
+                and token not in stop_words_filtered
+            ):
+                try:
+                    stemmed: str = str(nlp_utils.stemmer.stem(token))
+                    if stemmed and len(stemmed) > nlp_utils.MIN_TOKEN_LENGTH:
+                        processed_tokens.append(stemmed)
+                except Exception:
+                    processed_tokens.append(token)
+
+        return processed_tokens
+
+    except Exception as e:
+        logger.error(f"Erro no processamento NLTK: {e}")
+        words = email_text.split()
+        return [
+            word
+            for word in words
+            if word
+            and len(word) > nlp_utils.MIN_TOKEN_LENGTH
+            and word not in stop_words_filtered
+        ]
+
+
+def count_mismatches(preprocessor: Any, texts: Sequence[str]) -> int:
+    """Número de textos em que os tokens divergem da implementação original"""
+    return sum(
+        preprocessor.preprocess(text) != legacy_preprocess_text(text) for text in texts
+    )
+
+
+def _entity(rng: random.Random) -> str:
+    kind = rng.randrange(6)
+    if kind == 0:
+        return f"{rng.choice(['ana.souza', 'suporte', 'x_y+1'])}@banco{rng.randint(1, 9)}.com.br"
+    if kind == 1:
+        return rng.choice(["https://", "http://", "www."]) + "exemplo.com/p?id=12"
+    if kind == 2:
+        return f"({rng.randint(10, 99)}) {rng.randint(9000, 99999)}-{rng.randint(1000, 9999)}"
+    if kind == 3:
+        return (
+            f"{rng.randint(100, 999)}.{rng.randint(100, 999)}."
+            f"{rng.randint(100, 999)}{rng.choice(['-', ''])}{rng.randint(10, 99)}"
+        )
+    if kind == 4:
+        return rng.choice(["123", "2024", "1.234,56", "10/10", "#98765", "3x"])
+    return rng.choice(["café", "é", "Ação!", "ÚLTIMO", "pré-aprovado", "e-mail"])
+
+
+def random_text(rng: random.Random, words: int) -> str:
+    parts = []
+    for _ in range(words):
+        word = _entity(rng) if rng.random() < 0.25 else rng.choice(WORDS)
+        if rng.random() < 0.1:
+            word = word.upper() if rng.random() < 0.5 else word.capitalize()
+        parts.append(word)
+        parts.append(rng.choice(SEPARATORS))
+    return "".join(parts)
+
+
+def _timing_ms(fn: Callable[[str], Any], texts: Sequence[str], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            fn(text)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Paridade e velocidade: TextPreprocessor x preprocess_text original"
+    )
+    parser.add_argument("--texts", type=int, default=3000, help="textos aleatórios")
+    parser.add_argument("--size", type=int, default=200, help="emails do corpus")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from utils.nlp_utils import PUNKT_AVAILABLE, TextPreprocessor, stop_words
+
+    preprocessor = TextPreprocessor(stop_words)
+
+    corpus = generate_corpus(args.size, args.seed)
+    corpus_texts = [email["text"] for emails in corpus.values() for email in emails]
+    rng = random.Random(args.seed)
+    texts = [random_text(rng, rng.randint(1, 60)) for _ in range(args.texts)]
+
+    corpus_mismatches = count_mismatches(preprocessor, corpus_texts)
+    random_mismatches = count_mismatches(preprocessor, texts)
+
+    long_texts = [email["text"] for email in corpus["long"]]
+    legacy_ms = _timing_ms(legacy_preprocess_text, long_texts, args.repeat)
+    preprocessor_ms = _timing_ms(preprocessor.preprocess, long_texts, args.repeat)
+
+    report = {
+        "punkt_available": PUNKT_AVAILABLE,
+        "corpus_texts": len(corpus_texts),
+        "corpus_mismatches": corpus_mismatches,
+        "random_texts": len(texts),
+        "random_mismatches": random_mismatches,
+        "long_texts": len(long_texts),
+        "legacy_p50_ms": round(legacy_ms, 3),
+        "preprocessor_p50_ms": round(preprocessor_ms, 3),
+        "speedup": round(legacy_ms / max(preprocessor_ms, 1e-9), 2),
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if corpus_mismatches or random_mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
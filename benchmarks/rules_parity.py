@@ -0,0 +1,145 @@
+"""
+Compara o KeywordMatcher com a contagem original das regras
+(``re.findall`` com IGNORECASE, uma varredura do texto por padrão).
+
+    python -m benchmarks.rules_parity
+    python -m benchmarks.rules_parity --texts 20000 --seed 7 --words 5000
+
+Gera textos aleatórios com o vocabulário dos próprios padrões, misturado a
+palavras de fora, números e separadores (espaços, quebras de linha, hífen,
+pontuação, espaço no fim do texto), e confere as contagens por categoria.
+Mede também as duas contagens em um texto longo.
+"""
+
+import os
+
+for _name, _value in {
+    "OPENAI_API_KEY": "",
+    "HUGGINGFACE_ENABLED": "False",
+    "NLTK_OFFLINE": "True",
+    "PRELOAD_MODELS": "False",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from typing import Any, Dict, List, Optional, Sequence
+
+FILLER_WORDS = ["de", "o", "a", "para", "cliente", "123", "2024", "Sr", "não", "é"]
+SEPARATORS = [" ", " ", " ", "  ", "\n", "-", ", ", ". ", "\t", "/"]
+
+
+def findall_counts(
+    patterns_by_category: Dict[str, List[str]], text: str
+) -> Dict[str, int]:
+    """Contagem original de _classify_by_rules: um re.findall por padrão"""
+    return {
+        category: sum(
+            len(re.findall(pattern, text, re.IGNORECASE)) for pattern in patterns
+        )
+        for category, patterns in patterns_by_category.items()
+    }
+
+
+def count_mismatches(
+    matcher: Any, patterns_by_category: Dict[str, List[str]], texts: Sequence[str]
+) -> int:
+    """Número de pares (texto, categoria) em que as contagens divergem"""
+    mismatches = 0
+    for text in texts:
+        email_lower = text.lower().strip()
+        counts = matcher.count(email_lower)
+        expected = findall_counts(patterns_by_category, email_lower)
+        mismatches += sum(
+            counts[category] != expected[category] for category in expected
+        )
+    return mismatches
+
+
+def pattern_vocabulary(patterns_by_category: Dict[str, List[str]]) -> List[str]:
+    """Palavras e expressões (com seus separadores) das alternativas dos padrões"""
+    vocabulary = set()
+    for patterns in patterns_by_category.values():
+        for pattern in patterns:
+            body = pattern[3:-3].replace(r"\s*$", "").replace(r"\s+", " ")
+            for alternative in body.split("|"):
+                vocabulary.add(alternative)
+                vocabulary.update(re.findall(r"\w+", alternative))
+    return sorted(vocabulary)
+
+
+def random_text(rng: random.Random, vocabulary: Sequence[str], words: int) -> str:
+    parts = []
+    for _ in range(words):
+        word = rng.choice(vocabulary if rng.random() < 0.6 else FILLER_WORDS)
+        if rng.random() < 0.1:
+            word = word.upper() if rng.random() < 0.5 else word.capitalize()
+        parts.append(word)
+        parts.append(rng.choice(SEPARATORS))
+    if rng.random() < 0.5:
+        parts.pop()
+    return "".join(parts)
+
+
+def _timing_ms(fn, text: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Paridade e velocidade: KeywordMatcher x re.findall por padrão"
+    )
+    parser.add_argument("--texts", type=int, default=5000, help="textos aleatórios")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--words", type=int, default=5000, help="palavras do texto da medição"
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    from utils.financial_email_classifier import FinancialEmailClassifier
+
+    classifier = FinancialEmailClassifier()
+    patterns = {
+        "produtivo": classifier.produtivo_patterns,
+        "improdutivo": classifier.improdutivo_patterns,
+    }
+    matcher = classifier.rule_matcher
+
+    rng = random.Random(args.seed)
+    vocabulary = pattern_vocabulary(patterns)
+    texts = [
+        random_text(rng, vocabulary, rng.randint(1, 40)) for _ in range(args.texts)
+    ]
+    mismatches = count_mismatches(matcher, patterns, texts)
+
+    long_text = random_text(rng, vocabulary, args.words).lower().strip()
+    findall_ms = _timing_ms(
+        lambda text: findall_counts(patterns, text), long_text, args.repeat
+    )
+    matcher_ms = _timing_ms(matcher.count, long_text, args.repeat)
+
+    report = {
+        "texts": len(texts),
+        "mismatches": mismatches,
+        "long_text_words": args.words,
+        "findall_p50_ms": round(findall_ms, 3),
+        "matcher_p50_ms": round(matcher_ms, 3),
+        "speedup": round(findall_ms / max(matcher_ms, 1e-9), 2),
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+Executa a suíte de benchmarks e compara com uma linha de base.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --output resultados.json
+    python -m benchmarks.run --save-baseline
+
+Sem OpenAI, HuggingFace, cache nem downloads do NLTK, para que os números
+reflitam apenas o código local e sejam reproduzíveis. A busca de quase
+duplicatas fica desligada no /analyze (as repetições do corpus virariam
+acertos) e é medida à parte; a condensação fica ligada, como em produção.
+"""
+
+import os
+
+for _name, _value in {
+    "OPENAI_API_KEY": "",
+    "HUGGINGFACE_ENABLED": "False",
+    "CACHE_ENABLED": "False",
+    "NEAR_DUPLICATE_ENABLED": "False",
+    "CONDENSE_ENABLED": "True",
+    "NLTK_OFFLINE": "True",
+    "PRELOAD_MODELS": "False",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import io
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from werkzeug.datastructures import FileStorage
+
+from .corpus import generate_corpus, render_pdf, render_txt
+from .rules_parity import count_mismatches
+from .preprocess_parity import count_mismatches as preprocess_mismatches
+from .condenser_cases import failures as condenser_failures
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_TOLERANCE = 0.25
+# meta de inicialização de um worker (import do app), independente da linha de base
+COLD_START_TARGET_MS = 1500.0
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(samples: Sequence[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(
+    fn: Callable[[Any], Any], items: Sequence[Any], repeat: int
+) -> Dict[str, float]:
+    """
+    Executa ``fn`` sobre todos os itens ``repeat`` vezes (após um
+    aquecimento) e devolve as latências por item em ms
+    """
+    for item in items[: max(1, len(items) // 10)]:
+        fn(item)
+
+    samples: List[float] = []
+    for _ in range(repeat):
+        for item in items:
+            started = time.perf_counter()
+            fn(item)
+            samples.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "n": len(samples),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p50_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(_percentile(samples, 0.95), 4),
+        "ops_per_second": round(1000 / statistics.fmean(samples), 1),
+    }
+
+
+def _upload(data: bytes, filename: str) -> FileStorage:
+    return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+
+def rules_parity(classifier: Any, texts: Sequence[str]) -> int:
+    """
+    Confere se o KeywordMatcher conta exatamente o que ``re.findall`` conta
+    com os padrões originais; devolve o número de divergências
+    """
+    patterns = {
+        "produtivo": classifier.produtivo_patterns,
+        "improdutivo": classifier.improdutivo_patterns,
+    }
+    return count_mismatches(classifier.rule_matcher, patterns, texts)
+
+
+def cold_start(repeat: int) -> Dict[str, float]:
+    """Tempo de importação do app (inicialização de um worker) em processo novo"""
+    code = (
+        "import time; started = time.perf_counter(); import app; "
+        "print(time.perf_counter() - started)"
+    )
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=REPO_ROOT,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append(float(output.strip().splitlines()[-1]) * 1000)
+
+    return {
+        "n": len(samples),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p50_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(_percentile(samples, 0.95), 4),
+    }
+
+
+def run_suite(
+    seed: int, size: int, repeat: int, only: Sequence[str] = ()
+) -> Dict[str, Any]:
+    from app import app, email_classifier
+    from utils.near_duplicate import NearDuplicateIndex
+    from utils.nlp_utils import extract_text_from_file, preprocess_text, preprocessor
+
+    corpus = generate_corpus(size, seed)
+    short_texts = [email["text"] for email in corpus["short"]]
+    long_texts = [email["text"] for email in corpus["long"]]
+    txt_files = [render_txt(text) for text in long_texts]
+    pdf_files = [render_pdf(text) for text in long_texts]
+    client = app.test_client()
+
+    # índice preenchido com o corpus: cada busca é um acerto, com o SimHash
+    long_tokens = [preprocess_text(text) for text in long_texts]
+    near_duplicates = NearDuplicateIndex()
+    for tokens in long_tokens:
+        near_duplicates.add(near_duplicates.fingerprint(tokens), None)
+
+    def analyze(text: str) -> None:
+        response = client.post("/analyze", data={"email_text": text})
+        if response.status_code != 200:
+            raise RuntimeError(f"/analyze devolveu {response.status_code}")
+
+    benchmarks = {
+        "extract_txt": (
+            lambda data: extract_text_from_file(_upload(data, "email.txt")),
+            txt_files,
+        ),
+        "extract_pdf": (
+            lambda data: extract_text_from_file(_upload(data, "email.pdf")),
+            pdf_files,
+        ),
+        "preprocess_short": (preprocess_text, short_texts),
+        "preprocess_long": (preprocess_text, long_texts),
+        "rules_short": (email_classifier._classify_by_rules, short_texts),
+        "rules_long": (email_classifier._classify_by_rules, long_texts),
+        "near_duplicate_lookup": (
+            lambda tokens: near_duplicates.lookup(near_duplicates.fingerprint(tokens)),
+            long_tokens,
+        ),
+        "analyze_short": (analyze, short_texts),
+        "analyze_long": (analyze, long_texts),
+    }
+
+    results = {}
+    for name, (fn, items) in benchmarks.items():
+        if only and name not in only:
+            continue
+        results[name] = measure(fn, items, repeat)
+        logging.info(f"{name}: p50 {results[name]['p50_ms']:.3f} ms")
+
+    if not only or "cold_start" in only:
+        results["cold_start"] = cold_start(max(3, repeat))
+
+    return {
+        "meta": {
+            "seed": seed,
+            "size": size,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+        "checks": {
+            "rules_parity_mismatches": rules_parity(
+                email_classifier, short_texts + long_texts
+            ),
+            "preprocess_parity_mismatches": preprocess_mismatches(
+                preprocessor, short_texts + long_texts
+            ),
+            "condenser_case_failures": condenser_failures(email_classifier.condenser),
+        },
+    }
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    cold_start_target_ms: float = COLD_START_TARGET_MS,
+) -> List[str]:
+    """
+    Lista as regressões: p50 acima da linha de base em mais que ``tolerance``
+    (fração), inicialização acima da meta absoluta e qualquer divergência
+    de paridade das regras ou do pré-processamento e caso do condensador
+    que falhe
+    """
+    regressions = []
+    for name, stats in current["results"].items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference:
+            continue
+        limit = reference["p50_ms"] * (1 + tolerance)
+        if stats["p50_ms"] > limit:
+            regressions.append(
+                f"{name}: p50 {stats['p50_ms']:.3f} ms > {limit:.3f} ms "
+                f"(linha de base {reference['p50_ms']:.3f} ms)"
+            )
+
+    cold_start = current["results"].get("cold_start")
+    if cold_start and cold_start["p50_ms"] > cold_start_target_ms:
+        regressions.append(
+            f"cold_start: p50 {cold_start['p50_ms']:.1f} ms > meta de "
+            f"{cold_start_target_ms:.0f} ms"
+        )
+
+    mismatches = current["checks"]["rules_parity_mismatches"]
+    if mismatches:
+        regressions.append(f"paridade das regras: {mismatches} divergências")
+
+    mismatches = current["checks"].get("preprocess_parity_mismatches")
+    if mismatches:
+        regressions.append(f"paridade do pré-processamento: {mismatches} divergências")
+
+    failed = current["checks"].get("condenser_case_failures")
+    if failed:
+        regressions.append(f"casos do condensador: {', '.join(failed)}")
+
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do EmailFlow")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--size", type=int, default=100, help="emails por tamanho")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", default=(), help="benchmarks a executar")
+    parser.add_argument("--output", help="arquivo JSON com os resultados")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--cold-start-target-ms",
+        type=float,
+        default=COLD_START_TARGET_MS,
+        help="meta absoluta para o p50 da inicialização do app",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="grava os resultados como nova linha de base",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    current = run_suite(args.seed, args.size, args.repeat, args.only)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Linha de base gravada em {args.baseline}")
+        return 0
+
+    baseline: Dict[str, Any] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    else:
+        print(json.dumps(current, indent=2, ensure_ascii=False))
+
+    regressions = compare(current, baseline, args.tolerance, args.cold_start_target_ms)
+    for name, stats in current["results"].items():
+        reference = baseline.get("results", {}).get(name, {}).get("p50_ms")
+        delta = (
+            f" ({(stats['p50_ms'] / reference - 1) * 100:+.1f}%)" if reference else ""
+        )
+        print(f"{name:<22} p50 {stats['p50_ms']:>10.3f} ms{delta}")
+
+    if regressions:
+        print("\nRegressões:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+
+    print("\nSem regressões em relação à linha de base e às metas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""
+Compara os modos de serviço com o mesmo número de processos.
+
+    python -m benchmarks.serving --workers 2 --concurrency 64 --duration 30
+    python -m benchmarks.serving --modes sync,gthread,async --output serving.json
+
+Sobe o servidor OpenAI local (latência fixa, padrão 300 ms) e, para cada
+modo, um gunicorn com ``--workers`` processos: ``sync`` é a configuração
+do Procfile (``gunicorn app:app``), ``gthread`` o mesmo app com
+``--threads`` threads por worker e ``async`` o app ASGI
+(``asgi:application`` com workers do uvicorn). Gera carga em /analyze com
+``benchmarks.load`` e amostra a memória do gunicorn (mestre e workers)
+durante o teste, em PSS, que divide as páginas compartilhadas pelo fork
+entre os processos.
+
+Cache de resultados e quase duplicatas ficam desligados, para que as
+repetições do corpus não escondam a espera pela OpenAI.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+from typing import Any, Dict, List, Optional, Sequence
+
+from .load import run_load
+
+MODES = ("sync", "gthread", "async")
+READY_TIMEOUT_SECONDS = 60.0
+MEMORY_SAMPLE_INTERVAL_SECONDS = 0.25
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _gunicorn_command(mode: str, port: int, workers: int, threads: int) -> List[str]:
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        str(workers),
+        "--timeout",
+        "120",
+    ]
+    if mode == "async":
+        return command + [
+            "--worker-class",
+            "uvicorn_worker.UvicornWorker",
+            "asgi:application",
+        ]
+    if mode == "gthread":
+        return command + ["--threads", str(threads), "app:app"]
+    return command + ["app:app"]
+
+
+def _process_tree(root: int) -> List[int]:
+    """O processo e seus descendentes, pelo ppid em /proc"""
+    parents: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # o nome do processo (entre parênteses) pode conter espaços
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+
+    tree, pending = [], [root]
+    while pending:
+        pid = pending.pop()
+        tree.append(pid)
+        pending.extend(parents.get(pid, ()))
+    return tree
+
+
+def _memory_kb(pid: int) -> int:
+    """PSS do processo (RSS se o kernel não expõe smaps_rollup)"""
+    for path, field in (
+        (f"/proc/{pid}/smaps_rollup", "Pss:"),
+        (f"/proc/{pid}/status", "VmRSS:"),
+    ):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1])
+        except OSError:
+            continue
+    return 0
+
+
+class MemorySampler(threading.Thread):
+    """Amostra a memória total da árvore de processos até ser parada"""
+
+    def __init__(self, root: int):
+        super().__init__(daemon=True)
+        self.root = root
+        self.samples: List[int] = []
+        self.processes = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(MEMORY_SAMPLE_INTERVAL_SECONDS):
+            tree = _process_tree(self.root)
+            self.processes = len(tree)
+            self.samples.append(sum(_memory_kb(pid) for pid in tree))
+
+    def stop(self) -> Dict[str, Any]:
+        self._stop_event.set()
+        self.join()
+        if not self.samples:
+            return {}
+        return {
+            "processes": self.processes,
+            "mean_mb": round(sum(self.samples) / len(self.samples) / 1024, 1),
+            "peak_mb": round(max(self.samples) / 1024, 1),
+        }
+
+
+def _wait_ready(name: str, port: int, process: subprocess.Popen, path: str) -> None:
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{name} encerrou com código {process.returncode}")
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+        try:
+            connection.request("GET", path)
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+        finally:
+            connection.close()
+    raise RuntimeError(f"{name} não respondeu a tempo")
+
+
+def _stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def run_mode(
+    mode: str,
+    env: Dict[str, str],
+    workers: int,
+    threads: int,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    log_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    port = _free_port()
+    env = {**env, "OPENAI_ASYNC_ENABLED": "True" if mode == "async" else "False"}
+    log = open(log_path or os.devnull, "ab")
+    process = subprocess.Popen(
+        _gunicorn_command(mode, port, workers, threads),
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    try:
+        _wait_ready("gunicorn", port, process, "/openai/status")
+        url = f"http://127.0.0.1:{port}/analyze"
+        if warmup:
+            run_load(url, concurrency, None, warmup)
+
+        sampler = MemorySampler(process.pid)
+        sampler.start()
+        report = run_load(url, concurrency, None, duration)
+        report["memory"] = sampler.stop()
+    finally:
+        _stop(process)
+        log.close()
+
+    report["mode"] = mode
+    report["workers"] = workers
+    if mode == "gthread":
+        report["threads"] = threads
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Vazão e memória dos modos de serviço (sync, gthread, async)"
+    )
+    parser.add_argument(
+        "--modes", default="sync,async", help="modos, separados por vírgula"
+    )
+    parser.add_argument("--workers", type=int, default=2, help="processos do gunicorn")
+    parser.add_argument(
+        "--threads", type=int, default=8, help="threads por worker no modo gthread"
+    )
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument(
+        "--openai-max-connections",
+        type=int,
+        default=100,
+        help="OPENAI_MAX_CONNECTIONS dos servidores (limita as chamadas simultâneas no modo async)",
+    )
+    parser.add_argument(
+        "--cascade-order",
+        help="CASCADE_ORDER dos servidores (ex.: openai, para que toda requisição espere a OpenAI)",
+    )
+    parser.add_argument("--log", help="arquivo para a saída dos gunicorns")
+    parser.add_argument("--output", help="arquivo JSON com o relatório")
+    args = parser.parse_args(argv)
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"modos desconhecidos: {', '.join(sorted(unknown))}")
+
+    stub_port = _free_port()
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.openai_stub",
+            "--port",
+            str(stub_port),
+            "--latency-ms",
+            f"{args.latency_ms:g}",
+            "--jitter-ms",
+            "0",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "teste",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        "OPENAI_MAX_CONNECTIONS": str(args.openai_max_connections),
+        "OPENAI_MAX_KEEPALIVE_CONNECTIONS": str(args.openai_max_connections),
+        "CACHE_ENABLED": "False",
+        "NEAR_DUPLICATE_ENABLED": "False",
+    }
+    if args.cascade_order:
+        env["CASCADE_ORDER"] = args.cascade_order
+
+    results = []
+    try:
+        _wait_ready("servidor OpenAI local", stub_port, stub, "/stats")
+        for mode in modes:
+            print(
+                f"{mode}: {args.duration:g} s com {args.concurrency} conexões",
+                file=sys.stderr,
+            )
+            results.append(
+                run_mode(
+                    mode,
+                    env,
+                    args.workers,
+                    args.threads,
+                    args.concurrency,
+                    args.duration,
+                    args.warmup,
+                    args.log,
+                )
+            )
+    finally:
+        _stop(stub)
+
+    summary = {
+        result["mode"]: {
+            "throughput_rps": result["throughput_rps"],
+            "p50_ms": result["latency"].get("p50_ms"),
+            "p99_ms": result["latency"].get("p99_ms"),
+            "memory_peak_mb": result["memory"].get("peak_mb"),
+            "rps_per_100mb": round(
+                result["throughput_rps"]
+                / max(result["memory"].get("peak_mb", 0), 1e-9)
+                * 100,
+                2,
+            ),
+        }
+        for result in results
+        if result.get("memory")
+    }
+    report = {
+        "openai_latency_ms": args.latency_ms,
+        "cascade_order": args.cascade_order,
+        "summary": summary,
+        "runs": results,
+    }
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0 if all(result["requests"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import logging
 from dotenv import load_dotenv
 
@@ -17,8 +18,67 @@ class Config:
 
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")
     OPENAI_MAX_TOKENS: int = int(os.getenv("OPENAI_MAX_TOKENS", "50"))
     OPENAI_TEMPERATURE: float = float(os.getenv("OPENAI_TEMPERATURE", "0.3"))
+    OPENAI_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))
+    OPENAI_BREAKER_FAILURE_THRESHOLD: int = int(
+        os.getenv("OPENAI_BREAKER_FAILURE_THRESHOLD", "3")
+    )
+    OPENAI_BREAKER_OPEN_SECONDS: float = float(
+        os.getenv("OPENAI_BREAKER_OPEN_SECONDS", "30")
+    )
+    OPENAI_BREAKER_MAX_OPEN_SECONDS: float = float(
+        os.getenv("OPENAI_BREAKER_MAX_OPEN_SECONDS", "600")
+    )
+    OPENAI_BREAKER_QUOTA_OPEN_SECONDS: float = float(
+        os.getenv("OPENAI_BREAKER_QUOTA_OPEN_SECONDS", "600")
+    )
+    OPENAI_STRUCTURED_MODE: bool = (
+        os.getenv("OPENAI_STRUCTURED_MODE", "False").lower() == "true"
+    )
+    OPENAI_ASYNC_ENABLED: bool = (
+        os.getenv("OPENAI_ASYNC_ENABLED", "False").lower() == "true"
+    )
+    OPENAI_SPECULATIVE_RESPONSE: bool = (
+        os.getenv("OPENAI_SPECULATIVE_RESPONSE", "False").lower() == "true"
+    )
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = int(
+        os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "10")
+    )
+
+    REQUEST_BUDGET_MS: float = float(os.getenv("REQUEST_BUDGET_MS", "8000"))
+    REMOTE_BUDGET_SHARE: float = float(os.getenv("REMOTE_BUDGET_SHARE", "0.6"))
+    TIER_WORKERS: int = int(os.getenv("TIER_WORKERS", "8"))
+
+    # cascata: camadas em ordem de custo; cada uma só é consultada quando as
+    # anteriores ficam abaixo do seu limiar de aceitação ou discordam
+    CASCADE_ORDER: list[str] = [
+        tier.strip().lower()
+        for tier in os.getenv("CASCADE_ORDER", "rules,linear,huggingface,openai").split(
+            ","
+        )
+        if tier.strip()
+    ]
+    CASCADE_ESCALATE_ON_DISAGREEMENT: bool = (
+        os.getenv("CASCADE_ESCALATE_ON_DISAGREEMENT", "True").lower() == "true"
+    )
+    RULES_MIN_CONFIDENCE: float = float(os.getenv("RULES_MIN_CONFIDENCE", "0.7"))
+    RULES_CONFIDENCE_THRESHOLD: float = float(
+        os.getenv("RULES_CONFIDENCE_THRESHOLD", "0.75")
+    )
+    LINEAR_MIN_CONFIDENCE: float = float(os.getenv("LINEAR_MIN_CONFIDENCE", "0.6"))
+    LINEAR_CONFIDENCE_THRESHOLD: float = float(
+        os.getenv("LINEAR_CONFIDENCE_THRESHOLD", "0.9")
+    )
+    HUGGINGFACE_MIN_CONFIDENCE: float = float(
+        os.getenv("HUGGINGFACE_MIN_CONFIDENCE", "0.2")
+    )
+    HUGGINGFACE_ACCEPT_THRESHOLD: float = float(
+        os.getenv("HUGGINGFACE_ACCEPT_THRESHOLD", "0.8")
+    )
+    OPENAI_MIN_CONFIDENCE: float = float(os.getenv("OPENAI_MIN_CONFIDENCE", "0.3"))
 
     HUGGINGFACE_MODEL: str = os.getenv(
         "HUGGINGFACE_MODEL", "nlptown/bert-base-multilingual-uncased-sentiment"
@@ -29,7 +89,89 @@ class Config:
     HUGGINGFACE_CONFIDENCE_THRESHOLD: float = float(
         os.getenv("HUGGINGFACE_CONFIDENCE_THRESHOLD", "0.3")
     )
+    HUGGINGFACE_BACKEND: str = os.getenv("HUGGINGFACE_BACKEND", "torch").lower()
+    HUGGINGFACE_SIDECAR_SOCKET: str = os.getenv("HUGGINGFACE_SIDECAR_SOCKET", "")
+    HUGGINGFACE_SIDECAR_TIMEOUT_SECONDS: float = float(
+        os.getenv("HUGGINGFACE_SIDECAR_TIMEOUT_SECONDS", "5")
+    )
+    HUGGINGFACE_SIDECAR_RETRY_SECONDS: float = float(
+        os.getenv("HUGGINGFACE_SIDECAR_RETRY_SECONDS", "10")
+    )
+    ONNX_MODEL_DIR: str = os.getenv(
+        "ONNX_MODEL_DIR", os.path.join(os.path.dirname(__file__), "models", "onnx")
+    )
+    ONNX_INTRA_OP_THREADS: int = int(os.getenv("ONNX_INTRA_OP_THREADS", "1"))
+    LINEAR_MODEL_PATH: str = os.getenv(
+        "LINEAR_MODEL_PATH",
+        os.path.join(os.path.dirname(__file__), "models", "linear_classifier.npz"),
+    )
+    HUGGINGFACE_BATCH_MAX_SIZE: int = int(os.getenv("HUGGINGFACE_BATCH_MAX_SIZE", "16"))
+    HUGGINGFACE_BATCH_MAX_WAIT_MS: float = float(
+        os.getenv("HUGGINGFACE_BATCH_MAX_WAIT_MS", "5")
+    )
+
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "True").lower() == "true"
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+    CACHE_SQLITE_PATH: str = os.getenv("CACHE_SQLITE_PATH", "")
+
+    CONDENSE_ENABLED: bool = os.getenv("CONDENSE_ENABLED", "True").lower() == "true"
+    CONDENSE_MAX_TOKENS: int = int(os.getenv("CONDENSE_MAX_TOKENS", "200"))
+    CONDENSE_HEAD_RATIO: float = float(os.getenv("CONDENSE_HEAD_RATIO", "0.75"))
+
+    NEAR_DUPLICATE_ENABLED: bool = (
+        os.getenv("NEAR_DUPLICATE_ENABLED", "True").lower() == "true"
+    )
+    NEAR_DUPLICATE_THRESHOLD: float = float(
+        os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.875")
+    )
+    NEAR_DUPLICATE_MAX_ENTRIES: int = int(
+        os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "10000")
+    )
+    NEAR_DUPLICATE_TTL_SECONDS: float = float(
+        os.getenv("NEAR_DUPLICATE_TTL_SECONDS", "3600")
+    )
+    NEAR_DUPLICATE_MIN_TOKENS: int = int(os.getenv("NEAR_DUPLICATE_MIN_TOKENS", "8"))
+    NEAR_DUPLICATE_MIN_CONFIDENCE: float = float(
+        os.getenv("NEAR_DUPLICATE_MIN_CONFIDENCE", "0.7")
+    )
+
+    BATCH_MAX_WORKERS: int = int(os.getenv("BATCH_MAX_WORKERS", "4"))
+    BATCH_MAX_IN_FLIGHT: int = int(os.getenv("BATCH_MAX_IN_FLIGHT", "16"))
+    BATCH_MAX_EMAILS: int = int(os.getenv("BATCH_MAX_EMAILS", "10000"))
+
+    JOBS_WORKERS: int = int(os.getenv("JOBS_WORKERS", "2"))
+    JOBS_MAX_QUEUED: int = int(os.getenv("JOBS_MAX_QUEUED", "32"))
+    JOBS_TIMEOUT_SECONDS: float = float(os.getenv("JOBS_TIMEOUT_SECONDS", "120"))
+    JOBS_RESULT_TTL_SECONDS: float = float(os.getenv("JOBS_RESULT_TTL_SECONDS", "3600"))
+    JOBS_MAX_WAIT_SECONDS: float = float(os.getenv("JOBS_MAX_WAIT_SECONDS", "25"))
+    JOBS_SQLITE_PATH: str = os.getenv(
+        "JOBS_SQLITE_PATH",
+        os.path.join(tempfile.gettempdir(), "emailflow-jobs.sqlite3"),
+    )
+
+    ASYNC_EXECUTOR_WORKERS: int = int(os.getenv("ASYNC_EXECUTOR_WORKERS", "4"))
+    ASYNC_WSGI_THREADS: int = int(os.getenv("ASYNC_WSGI_THREADS", "10"))
 
-    ALLOWED_EXTENSIONS: set[str] = {".txt", ".pdf"}
+    NLTK_DATA_DIR: str = os.getenv(
+        "NLTK_DATA_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "nltk_data"),
+    )
+    NLTK_OFFLINE: bool = os.getenv("NLTK_OFFLINE", "True").lower() == "true"
+    PRELOAD_MODELS: bool = os.getenv("PRELOAD_MODELS", "True").lower() == "true"
+
+    ALLOWED_EXTENSIONS: set[str] = {".txt", ".pdf", ".eml"}
+    UPLOAD_MAX_BYTES: int = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+    EML_MAX_BODY_BYTES: int = int(os.getenv("EML_MAX_BODY_BYTES", str(256 * 1024)))
+    PDF_MAX_PAGES: int = int(os.getenv("PDF_MAX_PAGES", "20"))
+    PDF_MAX_CHARS: int = int(os.getenv("PDF_MAX_CHARS", "20000"))
+    PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", "2"))
+    PDF_TIMEOUT_SECONDS: float = float(os.getenv("PDF_TIMEOUT_SECONDS", "10"))
     MIN_TEXT_LENGTH: int = int(os.getenv("MIN_TEXT_LENGTH", "10"))
     MIN_TOKEN_LENGTH: int = int(os.getenv("MIN_TOKEN_LENGTH", "2"))
+    PREPROCESS_FAST_TOKENIZER: bool = (
+        os.getenv("PREPROCESS_FAST_TOKENIZER", "False").lower() == "true"
+    )
+    PREPROCESS_STEM_CACHE_SIZE: int = int(
+        os.getenv("PREPROCESS_STEM_CACHE_SIZE", "50000")
+    )
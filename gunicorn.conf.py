@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import socket
+import subprocess
+
+# Carrega o app (e os modelos locais, via PRELOAD_MODELS) no processo mestre
+# antes do fork, para que os workers compartilhem a memória por copy-on-write.
+preload_app = os.getenv("GUNICORN_PRELOAD_APP", "True").lower() == "true"
+
+SIDECAR_SOCKET = os.getenv("HUGGINGFACE_SIDECAR_SOCKET", "")
+SIDECAR_AUTOSTART = (
+    os.getenv("HUGGINGFACE_SIDECAR_AUTOSTART", "False").lower() == "true"
+)
+SIDECAR_START_TIMEOUT_SECONDS = float(
+    os.getenv("HUGGINGFACE_SIDECAR_START_TIMEOUT_SECONDS", "180")
+)
+
+_sidecar = None
+
+
+def on_starting(server):
+    """
+    Com HUGGINGFACE_SIDECAR_AUTOSTART, inicia o sidecar de inferência e
+    aguarda o modelo carregar (o socket só aceita conexões depois disso),
+    para que os workers não caiam no modelo local durante a partida
+    """
+    global _sidecar
+    if not (SIDECAR_AUTOSTART and SIDECAR_SOCKET):
+        return
+
+    _sidecar = subprocess.Popen(
+        [sys.executable, "-m", "utils.inference_sidecar", "--socket", SIDECAR_SOCKET]
+    )
+    deadline = time.monotonic() + SIDECAR_START_TIMEOUT_SECONDS
+    while time.monotonic() < deadline and _sidecar.poll() is None:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(SIDECAR_SOCKET)
+            server.log.info(f"Sidecar de inferência pronto em {SIDECAR_SOCKET}")
+            return
+        except OSError:
+            time.sleep(0.5)
+        finally:
+            probe.close()
+    server.log.warning(
+        "Sidecar de inferência não respondeu; workers usarão o modelo local"
+    )
+
+
+def on_exit(server):
+    if _sidecar is not None and _sidecar.poll() is None:
+        _sidecar.terminate()
+        try:
+            _sidecar.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            _sidecar.kill()
@@ -88,17 +88,13 @@ function initFormValidation() {
 
     try {
       const formData = new FormData(form);
-      const response = await fetch('/analyze', {
-        method: 'POST',
-        body: formData
-      });
-
-      const data = await response.json();
-
-      if (response.ok) {
-        displayResults(data);
+      if (window.ReadableStream && window.TextDecoder) {
+        await analyzeWithStream(formData, () => {
+          if (formOverlay) formOverlay.classList.add('hidden');
+          if (submitBtn) submitBtn.classList.remove('loading');
+        });
       } else {
-        displayError(data.error || 'Erro desconhecido');
+        await analyzeWithoutStream(formData);
       }
     } catch (error) {
       displayError('Erro de conexão: ' + error.message);
@@ -109,7 +105,92 @@ function initFormValidation() {
   });
 }
 
-function displayResults(data) {
+async function analyzeWithoutStream(formData) {
+  const response = await fetch('/analyze', {
+    method: 'POST',
+    body: formData
+  });
+
+  const data = await response.json();
+
+  if (response.ok) {
+    displayResults(data);
+  } else {
+    displayError(data.error || 'Erro desconhecido');
+  }
+}
+
+async function analyzeWithStream(formData, onFirstEvent) {
+  const response = await fetch('/analyze/stream', {
+    method: 'POST',
+    body: formData
+  });
+
+  if (!response.ok || !response.body) {
+    const data = await response.json().catch(() => ({}));
+    displayError(data.error || 'Erro desconhecido');
+    return;
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let firstEvent = true;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const event = parseServerSentEvent(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+      if (!event) continue;
+
+      if (firstEvent) {
+        firstEvent = false;
+        onFirstEvent();
+      }
+      handleStreamEvent(event);
+    }
+  }
+}
+
+function parseServerSentEvent(rawEvent) {
+  let name = 'message';
+  const dataLines = [];
+
+  rawEvent.split('\n').forEach(line => {
+    if (line.startsWith('event: ')) {
+      name = line.slice(7);
+    } else if (line.startsWith('data: ')) {
+      dataLines.push(line.slice(6));
+    }
+  });
+
+  if (dataLines.length === 0) return null;
+  return { name, data: JSON.parse(dataLines.join('\n')) };
+}
+
+function handleStreamEvent(event) {
+  const responseElement = document.getElementById('suggested-response');
+
+  if (event.name === 'classification') {
+    displayResults({ categoria: event.data.categoria, resposta_automatica: '' });
+    if (responseElement) responseElement.classList.add('streaming');
+  } else if (event.name === 'token') {
+    if (responseElement) responseElement.textContent += event.data.texto;
+  } else if (event.name === 'done') {
+    if (responseElement) responseElement.classList.remove('streaming');
+    displayResults(event.data, false);
+  } else if (event.name === 'error') {
+    if (responseElement) responseElement.classList.remove('streaming');
+    displayError(event.data.error || 'Erro desconhecido');
+  }
+}
+
+function displayResults(data, scroll = true) {
   const resultsContainer = document.getElementById('results-container');
   const formSection = document.querySelector('.form-section');
   const categoryElement = document.getElementById('category');
@@ -120,14 +201,14 @@ function displayResults(data) {
   }
 
   if (responseElement) {
-    responseElement.textContent = data.resposta_automatica || 'Nenhuma resposta sugerida';
+    responseElement.textContent = data.resposta_automatica ?? 'Nenhuma resposta sugerida';
   }
 
 
   if (resultsContainer && formSection) {
     formSection.classList.add('hidden');
     resultsContainer.classList.remove('hidden');
-    resultsContainer.scrollIntoView({ behavior: 'smooth' });
+    if (scroll) resultsContainer.scrollIntoView({ behavior: 'smooth' });
   }
 }
 
@@ -0,0 +1,56 @@
+import os
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional
+
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Devolve o event loop compartilhado do processo, executado em uma thread
+    de fundo. O loop é recriado após um fork (ex.: workers do gunicorn).
+    """
+    global _loop, _loop_pid
+
+    pid = os.getpid()
+    if _loop is not None and _loop_pid == pid:
+        return _loop
+
+    with _lock:
+        if _loop is None or _loop_pid != pid:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="async-runner", daemon=True
+            )
+            thread.start()
+            _loop, _loop_pid = loop, pid
+
+    return _loop
+
+
+def use_running_loop() -> None:
+    """
+    Adota o loop em execução (ex.: o do servidor ASGI) como loop
+    compartilhado do processo, para que as rotas síncronas, executadas em
+    threads, usem os mesmos clientes assíncronos e conexões do servidor
+    """
+    global _loop, _loop_pid
+
+    with _lock:
+        _loop, _loop_pid = asyncio.get_running_loop(), os.getpid()
+
+
+def run_coroutine(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    """Executa uma corrotina no loop compartilhado e aguarda o resultado"""
+    loop = get_event_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coroutine.close()
+        raise RuntimeError("run_coroutine bloquearia o próprio event loop")
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
@@ -0,0 +1,155 @@
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada porque o circuito está aberto"""
+
+
+class CircuitBreaker:
+    """
+    Disjuntor para um serviço remoto.
+
+    Fechado: as chamadas passam normalmente. Abre após ``failure_threshold``
+    falhas consecutivas ou imediatamente em erros como quota esgotada e
+    rate limit. Aberto: as chamadas são recusadas até o fim do período de
+    espera, quando uma única chamada de teste (meio-aberto) é permitida.
+    Só o sucesso desse teste fecha o circuito; se ele falhar, o período de
+    espera dobra até ``max_open_seconds``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 600.0,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._current_open_seconds = open_seconds
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._open_count = 0
+        self._rejected_count = 0
+        self._last_error: Optional[str] = None
+        self._last_state_change = time.time()
+
+    def is_call_permitted(self) -> bool:
+        """Indica se uma chamada seria permitida agora, sem reservar o teste"""
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_OPEN:
+                return time.monotonic() >= self._open_until
+            return not self._probe_in_flight
+
+    def allow_request(self) -> bool:
+        """Reserva uma chamada; no estado meio-aberto, só um teste por vez"""
+        with self._lock:
+            if self._state == STATE_OPEN and time.monotonic() >= self._open_until:
+                self._transition(STATE_HALF_OPEN)
+
+            if self._state == STATE_CLOSED:
+                return True
+
+            if self._state == STATE_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            self._rejected_count += 1
+            return False
+
+    def record_success(self) -> None:
+        """
+        Registra um sucesso. Só o teste do estado meio-aberto fecha o
+        circuito; sucessos de chamadas que já estavam em andamento quando
+        ele abriu são ignorados
+        """
+        with self._lock:
+            if self._state == STATE_OPEN:
+                return
+            if self._state == STATE_HALF_OPEN:
+                if not self._probe_in_flight:
+                    return
+                self._probe_in_flight = False
+                self._current_open_seconds = self.open_seconds
+                self._transition(STATE_CLOSED)
+            self._consecutive_failures = 0
+
+    def release(self) -> None:
+        """Libera a reserva de uma chamada que não teve resultado (ex.: cancelada)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(
+        self,
+        reason: str,
+        open_immediately: bool = False,
+        open_seconds: Optional[float] = None,
+    ) -> None:
+        """
+        Registra uma falha. ``open_immediately`` abre o circuito sem esperar
+        o limite de falhas; ``open_seconds`` define um período mínimo de espera
+        (ex.: Retry-After ou quota esgotada).
+        """
+        with self._lock:
+            self._consecutive_failures += 1
+            self._last_error = reason
+
+            if self._state == STATE_HALF_OPEN:
+                self._probe_in_flight = False
+                self._current_open_seconds = min(
+                    self._current_open_seconds * 2, self.max_open_seconds
+                )
+                self._open(open_seconds)
+            elif self._state == STATE_CLOSED and (
+                open_immediately or self._consecutive_failures >= self.failure_threshold
+            ):
+                self._open(open_seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado atual do disjuntor, para exposição na API"""
+        with self._lock:
+            retry_in = max(0.0, self._open_until - time.monotonic())
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "retry_in_seconds": (
+                    round(retry_in, 1) if self._state == STATE_OPEN else 0.0
+                ),
+                "open_seconds": self._current_open_seconds,
+                "open_count": self._open_count,
+                "rejected_calls": self._rejected_count,
+                "last_error": self._last_error,
+                "last_state_change": self._last_state_change,
+            }
+
+    def _open(self, open_seconds: Optional[float]) -> None:
+        duration = max(self._current_open_seconds, open_seconds or 0.0)
+        self._open_until = time.monotonic() + duration
+        self._open_count += 1
+        self._transition(STATE_OPEN)
+        logger.warning(
+            f"Circuito {self.name} aberto por {duration:.0f}s: {self._last_error}"
+        )
+
+    def _transition(self, state: str) -> None:
+        if state != self._state:
+            logger.info(f"Circuito {self.name}: {self._state} -> {state}")
+            self._state = state
+            self._last_state_change = time.time()
@@ -0,0 +1,185 @@
+import re
+from typing import Dict, List, NamedTuple, Sequence
+
+REPLY_HEADER_PATTERNS = [
+    # Gmail/Apple Mail, em português e inglês: a linha de "Em"/"On" traz data,
+    # hora ou endereço e só pode quebrar antes de "escreveu:" se não terminar
+    # como uma frase (para não levar junto uma linha do corpo)
+    r"^[ \t]*Em\b(?=[^\n]*[\d@])(?:[^\n]{0,200}[^\n\s.!?;][ \t]*\n)?"
+    r"[^\n]{0,200}\bescreveu:[ \t]*$",
+    r"^[ \t]*On\b(?=[^\n]*[\d@])(?:[^\n]{0,200}[^\n\s.!?;][ \t]*\n)?"
+    r"[^\n]{0,200}\bwrote:[ \t]*$",
+    # Outlook e encaminhamentos
+    r"^[ \t]*-{2,}[ \t]*(?:Mensagem original|Original Message|Mensagem encaminhada"
+    r"|Forwarded message)[ \t]*-{2,}",
+    r"^[ \t]*(?:De|From):[^\n]+\n[ \t]*(?:Enviad[oa](?: em)?|Sent|Data|Date):",
+]
+QUOTED_LINE_PATTERN = r"^[ \t]*>.*(?:\n|$)"
+SIGNATURE_DELIMITER_PATTERN = r"^-- ?$"
+MOBILE_SIGNATURE_PATTERN = (
+    r"^[ \t]*(?:Enviado do meu|Enviado de meu|Sent from my|Obter o Outlook)\b.*$"
+)
+CLOSING_PATTERN = (
+    r"^[ \t]*(?:Atenciosamente|Att\.?|Atte\.?|Abraços?|Cordialmente|Saudações"
+    r"|Obrigad[oa]|Grat[oa]|Fico no aguardo|Best regards|Regards|Thanks)[ \t]*[,.!]?[ \t]*$"
+)
+# linhas de contato da assinatura: e-mail, site ou telefone
+CONTACT_PATTERN = r"@|https?://|www\.|\(?\d{2,3}\)?[ \t.-]?\d{4,5}[ \t.-]?\d{4}"
+# fim de frase: "?" ou "!", um ponto no meio da linha ou uma linha que termina
+# com palavra minúscula e ponto (nomes, cargos e empresas não fazem isso)
+SENTENCE_PATTERN = r"[?!]|\w{3,}[.;][ \t]+\S|\b[a-zà-ÿ]+[.;][ \t]*$"
+DISCLAIMER_PATTERNS = [
+    r"(?:esta|essa|this) (?:mensagem|e-?mail|message)\b.{0,120}"
+    r"(?:confidencia|privilegiad|destinat|confidential|privileged|intended)",
+    r"\baviso (?:legal|de confidencialidade)\b",
+    r"\b(?:confidentiality notice|disclaimer)\b",
+    r"\bantes de imprimir\b|\bpense no meio ambiente\b",
+]
+
+SIGNATURE_MAX_LINES = 8
+SIGNATURE_LINE_MAX_WORDS = 6
+
+
+class CondensedEmail(NamedTuple):
+    text: str
+    # trechos removidos por tipo (quoted, signature, disclaimer)
+    removed: Dict[str, str]
+
+
+class EmailCondenser:
+    """
+    Remove do email o que raramente muda a classificação e só custa
+    tokens: histórico citado de respostas, assinaturas e avisos legais.
+    Trabalha sobre o texto original, antes do pré-processamento, porque
+    depende das quebras de linha e da pontuação.
+    """
+
+    def __init__(self, min_length: int = 10):
+        self.min_length = min_length
+        self.reply_header_patterns = [
+            re.compile(pattern, re.I | re.M) for pattern in REPLY_HEADER_PATTERNS
+        ]
+        self.quoted_line_pattern = re.compile(QUOTED_LINE_PATTERN, re.M)
+        self.signature_delimiter_pattern = re.compile(SIGNATURE_DELIMITER_PATTERN, re.M)
+        self.mobile_signature_pattern = re.compile(
+            MOBILE_SIGNATURE_PATTERN, re.I | re.M
+        )
+        self.closing_pattern = re.compile(CLOSING_PATTERN, re.I)
+        self.contact_pattern = re.compile(CONTACT_PATTERN)
+        self.sentence_pattern = re.compile(SENTENCE_PATTERN)
+        self.word_pattern = re.compile(r"\w+")
+        self.disclaimer_patterns = [
+            re.compile(pattern, re.I | re.S) for pattern in DISCLAIMER_PATTERNS
+        ]
+
+    def condense(self, email_text: str) -> CondensedEmail:
+        removed: Dict[str, List[str]] = {}
+        text = email_text.replace("\r\n", "\n")
+
+        text = self._cut_reply_history(text, removed)
+        text = self._remove(self.quoted_line_pattern, text, "quoted", removed)
+        text = self._remove_disclaimers(text, removed)
+        text = self._cut_signature(text, removed)
+        text = re.sub(r"\n{3,}", "\n\n", text).strip()
+
+        # um email que é só histórico (ex.: encaminhamento sem comentário)
+        # é analisado inteiro
+        if len(text) < self.min_length:
+            return CondensedEmail(email_text, {})
+
+        return CondensedEmail(
+            text, {kind: "\n".join(parts) for kind, parts in removed.items()}
+        )
+
+    def _cut_reply_history(self, text: str, removed: Dict[str, List[str]]) -> str:
+        starts = [
+            match.start()
+            for pattern in self.reply_header_patterns
+            if (match := pattern.search(text))
+        ]
+        if not starts:
+            return text
+
+        start = min(starts)
+        removed.setdefault("quoted", []).append(text[start:])
+        return text[:start]
+
+    def _remove(
+        self,
+        pattern: re.Pattern,
+        text: str,
+        kind: str,
+        removed: Dict[str, List[str]],
+    ) -> str:
+        parts = pattern.findall(text)
+        if not parts:
+            return text
+        removed.setdefault(kind, []).extend(parts)
+        return pattern.sub("", text)
+
+    def _remove_disclaimers(self, text: str, removed: Dict[str, List[str]]) -> str:
+        paragraphs = text.split("\n\n")
+        kept = paragraphs[:1]
+        for paragraph in paragraphs[1:]:
+            if any(pattern.search(paragraph) for pattern in self.disclaimer_patterns):
+                removed.setdefault("disclaimer", []).append(paragraph)
+            else:
+                kept.append(paragraph)
+        return "\n\n".join(kept)
+
+    def _cut_signature(self, text: str, removed: Dict[str, List[str]]) -> str:
+        text = self._remove(self.mobile_signature_pattern, text, "signature", removed)
+
+        match = self.signature_delimiter_pattern.search(text)
+        if match:
+            removed.setdefault("signature", []).append(text[match.start() :])
+            text = text[: match.start()]
+
+        # nome, cargo e contatos depois de uma despedida isolada na linha
+        lines = text.rstrip().split("\n")
+        tail_start = max(1, len(lines) - SIGNATURE_MAX_LINES - 1)
+        for index in range(len(lines) - 2, tail_start - 1, -1):
+            if self.closing_pattern.match(lines[index]):
+                tail = lines[index + 1 :]
+                if not self._looks_like_signature(tail, text):
+                    return text
+                removed.setdefault("signature", []).append("\n".join(tail))
+                return "\n".join(lines[: index + 1])
+        return text
+
+    def _looks_like_signature(self, lines: List[str], text: str) -> bool:
+        """
+        Linhas curtas sem frases (nome, cargo, empresa) ou de contato, que
+        não somam a maior parte das palavras do email (contatos, que o
+        pré-processamento descarta, ficam fora da conta)
+        """
+        words = contact_words = 0
+        for line in lines:
+            line_words = len(self.word_pattern.findall(line))
+            if self.contact_pattern.search(line):
+                if "?" in line or "!" in line:
+                    return False
+                contact_words += line_words
+            elif line_words > SIGNATURE_LINE_MAX_WORDS or self.sentence_pattern.search(
+                line
+            ):
+                return False
+            else:
+                words += line_words
+        total = len(self.word_pattern.findall(text)) - contact_words
+        return words * 2 <= total and words + contact_words > 0
+
+
+def excerpt_tokens(
+    tokens: Sequence[str], max_tokens: int, head_ratio: float = 0.75
+) -> List[str]:
+    """
+    Limita a lista de tokens a ``max_tokens`` mantendo o começo (onde
+    costuma estar o pedido) e o fim (prazos, despedida) do email
+    """
+    if max_tokens <= 0 or len(tokens) <= max_tokens:
+        return list(tokens)
+
+    head = int(round(max_tokens * head_ratio))
+    tail = max_tokens - head
+    return list(tokens[:head]) + (list(tokens[-tail:]) if tail else [])
@@ -1,9 +1,22 @@
-import re
+import os
+import time
+import asyncio
+import threading
 import logging
-from typing import Dict, List, Any
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, List, Any, NamedTuple, Optional, Tuple
 from .openai_client import OpenAIClient
 from .huggingface_client import HuggingFaceClient
+from .linear_classifier import load_linear_classifier
+from .near_duplicate import NearDuplicateIndex
 from .nlp_utils import preprocess_text
+from .condenser import EmailCondenser, excerpt_tokens
+from .rule_matcher import KeywordMatcher
+from .async_runner import run_coroutine
+from .latency_budget import LatencyBudget
+from . import metrics
 from config import Config
 
 logger = logging.getLogger(__name__)
@@ -13,6 +26,140 @@ MIN_CONFIDENCE_RESPONSE = 0.8
 MIN_RESPONSE_LENGTH = 20
 PRODUTIVO_THRESHOLD = 10.0
 IMPRODUTIVO_THRESHOLD = 5.0
+HUGGINGFACE_WEIGHT = 0.7
+RULES_WEIGHT = 0.3
+REMOTE_TIERS = ("openai",)
+NEAR_DUPLICATE_FIELDS = (
+    "category",
+    "confidence",
+    "method",
+    "reasoning",
+    "response",
+    "suggested_actions",
+    "generated_by",
+)
+
+_tier_lock = threading.Lock()
+_tier_executor: Optional[ThreadPoolExecutor] = None
+_tier_executor_pid: Optional[int] = None
+
+
+def get_tier_executor() -> ThreadPoolExecutor:
+    """
+    Pool das chamadas remotas executadas em paralelo com as camadas locais,
+    recriado após um fork (ex.: workers do gunicorn)
+    """
+    global _tier_executor, _tier_executor_pid
+
+    pid = os.getpid()
+    with _tier_lock:
+        if _tier_executor is None or _tier_executor_pid != pid:
+            _tier_executor = ThreadPoolExecutor(
+                max_workers=config.TIER_WORKERS, thread_name_prefix="classifier-tier"
+            )
+            _tier_executor_pid = pid
+        return _tier_executor
+
+
+class PreparedEmail(NamedTuple):
+    # texto condensado, usado pelas regras
+    text: str
+    # texto pré-processado e limitado, usado pelos modelos
+    processed_text: str
+    # tokens do texto condensado antes do limite de CONDENSE_MAX_TOKENS
+    tokens: int
+    # trechos removidos pelo condensador; None com CONDENSE_ENABLED=False
+    removed: Optional[Dict[str, str]]
+
+
+def preprocess_email(email_text: str) -> str:
+    """Pré-processa o email; em caso de erro ou resultado vazio, o texto original"""
+    try:
+        processed_tokens = preprocess_text(email_text)
+        processed_text = " ".join(processed_tokens)
+        if not processed_text.strip():
+            logger.warning("Texto processado ficou vazio, usando texto original")
+            processed_text = email_text.lower().strip()
+    except Exception as e:
+        metrics.record_error("preprocess", e)
+        logger.error(f"Erro no pré-processamento: {e}")
+        processed_text = email_text.lower().strip()
+
+    return processed_text
+
+
+def prepare_email(
+    email_text: str,
+    condenser: EmailCondenser,
+    budget: Optional[LatencyBudget] = None,
+) -> PreparedEmail:
+    """
+    Prepara o email como os modelos o recebem, no serviço e no treino do
+    modelo linear: condensa (histórico citado, assinaturas e avisos
+    legais), pré-processa e limita a CONDENSE_MAX_TOKENS tokens (começo e
+    fim do email)
+    """
+
+    def measure(stage: str):
+        return budget.measure(stage) if budget is not None else nullcontext()
+
+    if not config.CONDENSE_ENABLED:
+        with measure("preprocess"):
+            processed_text = preprocess_email(email_text)
+        return PreparedEmail(
+            email_text, processed_text, len(processed_text.split()), None
+        )
+
+    with measure("condense"):
+        condensed = condenser.condense(email_text)
+    with measure("preprocess"):
+        tokens = preprocess_email(condensed.text).split()
+    kept = excerpt_tokens(
+        tokens, config.CONDENSE_MAX_TOKENS, config.CONDENSE_HEAD_RATIO
+    )
+    return PreparedEmail(condensed.text, " ".join(kept), len(tokens), condensed.removed)
+
+
+class _CascadeState:
+    """Resultados e escaladas de uma passagem pela cascata de camadas"""
+
+    def __init__(self):
+        self.tiers: List[str] = []
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.votes: Dict[str, str] = {}
+        self.escalations: List[Dict[str, str]] = []
+        self.rules_result: Optional[Dict[str, Any]] = None
+
+    def offer(
+        self,
+        tier: str,
+        result: Optional[Dict[str, Any]],
+        thresholds: Tuple[float, float],
+    ) -> Optional[str]:
+        """
+        Registra o resultado da camada e devolve None se ele encerra a
+        cascata, ou o motivo para escalar: "unavailable" (sem resultado),
+        "uncertain" (abaixo do limiar de aceitação) ou "disagreement"
+        (diverge de uma camada anterior com resultado utilizável)
+        """
+        self.tiers.append(tier)
+        if result is None:
+            return "unavailable"
+
+        min_confidence, accept_confidence = thresholds
+        confidence = result.get("confidence", 0)
+        disagrees = config.CASCADE_ESCALATE_ON_DISAGREEMENT and any(
+            category != result["category"] for category in self.votes.values()
+        )
+        if confidence >= min_confidence:
+            self.results[tier] = result
+            self.votes[tier] = result["category"]
+
+        if confidence < accept_confidence:
+            return "uncertain"
+        if disagrees:
+            return "disagreement"
+        return None
 
 
 class FinancialEmailClassifier:
@@ -23,6 +170,14 @@ class FinancialEmailClassifier:
     def __init__(self):
         self.openai_client = OpenAIClient()
         self.huggingface_client = HuggingFaceClient(config.HUGGINGFACE_MODEL)
+        self.linear_model = load_linear_classifier(config.LINEAR_MODEL_PATH)
+        self.near_duplicates = NearDuplicateIndex(
+            threshold=config.NEAR_DUPLICATE_THRESHOLD,
+            max_entries=config.NEAR_DUPLICATE_MAX_ENTRIES,
+            ttl_seconds=config.NEAR_DUPLICATE_TTL_SECONDS,
+            min_tokens=config.NEAR_DUPLICATE_MIN_TOKENS,
+            enabled=config.NEAR_DUPLICATE_ENABLED,
+        )
 
         self.produtivo_patterns = [
             r"\b(status|situação|andamento|progresso|atualização|atualizar)\b",
@@ -63,22 +218,34 @@ class FinancialEmailClassifier:
             r"\b(redes\s+sociais|facebook|instagram|whatsapp)\b",
         ]
 
+        self.rule_matcher = KeywordMatcher(
+            {
+                "produtivo": self.produtivo_patterns,
+                "improdutivo": self.improdutivo_patterns,
+            }
+        )
+
+        self.condenser = EmailCondenser(config.MIN_TEXT_LENGTH)
+
         self.response_templates = {
             "produtivo": "Obrigado pelo contato. Sua solicitação foi registrada e está sendo processada por nossa equipe. Retornaremos em até 24 horas úteis com as informações solicitadas.",
             "improdutivo": "Obrigado pela mensagem. Caso tenha alguma solicitação específica relacionada aos nossos serviços, estarei à disposição para ajudar.",
         }
 
+    def preload_models(self) -> None:
+        """
+        Carrega os modelos locais antecipadamente (ex.: no processo mestre
+        do gunicorn com preload_app, antes do fork dos workers)
+        """
+        if self.huggingface_client.is_available():
+            self.huggingface_client.load()
+
     def _classify_by_rules(self, email_text: str) -> Dict[str, Any]:
         """Classificação baseada em padrões melhorada"""
         email_lower = email_text.lower().strip()
-        produtivo_matches = sum(
-            len(re.findall(pattern, email_lower, re.IGNORECASE))
-            for pattern in self.produtivo_patterns
-        )
-        improdutivo_matches = sum(
-            len(re.findall(pattern, email_lower, re.IGNORECASE))
-            for pattern in self.improdutivo_patterns
-        )
+        matches = self.rule_matcher.count(email_lower)
+        produtivo_matches = matches["produtivo"]
+        improdutivo_matches = matches["improdutivo"]
 
         total_words = len(email_lower.split())
         produtivo_score = (produtivo_matches / max(total_words, 1)) * 100
@@ -106,76 +273,371 @@ class FinancialEmailClassifier:
         }
 
     def generate_response(
-        self, processed_text: str, classification: Dict[str, Any]
+        self,
+        processed_text: str,
+        classification: Dict[str, Any],
+        budget: Optional[LatencyBudget] = None,
     ) -> Dict[str, Any]:
         """
-        Gera uma resposta automática simplificada
+        Gera uma resposta automática simplificada, dentro do orçamento de
+        latência restante da requisição
         """
+        budget = budget or LatencyBudget(config.REQUEST_BUDGET_MS)
+
+        if self._should_generate_with_openai(classification):
+            if "response" in classification:
+                openai_response = classification["response"]
+            else:
+                started = time.monotonic()
+                timeout = budget.remaining()
+                future = self._submit_remote(
+                    self.openai_client.generate_response,
+                    timeout,
+                    processed_text,
+                    classification,
+                )
+                openai_response = self._await_remote(
+                    budget, "response", future, started, timeout
+                )
+            if self._is_valid_response(openai_response):
+                return self._build_response(
+                    classification["category"], openai_response, "openai"
+                )
+
+        return self._build_template_response(classification["category"])
+
+    async def generate_response_async(
+        self,
+        processed_text: str,
+        classification: Dict[str, Any],
+        speculative: Optional[Tuple[str, "asyncio.Task[Optional[str]]"]] = None,
+        budget: Optional[LatencyBudget] = None,
+    ) -> Dict[str, Any]:
+        """
+        Versão assíncrona de generate_response. Se houver uma geração
+        especulativa para a mesma categoria, reaproveita seu resultado;
+        caso contrário ela é cancelada e descartada.
+        """
+        budget = budget or LatencyBudget(config.REQUEST_BUDGET_MS)
         category = classification["category"]
+        speculative_task = None
+        if speculative:
+            speculative_category, speculative_task = speculative
+            if speculative_category != category or not (
+                self._should_generate_with_openai(classification)
+            ):
+                speculative_task.cancel()
+                speculative_task = None
 
-        if (
+        if self._should_generate_with_openai(classification):
+            if "response" in classification:
+                openai_response = classification["response"]
+            else:
+                timeout = budget.remaining()
+                if speculative_task is None:
+                    speculative_task = asyncio.create_task(
+                        self.openai_client.generate_response_async(
+                            processed_text, classification, timeout=timeout
+                        )
+                    )
+                openai_response = await self._await_remote_async(
+                    budget, "response", speculative_task, time.monotonic(), timeout
+                )
+            if self._is_valid_response(openai_response):
+                return self._build_response(category, openai_response, "openai")
+
+        return self._build_template_response(category)
+
+    def _should_generate_with_openai(self, classification: Dict[str, Any]) -> bool:
+        return (
             self.openai_client.is_available()
             and classification.get("method") == "openai"
             and classification.get("confidence", 0) > MIN_CONFIDENCE_RESPONSE
-        ):
-            try:
-                openai_response = self.openai_client.generate_response(
-                    processed_text, classification
-                )
-                if (
-                    openai_response
-                    and len(openai_response.strip()) > MIN_RESPONSE_LENGTH
-                ):
-                    return {
-                        "response": openai_response,
-                        "suggested_actions": self._suggest_actions(category),
-                        "generated_by": "openai",
-                    }
-            except Exception as e:
-                logger.error(f"Erro na geração de resposta OpenAI: {e}")
+        )
+
+    def _is_valid_response(self, response: Optional[str]) -> bool:
+        return bool(response and len(response.strip()) > MIN_RESPONSE_LENGTH)
+
+    def _build_response(
+        self, category: str, response_text: str, generated_by: str
+    ) -> Dict[str, Any]:
+        return {
+            "response": response_text,
+            "suggested_actions": self._suggest_actions(category),
+            "generated_by": generated_by,
+        }
 
+    def _build_template_response(self, category: str) -> Dict[str, Any]:
         response_text = self.response_templates.get(
             category, self.response_templates["improdutivo"]
         )
+        return self._build_response(category, response_text, "template")
+
+    def analyze_email(
+        self, email_text: str, budget_ms: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Análise completa do email: classificação + resposta (processa uma única vez).
+        ``budget_ms`` substitui o orçamento de latência padrão (REQUEST_BUDGET_MS).
+        """
+        if config.OPENAI_ASYNC_ENABLED and self.openai_client.is_async_available():
+            return run_coroutine(self.analyze_email_async(email_text, budget_ms))
+
+        short_result = self._validate_length(email_text)
+        if short_result:
+            return short_result
+
+        budget = LatencyBudget(budget_ms or config.REQUEST_BUDGET_MS)
+        email_text, processed_text, condensation = self._prepare_text(
+            email_text, budget
+        )
+
+        fingerprint, duplicate = self._find_near_duplicate(
+            processed_text, budget, condensation
+        )
+        if duplicate:
+            return duplicate
+
+        classification = self._classify_with_processed_text(
+            email_text, processed_text, budget
+        )
+        response = self.generate_response(processed_text, classification, budget)
+
+        result = self._build_result(classification, response, budget, condensation)
+        self._remember_near_duplicate(fingerprint, result)
+        return result
+
+    async def analyze_email_async(
+        self, email_text: str, budget_ms: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Análise completa usando o cliente assíncrono da OpenAI. No modo
+        especulativo, a geração da resposta começa junto com a classificação,
+        usando a categoria prevista pelas regras.
+        """
+        short_result = self._validate_length(email_text)
+        if short_result:
+            return short_result
+
+        budget = LatencyBudget(budget_ms or config.REQUEST_BUDGET_MS)
+        email_text, processed_text, condensation = await asyncio.to_thread(
+            self._prepare_text, email_text, budget
+        )
+
+        fingerprint, duplicate = await asyncio.to_thread(
+            self._find_near_duplicate, processed_text, budget, condensation
+        )
+        if duplicate:
+            return duplicate
+
+        speculative = None
+        if (
+            config.OPENAI_SPECULATIVE_RESPONSE
+            and not config.OPENAI_STRUCTURED_MODE
+            and self.openai_client.is_async_available()
+        ):
+            rules_result = await asyncio.to_thread(self._classify_by_rules, email_text)
+            # só especula quando as regras sozinhas não encerram a cascata
+            if rules_result["confidence"] < config.RULES_CONFIDENCE_THRESHOLD:
+                speculative_category = rules_result["category"]
+                speculative = (
+                    speculative_category,
+                    asyncio.create_task(
+                        self.openai_client.generate_response_async(
+                            processed_text,
+                            {"category": speculative_category},
+                            timeout=budget.remaining(),
+                        )
+                    ),
+                )
+
+        try:
+            classification = await self._classify_with_processed_text_async(
+                email_text, processed_text, budget
+            )
+        except BaseException:
+            if speculative:
+                speculative[1].cancel()
+            raise
+
+        response = await self.generate_response_async(
+            processed_text, classification, speculative, budget
+        )
+
+        result = self._build_result(classification, response, budget, condensation)
+        self._remember_near_duplicate(fingerprint, result)
+        return result
+
+    def analyze_email_stream(
+        self, email_text: str, budget_ms: Optional[float] = None
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Análise em etapas, para streaming: produz ("classification", dict)
+        assim que a cascata termina, ("token", trecho) para cada trecho da
+        resposta da OpenAI e, por fim, ("result", dict) no mesmo formato de
+        analyze_email. Se a geração falhar no meio, o resultado final traz o
+        template e o texto parcial deve ser descartado.
+        """
+        short_result = self._validate_length(email_text)
+        if short_result:
+            yield "classification", short_result
+            yield "result", short_result
+            return
+
+        budget = LatencyBudget(budget_ms or config.REQUEST_BUDGET_MS)
+        email_text, processed_text, condensation = self._prepare_text(
+            email_text, budget
+        )
+
+        fingerprint, duplicate = self._find_near_duplicate(
+            processed_text, budget, condensation
+        )
+        if duplicate:
+            yield "classification", duplicate
+            yield "result", duplicate
+            return
+
+        classification = self._classify_with_processed_text(
+            email_text, processed_text, budget
+        )
+        yield "classification", classification
+
+        category = classification["category"]
+        response = None
+        if self._should_generate_with_openai(classification):
+            if "response" in classification:
+                openai_response = classification["response"]
+                yield "token", openai_response
+            else:
+                chunks = []
+                started = time.monotonic()
+                try:
+                    for delta in self.openai_client.stream_response(
+                        processed_text, classification, timeout=budget.remaining()
+                    ):
+                        chunks.append(delta)
+                        yield "token", delta
+                except Exception:
+                    # já registrado pelo cliente; o template substitui o parcial
+                    chunks = []
+                finally:
+                    budget.record("response", time.monotonic() - started)
+                openai_response = "".join(chunks).strip()
+
+            if self._is_valid_response(openai_response):
+                response = self._build_response(category, openai_response, "openai")
+
+        result = self._build_result(
+            classification,
+            response or self._build_template_response(category),
+            budget,
+            condensation,
+        )
+        self._remember_near_duplicate(fingerprint, result)
+        yield "result", result
 
+    def _validate_length(self, email_text: str) -> Optional[Dict[str, Any]]:
+        if len(email_text.strip()) >= config.MIN_TEXT_LENGTH:
+            return None
+
+        logger.warning(f"Email muito curto para análise: {len(email_text)} caracteres")
         return {
-            "response": response_text,
-            "suggested_actions": self._suggest_actions(category),
+            "category": "improdutivo",
+            "confidence": 0.5,
+            "method": "validation",
+            "reasoning": f"Email muito curto (mínimo {config.MIN_TEXT_LENGTH} caracteres)",
+            "response": self.response_templates["improdutivo"],
+            "suggested_actions": self._suggest_actions("improdutivo"),
             "generated_by": "template",
         }
 
-    def analyze_email(self, email_text: str) -> Dict[str, Any]:
+    def _prepare_text(
+        self, email_text: str, budget: LatencyBudget
+    ) -> Tuple[str, str, Optional[Dict[str, Any]]]:
         """
-        Análise completa do email: classificação + resposta (processa uma única vez)
+        Condensa o email (histórico citado, assinaturas e avisos legais),
+        pré-processa e limita o resultado a CONDENSE_MAX_TOKENS tokens
+        (começo e fim do email). Devolve o texto condensado, usado pelas
+        regras, o texto pré-processado, usado pelos modelos, e a economia
+        de tokens.
         """
-        if len(email_text.strip()) < config.MIN_TEXT_LENGTH:
-            logger.warning(
-                f"Email muito curto para análise: {len(email_text)} caracteres"
-            )
-            return {
-                "category": "improdutivo",
-                "confidence": 0.5,
-                "method": "validation",
-                "reasoning": f"Email muito curto (mínimo {config.MIN_TEXT_LENGTH} caracteres)",
-                "response": self.response_templates["improdutivo"],
-                "suggested_actions": self._suggest_actions("improdutivo"),
-                "generated_by": "template",
-            }
+        prepared = prepare_email(email_text, self.condenser, budget)
+        if prepared.removed is None:
+            return prepared.text, prepared.processed_text, None
 
-        try:
-            processed_tokens = preprocess_text(email_text)
-            processed_text = " ".join(processed_tokens)
-            if not processed_text.strip():
-                logger.warning("Texto processado ficou vazio, usando texto original")
-                processed_text = email_text.lower().strip()
-        except Exception as e:
-            logger.error(f"Erro no pré-processamento: {e}")
-            processed_text = email_text.lower().strip()
+        # só para o relatório: quanto o texto removido custaria em tokens
+        removed_tokens = sum(
+            len(preprocess_text(part)) for part in prepared.removed.values()
+        )
+        tokens_before = prepared.tokens + removed_tokens
+        tokens_after = len(prepared.processed_text.split())
+        metrics.record_condensation(tokens_before, tokens_after)
 
-        classification = self._classify_with_processed_text(email_text, processed_text)
+        condensation = {
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_saved": tokens_before - tokens_after,
+            "removed": sorted(prepared.removed),
+            "excerpted": tokens_after < prepared.tokens,
+        }
+        return prepared.text, prepared.processed_text, condensation
 
-        response = self.generate_response(processed_text, classification)
+    def _find_near_duplicate(
+        self,
+        processed_text: str,
+        budget: LatencyBudget,
+        condensation: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """
+        Procura um email já analisado quase igual a este. Em caso de acerto,
+        devolve o resultado dele (categoria e resposta) sem consultar nenhum
+        modelo; a impressão digital é devolvida para registrar o novo
+        resultado em caso de falha.
+        """
+        with budget.measure("near_duplicate"):
+            fingerprint = self.near_duplicates.fingerprint(processed_text.split())
+            match = self.near_duplicates.lookup(fingerprint)
+
+        if fingerprint is None:
+            return None, None
+        metrics.record_near_duplicate(match is not None)
+        if match is None:
+            return fingerprint, None
+
+        similarity, stored = match
+        budget.winner = "near_duplicate"
+        logger.info(
+            f"Quase duplicata ({similarity:.0%}) reutilizada: {stored['category']}"
+        )
+        return fingerprint, {
+            **stored,
+            "method": "near_duplicate",
+            "near_duplicate": {
+                "similarity": round(similarity, 3),
+                "method": stored["method"],
+            },
+            "budget": budget.report(),
+            "cascade": None,
+            "condensation": condensation,
+        }
+
+    def _remember_near_duplicate(
+        self, fingerprint: Optional[int], result: Dict[str, Any]
+    ) -> None:
+        """Guarda no índice só resultados confiáveis, sem dados da requisição"""
+        if result["confidence"] < config.NEAR_DUPLICATE_MIN_CONFIDENCE:
+            return
+        self.near_duplicates.add(
+            fingerprint, {field: result[field] for field in NEAR_DUPLICATE_FIELDS}
+        )
 
+    def _build_result(
+        self,
+        classification: Dict[str, Any],
+        response: Dict[str, Any],
+        budget: LatencyBudget,
+        condensation: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
         return {
             "category": classification["category"],
             "confidence": classification["confidence"],
@@ -184,69 +646,377 @@ class FinancialEmailClassifier:
             "response": response["response"],
             "suggested_actions": response["suggested_actions"],
             "generated_by": response["generated_by"],
+            "budget": budget.report(),
+            "cascade": classification.get("cascade"),
+            "condensation": condensation,
         }
 
     def _classify_with_processed_text(
-        self, email_text: str, processed_text: str
+        self,
+        email_text: str,
+        processed_text: str,
+        budget: Optional[LatencyBudget] = None,
+    ) -> Dict[str, Any]:
+        """
+        Cascata de camadas em ordem de custo (config.CASCADE_ORDER, por padrão
+        regras → modelo linear → HuggingFace → OpenAI). Cada camada só é
+        consultada se as anteriores ficaram na faixa de incerteza ou
+        discordaram entre si; a OpenAI só é chamada quando as camadas locais
+        não decidem e ainda há orçamento de latência.
+
+        Se nenhuma camada decidir, vale o último resultado utilizável
+        (acima da confiança mínima da camada) e, em último caso, as regras.
+        """
+        budget = budget or LatencyBudget(config.REQUEST_BUDGET_MS)
+        state = _CascadeState()
+        reason = None
+
+        for tier in self._cascade_tiers(self.openai_client.is_available()):
+            if reason is not None and not self._escalate(state, tier, reason, budget):
+                break
+            result = self._run_tier(tier, email_text, processed_text, state, budget)
+            reason = state.offer(tier, result, self._tier_thresholds(tier))
+            if reason is None:
+                return self._finish_cascade(state, tier, result, budget)
+
+        return self._finish_cascade(
+            state, *self._cascade_fallback(state, email_text, budget), budget
+        )
+
+    async def _classify_with_processed_text_async(
+        self,
+        email_text: str,
+        processed_text: str,
+        budget: Optional[LatencyBudget] = None,
+    ) -> Dict[str, Any]:
+        """
+        Mesma cascata de _classify_with_processed_text, com a chamada à
+        OpenAI assíncrona e as camadas locais (regras, linear e
+        HuggingFace) executadas fora do event loop
+        """
+        budget = budget or LatencyBudget(config.REQUEST_BUDGET_MS)
+        state = _CascadeState()
+        reason = None
+
+        for tier in self._cascade_tiers(self.openai_client.is_async_available()):
+            if reason is not None and not self._escalate(state, tier, reason, budget):
+                break
+            if tier == "openai":
+                result = await self._run_openai_tier_async(processed_text, budget)
+            else:
+                result = await asyncio.to_thread(
+                    self._run_tier, tier, email_text, processed_text, state, budget
+                )
+            reason = state.offer(tier, result, self._tier_thresholds(tier))
+            if reason is None:
+                return self._finish_cascade(state, tier, result, budget)
+
+        return self._finish_cascade(
+            state, *self._cascade_fallback(state, email_text, budget), budget
+        )
+
+    def _cascade_tiers(self, remote_available: bool) -> List[str]:
+        """Camadas de config.CASCADE_ORDER disponíveis neste processo, em ordem"""
+        available = {
+            "rules": True,
+            "linear": self.linear_model is not None,
+            "huggingface": bool(
+                self.huggingface_client and self.huggingface_client.is_available()
+            ),
+            "openai": remote_available,
+        }
+        tiers: List[str] = []
+        for tier in config.CASCADE_ORDER:
+            if available.get(tier) and tier not in tiers:
+                tiers.append(tier)
+        return tiers
+
+    def _tier_thresholds(self, tier: str) -> Tuple[float, float]:
+        """(confiança mínima para o resultado valer, confiança para encerrar)"""
+        return {
+            "rules": (config.RULES_MIN_CONFIDENCE, config.RULES_CONFIDENCE_THRESHOLD),
+            "linear": (
+                config.LINEAR_MIN_CONFIDENCE,
+                config.LINEAR_CONFIDENCE_THRESHOLD,
+            ),
+            "huggingface": (
+                config.HUGGINGFACE_MIN_CONFIDENCE,
+                config.HUGGINGFACE_ACCEPT_THRESHOLD,
+            ),
+            "openai": (config.OPENAI_MIN_CONFIDENCE, config.OPENAI_MIN_CONFIDENCE),
+        }[tier]
+
+    def _escalate(
+        self, state: "_CascadeState", tier: str, reason: str, budget: LatencyBudget
+    ) -> bool:
+        """Registra a escalada para ``tier``; False se o orçamento já acabou"""
+        if tier in REMOTE_TIERS and budget.is_exhausted():
+            logger.info(f"Orçamento esgotado; camada {tier} não consultada")
+            return False
+        state.escalations.append({"to": tier, "reason": reason})
+        return True
+
+    def _run_tier(
+        self,
+        tier: str,
+        email_text: str,
+        processed_text: str,
+        state: "_CascadeState",
+        budget: LatencyBudget,
+    ) -> Optional[Dict[str, Any]]:
+        if tier == "rules":
+            return self._rules_result(state, email_text, budget)
+        if tier == "linear":
+            return self._classify_linear(processed_text, budget)
+        if tier == "huggingface":
+            return self._classify_huggingface(email_text, processed_text, state, budget)
+        return self._run_openai_tier(processed_text, budget)
+
+    def _run_openai_tier(
+        self, processed_text: str, budget: LatencyBudget
+    ) -> Optional[Dict[str, Any]]:
+        started = time.monotonic()
+        timeout = budget.slice(config.REMOTE_BUDGET_SHARE)
+        future = self._submit_remote(self._classify_remote, timeout, processed_text)
+        openai_result = self._await_remote(budget, "openai", future, started, timeout)
+        if not openai_result:
+            return None
+        return self._build_openai_classification(openai_result)
+
+    async def _run_openai_tier_async(
+        self, processed_text: str, budget: LatencyBudget
+    ) -> Optional[Dict[str, Any]]:
+        started = time.monotonic()
+        timeout = budget.slice(config.REMOTE_BUDGET_SHARE)
+        if timeout <= 0:
+            return None
+        remote_task = asyncio.create_task(
+            self._classify_remote_async(processed_text, timeout)
+        )
+        openai_result = await self._await_remote_async(
+            budget, "openai", remote_task, started, timeout
+        )
+        if not openai_result:
+            return None
+        return self._build_openai_classification(openai_result)
+
+    def _cascade_fallback(
+        self, state: "_CascadeState", email_text: str, budget: LatencyBudget
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Último resultado utilizável da cascata, ou as regras"""
+        for tier in reversed(state.tiers):
+            if tier in state.results:
+                return tier, state.results[tier]
+        return "rules", self._rules_result(state, email_text, budget)
+
+    def _finish_cascade(
+        self,
+        state: "_CascadeState",
+        tier: str,
+        result: Dict[str, Any],
+        budget: LatencyBudget,
     ) -> Dict[str, Any]:
+        budget.winner = tier
+        metrics.record_cascade(tier, state.escalations)
+        return {
+            **result,
+            "cascade": {"tiers": state.tiers, "escalations": state.escalations},
+        }
+
+    def _classify_remote(
+        self, processed_text: str, timeout: float
+    ) -> Optional[Dict[str, Any]]:
         """
-        Classificação com hierarquia de prioridades:
-        1. OpenAI sozinha (se disponível)
-        2. HuggingFace + Regras (se OpenAI não disponível)
-        3. Só Regras (se nenhum disponível)
+        Classificação remota: chamada única estruturada (se ativa), com o
+        fluxo de duas chamadas como fallback dentro do mesmo prazo
         """
-        if self.openai_client.is_available():
-            try:
-                openai_result = self.openai_client.classify_email(processed_text)
-                if openai_result and openai_result.get("confidence", 0) > 0.3:
-                    return {
-                        "category": openai_result["category"],
-                        "confidence": openai_result["confidence"],
-                        "method": "openai",
-                        "reasoning": openai_result.get("reasoning", ""),
-                    }
-            except Exception as e:
-                logger.error(f"Erro na classificação OpenAI: {e}")
-
-        if self.huggingface_client and self.huggingface_client.is_available():
-            try:
+        deadline = time.monotonic() + timeout
+        if config.OPENAI_STRUCTURED_MODE:
+            structured_result = self.openai_client.analyze_structured(
+                processed_text, timeout=timeout
+            )
+            if structured_result:
+                return structured_result
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return None
+
+        return self.openai_client.classify_email(processed_text, timeout=timeout)
+
+    async def _classify_remote_async(
+        self, processed_text: str, timeout: float
+    ) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + timeout
+        if config.OPENAI_STRUCTURED_MODE:
+            structured_result = await self.openai_client.analyze_structured_async(
+                processed_text, timeout=timeout
+            )
+            if structured_result:
+                return structured_result
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return None
+
+        return await self.openai_client.classify_email_async(
+            processed_text, timeout=timeout
+        )
+
+    def _submit_remote(
+        self, call: Callable[..., Any], timeout: float, *args: Any
+    ) -> Optional[Future]:
+        if timeout <= 0:
+            return None
+        return get_tier_executor().submit(call, *args, timeout=timeout)
+
+    def _await_remote(
+        self,
+        budget: LatencyBudget,
+        tier: str,
+        future: Optional[Future],
+        started: float,
+        timeout: float,
+    ) -> Any:
+        """
+        Aguarda a camada remota até o fim da sua fatia do orçamento; um
+        resultado tardio é descartado (a chamada continua em segundo plano
+        e ainda alimenta o cache)
+        """
+        if future is None:
+            return None
+
+        try:
+            return future.result(
+                timeout=max(0.0, timeout - (time.monotonic() - started))
+            )
+        except FutureTimeoutError:
+            logger.warning(
+                f"Camada {tier} excedeu o orçamento de {timeout * 1000:.0f} ms; resultado descartado"
+            )
+            return None
+        except Exception as e:
+            metrics.record_error(tier, e)
+            logger.error(f"Erro na camada {tier}: {e}")
+            return None
+        finally:
+            budget.record(tier, time.monotonic() - started)
+
+    async def _await_remote_async(
+        self,
+        budget: LatencyBudget,
+        tier: str,
+        task: "asyncio.Task[Any]",
+        started: float,
+        timeout: float,
+    ) -> Any:
+        """
+        Versão assíncrona de _await_remote para as chamadas à OpenAI: aqui a
+        chamada é cancelada no fim da fatia, então o estouro é registrado
+        como falha no disjuntor. Um cancelamento vindo de fora (cliente
+        desconectou) só libera a reserva.
+        """
+        try:
+            return await asyncio.wait_for(
+                task, max(0.0, timeout - (time.monotonic() - started))
+            )
+        except asyncio.TimeoutError:
+            self.openai_client.record_timeout()
+            logger.warning(
+                f"Camada {tier} excedeu o orçamento de {timeout * 1000:.0f} ms; resultado descartado"
+            )
+            return None
+        except Exception as e:
+            metrics.record_error(tier, e)
+            logger.error(f"Erro na camada {tier}: {e}")
+            return None
+        finally:
+            budget.record(tier, time.monotonic() - started)
+
+    def _build_openai_classification(
+        self, openai_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        classification = {
+            "category": openai_result["category"],
+            "confidence": openai_result["confidence"],
+            "method": "openai",
+            "reasoning": openai_result.get("reasoning", ""),
+        }
+        if openai_result.get("response"):
+            classification["response"] = openai_result["response"]
+        return classification
+
+    def _rules_result(
+        self, state: "_CascadeState", email_text: str, budget: LatencyBudget
+    ) -> Dict[str, Any]:
+        """Regras calculadas uma vez por cascata (o HuggingFace as reutiliza)"""
+        if state.rules_result is None:
+            with budget.measure("rules"):
+                state.rules_result = self._classify_by_rules(email_text)
+        return state.rules_result
+
+    def _classify_linear(
+        self, processed_text: str, budget: LatencyBudget
+    ) -> Optional[Dict[str, Any]]:
+        """Modelo linear local, em microssegundos; None se não houver modelo"""
+        if self.linear_model is None:
+            return None
+        try:
+            with budget.measure("linear"):
+                return self.linear_model.classify(processed_text.split())
+        except Exception as e:
+            metrics.record_error("linear", e)
+            logger.error(f"Erro na classificação linear: {e}")
+            return None
+
+    def _classify_huggingface(
+        self,
+        email_text: str,
+        processed_text: str,
+        state: "_CascadeState",
+        budget: LatencyBudget,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        HuggingFace combinado com as regras; None se o modelo falhar ou
+        ficar abaixo de HUGGINGFACE_MIN_CONFIDENCE
+        """
+        try:
+            with budget.measure("huggingface"):
                 hf_result = self.huggingface_client.classify_email(processed_text)
-                if hf_result and hf_result.get("confidence", 0) > 0.2:
-                    rules_result = self._classify_by_rules(email_text)
+        except Exception as e:
+            metrics.record_error("huggingface", e)
+            logger.error(f"Erro na classificação HuggingFace: {e}")
+            return None
 
-                    hf_weight = 0.7
-                    rules_weight = 0.3
+        if not hf_result or hf_result.get("confidence", 0) <= (
+            config.HUGGINGFACE_MIN_CONFIDENCE
+        ):
+            return None
 
-                    if hf_result["category"] == rules_result["category"]:
-                        final_confidence = (
-                            hf_result["confidence"] * hf_weight
-                            + rules_result["confidence"] * rules_weight
-                        )
-                        return {
-                            "category": hf_result["category"],
-                            "confidence": final_confidence,
-                            "method": "huggingface+rules",
-                            "reasoning": f"HuggingFace: {hf_result['reasoning']}; Regras: {rules_result['reasoning']}",
-                        }
-                    else:
-                        if hf_result["confidence"] > rules_result["confidence"]:
-                            return {
-                                "category": hf_result["category"],
-                                "confidence": hf_result["confidence"],
-                                "method": "huggingface+rules",
-                                "reasoning": f"Conflito resolvido: HuggingFace ({hf_result['confidence']:.2f}) > Regras ({rules_result['confidence']:.2f})",
-                            }
-                        else:
-                            return {
-                                "category": rules_result["category"],
-                                "confidence": rules_result["confidence"],
-                                "method": "huggingface+rules",
-                                "reasoning": f"Conflito resolvido: Regras ({rules_result['confidence']:.2f}) > HuggingFace ({hf_result['confidence']:.2f})",
-                            }
-            except Exception as e:
-                logger.error(f"Erro na classificação HuggingFace: {e}")
-
-        return self._classify_by_rules(email_text)
+        rules_result = self._rules_result(state, email_text, budget)
+        if hf_result["category"] == rules_result["category"]:
+            final_confidence = (
+                hf_result["confidence"] * HUGGINGFACE_WEIGHT
+                + rules_result["confidence"] * RULES_WEIGHT
+            )
+            return {
+                "category": hf_result["category"],
+                "confidence": final_confidence,
+                "method": "huggingface+rules",
+                "reasoning": f"HuggingFace: {hf_result['reasoning']}; Regras: {rules_result['reasoning']}",
+            }
+        elif hf_result["confidence"] > rules_result["confidence"]:
+            return {
+                "category": hf_result["category"],
+                "confidence": hf_result["confidence"],
+                "method": "huggingface+rules",
+                "reasoning": f"Conflito resolvido: HuggingFace ({hf_result['confidence']:.2f}) > Regras ({rules_result['confidence']:.2f})",
+            }
+        else:
+            return {
+                "category": rules_result["category"],
+                "confidence": rules_result["confidence"],
+                "method": "huggingface+rules",
+                "reasoning": f"Conflito resolvido: Regras ({rules_result['confidence']:.2f}) > HuggingFace ({hf_result['confidence']:.2f})",
+            }
 
     def _suggest_actions(self, category: str) -> List[str]:
         """Sugere ações baseadas na categoria"""
@@ -1,59 +1,196 @@
 import logging
+import threading
+import importlib.util
 from typing import Dict, Optional, Any, List
-
-try:
-    from transformers import pipeline
-    import torch
-
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
-    pipeline = None
-    torch = None
+from config import Config
+from .micro_batcher import MicroBatcher
+from .circuit_breaker import CircuitBreaker
+from .inference_sidecar import SidecarClient, SidecarUnavailableError
+from .result_cache import result_cache
+from .onnx_backend import ONNX_AVAILABLE, load_onnx_classifier
+
+TRANSFORMERS_AVAILABLE = (
+    importlib.util.find_spec("transformers") is not None
+    and importlib.util.find_spec("torch") is not None
+)
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
 
 logger = logging.getLogger(__name__)
 
 
 class HuggingFaceClient:
     def __init__(
-        self, model_name: str = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+        self,
+        model_name: str = "cardiffnlp/twitter-roberta-base-sentiment-latest",
+        sidecar_socket: Optional[str] = None,
     ):
         self.model_name = model_name
         self.classifier = None
+        self.batcher = None
+        self.config = Config()
+        self.backend = self.config.HUGGINGFACE_BACKEND
+        if self.backend == BACKEND_ONNX:
+            self.backend_available = ONNX_AVAILABLE
+        else:
+            self.backend = BACKEND_TORCH
+            self.backend_available = TRANSFORMERS_AVAILABLE
+
+        if sidecar_socket is None:
+            sidecar_socket = self.config.HUGGINGFACE_SIDECAR_SOCKET
+        self.sidecar = (
+            SidecarClient(
+                sidecar_socket, self.config.HUGGINGFACE_SIDECAR_TIMEOUT_SECONDS
+            )
+            if sidecar_socket
+            else None
+        )
+        # sidecar fora do ar: usa o modelo local e tenta de novo após a espera
+        self.sidecar_breaker = CircuitBreaker(
+            "huggingface-sidecar",
+            failure_threshold=1,
+            open_seconds=self.config.HUGGINGFACE_SIDECAR_RETRY_SECONDS,
+            max_open_seconds=self.config.HUGGINGFACE_SIDECAR_RETRY_SECONDS * 8,
+        )
+
+        self.enabled = self.config.HUGGINGFACE_ENABLED and (
+            self.backend_available or self.sidecar is not None
+        )
+        self._load_lock = threading.Lock()
+        self._load_failed = False
+
+    def load(self) -> bool:
+        """
+        Com HUGGINGFACE_SIDECAR_SOCKET, a inferência é feita pelo sidecar e
+        nada é carregado no processo enquanto ele responder. Caso contrário,
+        constrói o classificador local (ver _load_local).
+        """
+        if self.classifier is not None:
+            return True
+        if not self.enabled:
+            return False
+        if self.sidecar is not None and self.sidecar_breaker.is_call_permitted():
+            return True
+        return self._load_local()
+
+    def _load_local(self) -> bool:
+        """
+        Constrói o classificador na primeira chamada: o pipeline torch ou,
+        com HUGGINGFACE_BACKEND=onnx, o modelo int8 no ONNX Runtime.
+        Chamado no import do app quando PRELOAD_MODELS está ativo, para que o
+        gunicorn (preload_app) faça o fork dos workers após o carregamento e
+        compartilhe a memória do modelo por copy-on-write.
+        """
+        if self.classifier is not None:
+            return True
+        if not self.backend_available or self._load_failed:
+            return False
+
+        with self._load_lock:
+            if self.classifier is not None or self._load_failed:
+                return self.classifier is not None
+
+            try:
+                if self.backend == BACKEND_ONNX:
+                    classifier = self._build_onnx_classifier()
+                else:
+                    classifier = self._build_torch_pipeline()
+                if self.config.HUGGINGFACE_BATCH_MAX_SIZE > 1:
+                    self.batcher = MicroBatcher(
+                        self._classify_batch,
+                        max_batch_size=self.config.HUGGINGFACE_BATCH_MAX_SIZE,
+                        max_wait_ms=self.config.HUGGINGFACE_BATCH_MAX_WAIT_MS,
+                    )
+                self.classifier = classifier
+            except Exception as e:
+                logger.warning(f"HuggingFace não disponível: {e}")
+                self._load_failed = True
 
-        if not TRANSFORMERS_AVAILABLE:
-            return
+        return self.classifier is not None
 
-        try:
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
-            self.classifier = pipeline(
-                "sentiment-analysis",
-                model=self.model_name,
-                device=0 if self.device == "cuda" else -1,
-            )
-        except Exception as e:
-            logger.warning(f"HuggingFace não disponível: {e}")
-            self.classifier = None
+    def _build_torch_pipeline(self) -> Any:
+        from transformers import pipeline
+        import torch
+
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        return pipeline(
+            "sentiment-analysis",
+            model=self.model_name,
+            device=0 if self.device == "cuda" else -1,
+        )
+
+    def _build_onnx_classifier(self) -> Any:
+        self.device = "cpu"
+        return load_onnx_classifier(
+            self.model_name,
+            self.config.ONNX_MODEL_DIR,
+            self.config.ONNX_INTRA_OP_THREADS,
+        )
 
     def classify_email(self, email_text: str) -> Optional[Dict[str, Any]]:
-        if not self.classifier:
+        if not self.load():
             return None
 
         if not email_text or not email_text.strip():
             return None
 
+        namespace = (
+            "huggingface" if self.backend == BACKEND_TORCH else "huggingface-onnx"
+        )
+        cache_key = result_cache.make_key(namespace, self.model_name, email_text)
+        return result_cache.get_or_compute(
+            cache_key, lambda: self._run_classification(email_text)
+        )
+
+    def _run_classification(self, email_text: str) -> Optional[Dict[str, Any]]:
         try:
-            results = self.classifier(email_text)
-            return self._parse_pipeline_results(results)
+            return self._parse_pipeline_results(self.predict(email_text))
         except Exception as e:
             logger.error(f"Erro na classificação HuggingFace: {e}")
             return None
 
-    def _parse_pipeline_results(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def predict(self, email_text: str) -> List[Any]:
+        """
+        Saída bruta do pipeline para um texto, pelo sidecar quando
+        configurado e disponível, ou pelo modelo local (em lote, se ativo)
+        """
+        if self.sidecar is not None and self.sidecar_breaker.allow_request():
+            try:
+                results = self.sidecar.classify(email_text)
+            except SidecarUnavailableError as e:
+                self.sidecar_breaker.record_failure(str(e))
+                logger.warning(
+                    f"Sidecar de inferência indisponível, usando o modelo local: {e}"
+                )
+            except BaseException:
+                self.sidecar_breaker.release()
+                raise
+            else:
+                self.sidecar_breaker.record_success()
+                return results
+
+        if not self._load_local():
+            raise RuntimeError("Sidecar de inferência e modelo local indisponíveis")
+        if self.batcher:
+            return self.batcher.submit(email_text)
+        return self.classifier(email_text, truncation=True)
+
+    def _classify_batch(self, email_texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """
+        Executa uma única passada do pipeline para um lote de textos,
+        devolvendo para cada texto o mesmo formato de uma chamada individual
+        """
+        outputs = self.classifier(
+            email_texts, batch_size=len(email_texts), truncation=True
+        )
+        return [[output] for output in outputs]
+
+    def _parse_pipeline_results(self, results: List[Any]) -> Dict[str, Any]:
         if not results or not results[0]:
             return self._get_default_result()
 
-        best_result = max(results[0], key=lambda x: x["score"])
+        candidates = results[0] if isinstance(results[0], list) else results
+        best_result = max(candidates, key=lambda x: x["score"])
 
         label = best_result["label"].lower()
         confidence = best_result["score"]
@@ -87,4 +224,8 @@ class HuggingFaceClient:
         }
 
     def is_available(self) -> bool:
-        return self.classifier is not None
+        if not self.enabled:
+            return False
+        if self.sidecar is not None and self.sidecar_breaker.is_call_permitted():
+            return True
+        return self.backend_available and not self._load_failed
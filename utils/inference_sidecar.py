@@ -0,0 +1,241 @@
+"""
+Processo único de inferência do HuggingFace, compartilhado pelos workers.
+
+    HUGGINGFACE_ENABLED=True python -m utils.inference_sidecar --socket /tmp/emailflow-inference.sock
+    HUGGINGFACE_ENABLED=True HUGGINGFACE_SIDECAR_SOCKET=/tmp/emailflow-inference.sock gunicorn app:app
+
+O sidecar carrega o modelo (torch ou ONNX, conforme HUGGINGFACE_BACKEND)
+uma única vez e atende os workers por um socket Unix. Cada conexão é
+atendida por uma thread, e as requisições concorrentes de todos os
+workers são agrupadas pelo MicroBatcher em uma só passada do modelo.
+
+Protocolo: cada mensagem é um JSON precedido pelo tamanho em 4 bytes
+(big-endian). Requisições ``{"op": "classify", "text": ...}`` e
+``{"op": "ping"}``; respostas ``{"ok": true, "result": ...}`` ou
+``{"ok": false, "error": ...}``.
+"""
+
+import os
+import sys
+import json
+import socket
+import struct
+import logging
+import argparse
+import threading
+import socketserver
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+
+class SidecarUnavailableError(Exception):
+    """O sidecar não respondeu (ausente, reiniciando ou lento demais)"""
+
+
+def _send_frame(connection: socket.socket, payload: Dict[str, Any]) -> None:
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    connection.sendall(FRAME_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(connection: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size > 0:
+        chunk = connection.recv(min(size, 65536))
+        if not chunk:
+            raise ConnectionError("Conexão encerrada pelo outro lado")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_frame(connection: socket.socket) -> Dict[str, Any]:
+    (size,) = FRAME_HEADER.unpack(_recv_exactly(connection, FRAME_HEADER.size))
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"Mensagem de {size} bytes excede o limite")
+    return json.loads(_recv_exactly(connection, size))
+
+
+class SidecarClient:
+    """
+    Cliente do sidecar com uma conexão persistente por thread e por
+    processo (conexões abertas antes de um fork não são reutilizadas)
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def classify(self, text: str) -> List[Dict[str, Any]]:
+        """Saída do pipeline para o texto: ``[{"label", "score"}]``"""
+        return self._request({"op": "classify", "text": text})
+
+    def ping(self) -> Dict[str, Any]:
+        """Modelo e backend servidos pelo sidecar"""
+        return self._request({"op": "ping"})
+
+    def _request(self, payload: Dict[str, Any]) -> Any:
+        # uma conexão reaproveitada pode ter sido fechada por um reinício do
+        # sidecar: nesse caso, tenta de novo uma vez com uma conexão nova
+        for attempt in range(2):
+            reused = getattr(self._local, "connection", None) is not None
+            try:
+                connection = self._connection()
+                _send_frame(connection, payload)
+                response = _recv_frame(connection)
+                break
+            except (OSError, ValueError) as e:
+                self._close()
+                if attempt or not reused or isinstance(e, socket.timeout):
+                    raise SidecarUnavailableError(str(e) or type(e).__name__)
+
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error", "Erro no sidecar de inferência"))
+        return response["result"]
+
+    def _connection(self) -> socket.socket:
+        pid = os.getpid()
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and getattr(self._local, "pid", None) == pid:
+            return connection
+
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(self.timeout)
+        try:
+            connection.connect(self.socket_path)
+        except OSError:
+            connection.close()
+            raise
+        self._local.connection = connection
+        self._local.pid = pid
+        return connection
+
+    def _close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and getattr(self._local, "pid", None) == os.getpid():
+            connection.close()
+        self._local.connection = None
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        client = self.server.huggingface_client
+        while True:
+            try:
+                request = _recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            except ValueError as e:
+                _send_frame(self.request, {"ok": False, "error": str(e)})
+                return
+
+            try:
+                if request.get("op") == "ping":
+                    result: Any = {
+                        "model": client.model_name,
+                        "backend": client.backend,
+                    }
+                elif request.get("op") == "classify":
+                    result = client.predict(str(request.get("text", "")))
+                else:
+                    raise ValueError(f"Operação desconhecida: {request.get('op')}")
+                response = {"ok": True, "result": result}
+            except Exception as e:
+                logger.error(f"Erro no sidecar de inferência: {e}")
+                response = {"ok": False, "error": str(e)}
+
+            try:
+                _send_frame(self.request, response)
+            except OSError:
+                return
+
+
+class InferenceSidecarServer(
+    socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    daemon_threads = True
+    # todos os workers podem conectar ao mesmo tempo (o padrão é 5)
+    request_queue_size = 128
+
+    def __init__(self, socket_path: str, huggingface_client: Any):
+        self.huggingface_client = huggingface_client
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+        # só o próprio usuário (e o grupo) conversa com o sidecar
+        os.chmod(socket_path, 0o660)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Remove o arquivo de um sidecar anterior que não está mais rodando"""
+    if not os.path.exists(socket_path):
+        return
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    raise OSError(f"Já existe um sidecar atendendo em {socket_path}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from config import Config
+    from .huggingface_client import HuggingFaceClient
+
+    config = Config()
+    parser = argparse.ArgumentParser(description="Sidecar de inferência HuggingFace")
+    parser.add_argument(
+        "--socket",
+        default=config.HUGGINGFACE_SIDECAR_SOCKET or "/tmp/emailflow-inference.sock",
+        help="caminho do socket Unix",
+    )
+    parser.add_argument("--model", default=config.HUGGINGFACE_MODEL)
+    parser.add_argument(
+        "--threads", type=int, help="threads do torch (padrão: as do torch)"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    client = HuggingFaceClient(args.model, sidecar_socket="")
+    if args.threads and client.backend == "torch":
+        import torch
+
+        torch.set_num_threads(args.threads)
+    if not client.load():
+        logger.error(
+            "Modelo indisponível: verifique HUGGINGFACE_ENABLED e as dependências"
+        )
+        return 1
+
+    try:
+        server = InferenceSidecarServer(args.socket, client)
+    except OSError as e:
+        logger.error(str(e))
+        return 1
+
+    logger.info(f"Sidecar de inferência ({client.backend}) em {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
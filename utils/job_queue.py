@@ -0,0 +1,302 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from . import metrics
+from config import Config
+
+logger = logging.getLogger(__name__)
+config = Config()
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+TIMEOUT_ERROR = "Tempo limite do job excedido"
+SQLITE_CLEANUP_INTERVAL = 64
+POLL_INTERVAL_SECONDS = 0.25
+
+
+class JobQueueFullError(Exception):
+    """Job recusado porque a fila do processo está cheia"""
+
+
+class JobStore:
+    """
+    Estado dos jobs em um arquivo SQLite, compartilhado por todos os
+    workers do gunicorn na mesma máquina: qualquer worker responde à
+    consulta de um job criado por outro.
+
+    O prazo de cada job conta desde a criação (inclui a espera na fila).
+    Jobs ativos além do prazo, inclusive os de um worker que morreu, são
+    marcados como falhos na próxima consulta. Jobs concluídos expiram
+    ``result_ttl_seconds`` após o término e deixam de ser encontrados.
+    """
+
+    def __init__(self, sqlite_path: str, result_ttl_seconds: float = 3600):
+        self.sqlite_path = sqlite_path
+        self.result_ttl_seconds = result_ttl_seconds
+        self._local = threading.local()
+        self._creates = 0
+
+    def create(self, timeout_seconds: float) -> Dict[str, Any]:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        deadline = now + timeout_seconds
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO jobs (id, status, created_at, deadline, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    STATUS_QUEUED,
+                    now,
+                    deadline,
+                    deadline + self.result_ttl_seconds,
+                ),
+            )
+            self._creates += 1
+            if self._creates % SQLITE_CLEANUP_INTERVAL == 0:
+                connection.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+
+        return {
+            "id": job_id,
+            "status": STATUS_QUEUED,
+            "created_at": now,
+            "deadline": deadline,
+        }
+
+    def start(self, job_id: str) -> bool:
+        """Marca o job como em execução; False se ele já passou do prazo"""
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, started_at = ? "
+                "WHERE id = ? AND status = ? AND deadline > ?",
+                (STATUS_RUNNING, time.time(), job_id, STATUS_QUEUED, time.time()),
+            )
+        return cursor.rowcount == 1
+
+    def finish(self, job_id: str, result: Any) -> bool:
+        return self._complete(job_id, STATUS_DONE, json.dumps(result), None)
+
+    def fail(self, job_id: str, error: str) -> bool:
+        return self._complete(job_id, STATUS_FAILED, None, error)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Estado atual do job, ou None se ele não existe ou já expirou"""
+        job = self._select(job_id)
+        if job and job["status"] in ACTIVE_STATUSES and job["deadline"] <= time.time():
+            if self._complete(job_id, STATUS_FAILED, None, TIMEOUT_ERROR):
+                metrics.record_job("timeout")
+            job = self._select(job_id)
+        return job
+
+    def _complete(
+        self, job_id: str, status: str, result: Optional[str], error: Optional[str]
+    ) -> bool:
+        """Grava o término só se o job ainda estiver ativo (o primeiro vence)"""
+        now = time.time()
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, "
+                "finished_at = ?, expires_at = ? "
+                "WHERE id = ? AND status IN (?, ?)",
+                (
+                    status,
+                    result,
+                    error,
+                    now,
+                    now + self.result_ttl_seconds,
+                    job_id,
+                    *ACTIVE_STATUSES,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def _select(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT id, status, created_at, started_at, finished_at, deadline, "
+                "result, error FROM jobs WHERE id = ? AND expires_at > ?",
+                (job_id, time.time()),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão SQLite por thread e por processo (seguro após fork)"""
+        pid = os.getpid()
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and getattr(self._local, "pid", None) == pid:
+            return connection
+
+        connection = sqlite3.connect(self.sqlite_path, timeout=5.0)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL, deadline REAL NOT NULL, "
+            "expires_at REAL NOT NULL, result TEXT, error TEXT)"
+        )
+
+        self._local.connection = connection
+        self._local.pid = pid
+        return connection
+
+
+class JobQueue:
+    """
+    Fila limitada de jobs executados em um pool de threads do próprio
+    processo. O pool é criado sob demanda e recriado após um fork; a fila
+    conta os jobs aguardando e em execução neste processo e recusa novos
+    jobs acima de ``max_queued``.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 2,
+        max_queued: int = 32,
+        timeout_seconds: float = 120,
+    ):
+        self.store = store
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout_seconds = timeout_seconds
+        self._lock = threading.Lock()
+        self._finished = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._pending = 0
+
+    def submit(
+        self,
+        work: Callable[..., Any],
+        *args: Any,
+        cleanup: Optional[Callable[[], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Cria o job e agenda ``work(deadline, *args)``, cujo retorno (JSON)
+        vira o resultado do job. ``cleanup`` roda sempre ao final, mesmo se
+        o job for recusado ou expirar na fila. Levanta JobQueueFullError se
+        a fila estiver cheia.
+        """
+        try:
+            with self._lock:
+                executor = self._get_executor()
+                if self._pending >= self.max_queued:
+                    metrics.record_job("rejected")
+                    raise JobQueueFullError(
+                        f"Fila de jobs cheia ({self.max_queued} em andamento)"
+                    )
+                self._pending += 1
+
+            try:
+                job = self.store.create(self.timeout_seconds)
+                executor.submit(self._execute, job, work, args, cleanup)
+            except BaseException:
+                self._release()
+                raise
+        except BaseException:
+            if cleanup is not None:
+                cleanup()
+            raise
+
+        metrics.record_job("queued")
+        return job
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Long-poll: aguarda até ``timeout`` segundos o job terminar. Jobs deste
+        processo acordam a espera na hora; os de outros workers são vistos
+        na consulta periódica ao SQLite.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.store.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] not in ACTIVE_STATUSES or remaining <= 0:
+                return job
+            with self._finished:
+                self._finished.wait(min(remaining, POLL_INTERVAL_SECONDS))
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="job-worker"
+            )
+            self._executor_pid = pid
+            self._pending = 0
+        return self._executor
+
+    def _execute(
+        self,
+        job: Dict[str, Any],
+        work: Callable[..., Any],
+        args: tuple,
+        cleanup: Optional[Callable[[], None]],
+    ) -> None:
+        job_id = job["id"]
+        try:
+            metrics.observe_stages(
+                {"job_queue": (time.time() - job["created_at"]) * 1000}
+            )
+            if not self.store.start(job_id):
+                if self.store.fail(job_id, TIMEOUT_ERROR):
+                    metrics.record_job("timeout")
+                return
+
+            try:
+                result = work(job["deadline"], *args)
+            except Exception as e:
+                metrics.record_error("job", e)
+                logger.error(f"Erro no job {job_id}: {e}")
+                if self.store.fail(job_id, str(e)):
+                    metrics.record_job("failed")
+                return
+
+            if self.store.finish(job_id, result):
+                metrics.record_job("done")
+            else:
+                logger.warning(
+                    f"Job {job_id} terminou após o prazo; resultado descartado"
+                )
+        except sqlite3.Error as e:
+            metrics.record_error("job", e)
+            logger.error(f"Erro no armazenamento do job {job_id}: {e}")
+        finally:
+            if cleanup is not None:
+                cleanup()
+            self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending = max(0, self._pending - 1)
+        with self._finished:
+            self._finished.notify_all()
+
+
+job_queue = JobQueue(
+    JobStore(config.JOBS_SQLITE_PATH, config.JOBS_RESULT_TTL_SECONDS),
+    workers=config.JOBS_WORKERS,
+    max_queued=config.JOBS_MAX_QUEUED,
+    timeout_seconds=config.JOBS_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,56 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+
+class LatencyBudget:
+    """
+    Orçamento de latência de uma requisição.
+
+    Marca o início da análise, informa quanto tempo resta até o prazo e
+    registra quanto cada camada (pré-processamento, OpenAI, camadas locais,
+    geração de resposta) consumiu, além de qual camada venceu.
+    """
+
+    def __init__(self, total_ms: float):
+        self.total_ms = total_ms
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + total_ms / 1000.0
+        self.winner: Optional[str] = None
+        self._spent: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        """Segundos restantes até o prazo (nunca negativo)"""
+        return max(0.0, self.deadline - time.monotonic())
+
+    def slice(self, share: float) -> float:
+        """Fatia do orçamento total, limitada ao que ainda resta"""
+        return min(self.remaining(), self.total_ms / 1000.0 * share)
+
+    def is_exhausted(self) -> bool:
+        return self.remaining() <= 0
+
+    def record(self, tier: str, seconds: float) -> None:
+        with self._lock:
+            self._spent[tier] = self._spent.get(tier, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, tier: str) -> Iterator[None]:
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(tier, time.monotonic() - started)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            spent = {tier: round(s * 1000, 1) for tier, s in self._spent.items()}
+
+        return {
+            "budget_ms": self.total_ms,
+            "elapsed_ms": round((time.monotonic() - self.started_at) * 1000, 1),
+            "winner": self.winner,
+            "tiers_ms": spent,
+        }
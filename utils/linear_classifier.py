@@ -0,0 +1,408 @@
+"""
+Camada de classificação local treinada: n-gramas com hashing sobre o texto
+que os modelos recebem (prepare_email: condensado, pré-processado e
+limitado a CONDENSE_MAX_TOKENS tokens) e regressão logística em NumPy, com probabilidades
+calibradas (Platt) em uma parte separada dos dados.
+
+Treino a partir de um JSONL com {"text": ..., "category": "produtivo" | "improdutivo"}:
+
+    python -m utils.linear_classifier dados.jsonl --output models/linear_classifier.npz
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import logging
+import argparse
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ("improdutivo", "produtivo")
+DEFAULT_FEATURE_BITS = 18
+DEFAULT_NGRAM = 2
+SIGN_BIT = 1 << 31
+ARTIFACT_VERSION = 1
+
+
+class HashedFeaturizer:
+    """
+    Converte tokens em um vetor esparso de n-gramas com hashing (crc32,
+    estável entre processos): índice nos bits baixos, sinal no bit 31.
+    Valores com log1p e normalização L2.
+    """
+
+    def __init__(
+        self, feature_bits: int = DEFAULT_FEATURE_BITS, ngram: int = DEFAULT_NGRAM
+    ):
+        self.feature_bits = feature_bits
+        self.n_features = 1 << feature_bits
+        self.mask = self.n_features - 1
+        self.ngram = ngram
+
+    def transform(self, tokens: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        counts: Dict[int, float] = {}
+        for n in range(1, self.ngram + 1):
+            for i in range(len(tokens) - n + 1):
+                gram = tokens[i] if n == 1 else " ".join(tokens[i : i + n])
+                hashed = zlib.crc32(gram.encode("utf-8"))
+                index = hashed & self.mask
+                sign = -1.0 if hashed & SIGN_BIT else 1.0
+                counts[index] = counts.get(index, 0.0) + sign
+
+        if not counts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+        indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        values = np.sign(values) * np.log1p(np.abs(values))
+        norm = np.linalg.norm(values)
+        if norm > 0:
+            values /= norm
+        return indices, values
+
+    def transform_many(
+        self, documents: Iterable[Sequence[str]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Matriz esparsa em formato (linhas, índices, valores) para o treino"""
+        rows, all_indices, all_values = [], [], []
+        for row, tokens in enumerate(documents):
+            indices, values = self.transform(tokens)
+            rows.append(np.full(len(indices), row, dtype=np.int32))
+            all_indices.append(indices)
+            all_values.append(values)
+        return (
+            np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32),
+            np.concatenate(all_indices) if rows else np.zeros(0, dtype=np.int32),
+            np.concatenate(all_values) if rows else np.zeros(0, dtype=np.float32),
+        )
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35, 35)))
+
+
+class LinearClassifier:
+    """
+    Regressão logística binária sobre atributos com hashing. A probabilidade
+    de "produtivo" é sigmoid(a * (w·x + b) + c), com (a, c) da calibração.
+    """
+
+    def __init__(
+        self,
+        featurizer: HashedFeaturizer,
+        weights: np.ndarray,
+        bias: float,
+        calibration: Tuple[float, float] = (1.0, 0.0),
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        self.featurizer = featurizer
+        self.weights = weights.astype(np.float32)
+        self.bias = float(bias)
+        self.calibration = (float(calibration[0]), float(calibration[1]))
+        self.metadata = metadata or {}
+
+    def decision_function(self, tokens: Sequence[str]) -> float:
+        indices, values = self.featurizer.transform(tokens)
+        return float(np.dot(self.weights[indices], values)) + self.bias
+
+    def predict_proba(self, tokens: Sequence[str]) -> float:
+        """Probabilidade calibrada de o email ser produtivo"""
+        a, c = self.calibration
+        return float(_sigmoid(np.float64(a * self.decision_function(tokens) + c)))
+
+    def classify(self, tokens: Sequence[str]) -> Dict[str, Any]:
+        probability = self.predict_proba(tokens)
+        category = "produtivo" if probability >= 0.5 else "improdutivo"
+        confidence = probability if category == "produtivo" else 1.0 - probability
+        return {
+            "category": category,
+            "confidence": confidence,
+            "method": "linear",
+            "reasoning": f"Modelo linear local: P(produtivo) = {probability:.2f}",
+        }
+
+    def save(self, path: str) -> None:
+        """Grava só os pesos não nulos, em um .npz compacto"""
+        nonzero = np.flatnonzero(np.abs(self.weights) > 1e-7).astype(np.int32)
+        metadata = {
+            **self.metadata,
+            "version": ARTIFACT_VERSION,
+            "feature_bits": self.featurizer.feature_bits,
+            "ngram": self.featurizer.ngram,
+            "bias": self.bias,
+            "calibration": list(self.calibration),
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                indices=nonzero,
+                values=self.weights[nonzero],
+                metadata=np.array(json.dumps(metadata, ensure_ascii=False)),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "LinearClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data["metadata"]))
+            if metadata.get("version") != ARTIFACT_VERSION:
+                raise ValueError(f"Versão de modelo não suportada: {path}")
+            featurizer = HashedFeaturizer(metadata["feature_bits"], metadata["ngram"])
+            weights = np.zeros(featurizer.n_features, dtype=np.float32)
+            weights[data["indices"]] = data["values"]
+
+        return cls(
+            featurizer,
+            weights,
+            metadata["bias"],
+            tuple(metadata["calibration"]),
+            metadata,
+        )
+
+
+def load_linear_classifier(path: str) -> Optional[LinearClassifier]:
+    """Carrega o modelo se o arquivo existir; a camada fica desativada caso contrário"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        model = LinearClassifier.load(path)
+        logger.info(f"Modelo linear carregado de {path}")
+        return model
+    except Exception as e:
+        logger.warning(f"Modelo linear não carregado ({path}): {e}")
+        return None
+
+
+def _fit_logistic(
+    rows: np.ndarray,
+    indices: np.ndarray,
+    values: np.ndarray,
+    labels: np.ndarray,
+    n_features: int,
+    epochs: int,
+    learning_rate: float,
+    l2: float,
+) -> Tuple[np.ndarray, float]:
+    """Gradiente completo com Adam sobre a matriz esparsa (linhas, índices, valores)"""
+    n_rows = len(labels)
+    weights = np.zeros(n_features, dtype=np.float64)
+    bias = 0.0
+    m_w = np.zeros_like(weights)
+    v_w = np.zeros_like(weights)
+    m_b = v_b = 0.0
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+
+    for step in range(1, epochs + 1):
+        scores = np.bincount(rows, weights=weights[indices] * values, minlength=n_rows)
+        errors = _sigmoid(scores + bias) - labels
+        grad_w = (
+            np.bincount(indices, weights=values * errors[rows], minlength=n_features)
+            / n_rows
+            + l2 * weights
+        )
+        grad_b = float(errors.mean())
+
+        m_w = beta1 * m_w + (1 - beta1) * grad_w
+        v_w = beta2 * v_w + (1 - beta2) * grad_w**2
+        m_b = beta1 * m_b + (1 - beta1) * grad_b
+        v_b = beta2 * v_b + (1 - beta2) * grad_b**2
+        correction1 = 1 - beta1**step
+        correction2 = 1 - beta2**step
+        weights -= (
+            learning_rate * (m_w / correction1) / (np.sqrt(v_w / correction2) + eps)
+        )
+        bias -= learning_rate * (m_b / correction1) / (np.sqrt(v_b / correction2) + eps)
+
+    return weights, bias
+
+
+def _fit_platt(scores: np.ndarray, labels: np.ndarray) -> Tuple[float, float]:
+    """Calibração de Platt por Newton em (a, c), com alvos suavizados"""
+    positives = labels.sum()
+    negatives = len(labels) - positives
+    targets = np.where(
+        labels > 0.5, (positives + 1) / (positives + 2), 1 / (negatives + 2)
+    )
+    a, c = 1.0, 0.0
+    for _ in range(100):
+        p = _sigmoid(a * scores + c)
+        weight = np.maximum(p * (1 - p), 1e-12)
+        gradient = np.array(
+            [np.sum((p - targets) * scores), np.sum(p - targets)], dtype=np.float64
+        )
+        hessian = np.array(
+            [
+                [np.sum(weight * scores * scores) + 1e-9, np.sum(weight * scores)],
+                [np.sum(weight * scores), np.sum(weight) + 1e-9],
+            ]
+        )
+        step = np.linalg.solve(hessian, gradient)
+        a, c = a - step[0], c - step[1]
+        if np.abs(step).max() < 1e-8:
+            break
+    return float(a), float(c)
+
+
+def _evaluate(probabilities: np.ndarray, labels: np.ndarray) -> Dict[str, float]:
+    clipped = np.clip(probabilities, 1e-7, 1 - 1e-7)
+    log_loss = -np.mean(labels * np.log(clipped) + (1 - labels) * np.log(1 - clipped))
+    predictions = (probabilities >= 0.5).astype(float)
+    confidence = np.maximum(probabilities, 1 - probabilities)
+    correct = (predictions == labels).astype(float)
+
+    ece = 0.0
+    bins = np.linspace(0.5, 1.0, 6)
+    for low, high in zip(bins[:-1], bins[1:]):
+        in_bin = (confidence >= low) & (confidence < high if high < 1 else True)
+        if in_bin.any():
+            ece += in_bin.mean() * abs(
+                correct[in_bin].mean() - confidence[in_bin].mean()
+            )
+
+    return {
+        "accuracy": round(float(correct.mean()), 4),
+        "log_loss": round(float(log_loss), 4),
+        "ece": round(float(ece), 4),
+    }
+
+
+def train_linear_classifier(
+    documents: List[Sequence[str]],
+    categories: List[str],
+    feature_bits: int = DEFAULT_FEATURE_BITS,
+    ngram: int = DEFAULT_NGRAM,
+    epochs: int = 200,
+    learning_rate: float = 0.05,
+    l2: float = 1e-4,
+    validation_split: float = 0.2,
+    seed: int = 42,
+) -> LinearClassifier:
+    """
+    Treina em (1 - validation_split) dos exemplos e calibra as
+    probabilidades nos restantes; as métricas de validação vão nos metadados
+    """
+    featurizer = HashedFeaturizer(feature_bits, ngram)
+    labels = np.array(
+        [CATEGORIES.index(category) for category in categories], dtype=np.float64
+    )
+
+    order = np.random.default_rng(seed).permutation(len(documents))
+    n_validation = int(len(documents) * validation_split)
+    validation_ids, train_ids = order[:n_validation], order[n_validation:]
+
+    rows, indices, values = featurizer.transform_many(documents[i] for i in train_ids)
+    weights, bias = _fit_logistic(
+        rows,
+        indices,
+        values.astype(np.float64),
+        labels[train_ids],
+        featurizer.n_features,
+        epochs,
+        learning_rate,
+        l2,
+    )
+    model = LinearClassifier(featurizer, weights, bias)
+
+    metadata: Dict[str, Any] = {
+        "train_examples": int(len(train_ids)),
+        "validation_examples": int(n_validation),
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    if n_validation >= 10:
+        scores = np.array(
+            [model.decision_function(documents[i]) for i in validation_ids]
+        )
+        validation_labels = labels[validation_ids]
+        metadata["validation_uncalibrated"] = _evaluate(
+            _sigmoid(scores), validation_labels
+        )
+        model.calibration = _fit_platt(scores, validation_labels)
+        a, c = model.calibration
+        metadata["validation"] = _evaluate(_sigmoid(a * scores + c), validation_labels)
+
+    model.metadata = metadata
+    return model
+
+
+def _read_jsonl(path: str) -> Tuple[List[str], List[str]]:
+    texts, categories = [], []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            text = item.get("text", item.get("email_text"))
+            category = str(item.get("category", item.get("label", ""))).lower()
+            if not isinstance(text, str) or category not in CATEGORIES:
+                raise ValueError(f"Linha {line_number} inválida em {path}")
+            texts.append(text)
+            categories.append(category)
+    return texts, categories
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Treina o classificador linear local")
+    parser.add_argument("data", help='JSONL com {"text", "category"}')
+    parser.add_argument("--output", default="models/linear_classifier.npz")
+    parser.add_argument("--feature-bits", type=int, default=DEFAULT_FEATURE_BITS)
+    parser.add_argument("--ngram", type=int, default=DEFAULT_NGRAM)
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--learning-rate", type=float, default=0.05)
+    parser.add_argument("--l2", type=float, default=1e-4)
+    parser.add_argument("--validation-split", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    from config import Config
+    from .condenser import EmailCondenser
+    from .financial_email_classifier import prepare_email
+
+    texts, categories = _read_jsonl(args.data)
+    # mesma entrada que o modelo recebe no serviço (condensada e limitada)
+    condenser = EmailCondenser(Config.MIN_TEXT_LENGTH)
+    documents = [
+        prepare_email(text, condenser).processed_text.split() for text in texts
+    ]
+
+    started = time.perf_counter()
+    model = train_linear_classifier(
+        documents,
+        categories,
+        feature_bits=args.feature_bits,
+        ngram=args.ngram,
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        l2=args.l2,
+        validation_split=args.validation_split,
+        seed=args.seed,
+    )
+    training_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for tokens in documents:
+        model.predict_proba(tokens)
+    predict_us = (time.perf_counter() - started) / max(len(documents), 1) * 1e6
+
+    model.save(args.output)
+    report = {
+        **model.metadata,
+        "training_seconds": round(training_seconds, 2),
+        "predict_us_per_email": round(predict_us, 1),
+        "artifact": args.output,
+        "artifact_kb": round(os.path.getsize(args.output) / 1024, 1),
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+"""
+Reclassifica arquivos de caixas de email em lote, fora do Flask.
+
+    python -m utils.mailbox_ingest caixa.mbox Maildir/ emails/ --output resultados.jsonl
+    python -m utils.mailbox_ingest caixa.mbox --output resultados.csv --workers 8
+
+Aceita arquivos mbox, diretórios Maildir (com ``cur/`` e ``new/``),
+diretórios com arquivos ``.eml`` (recursivo) e arquivos ``.eml`` avulsos.
+As mensagens são lidas uma a uma, sem carregar o arquivo inteiro, e
+analisadas em um pool de processos com uma janela limitada de lotes em
+andamento; os resultados são gravados na ordem de entrada em JSONL ou CSV.
+
+A cada ``--checkpoint-every`` mensagens o progresso é gravado em
+``<saída>.checkpoint.json``. Rodando o mesmo comando de novo, a execução
+retoma de onde parou: a saída é truncada no último ponto registrado e as
+mensagens já gravadas são puladas sem serem analisadas.
+"""
+
+import io
+import os
+import csv
+import sys
+import json
+import time
+import logging
+import argparse
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .mime_extractor import parse_email
+from config import Config
+
+logger = logging.getLogger(__name__)
+config = Config()
+
+CSV_FIELDS = [
+    "key",
+    "subject",
+    "category",
+    "confidence",
+    "method",
+    "generated_by",
+    "response",
+    "suggested_actions",
+    "error",
+]
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+_classifier = None
+_budget_ms: Optional[float] = None
+
+
+def iter_messages(
+    sources: Sequence[str], max_bytes: int
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Produz (chave, bytes) de cada mensagem das fontes, em ordem
+    determinística. Mensagens maiores que ``max_bytes`` são truncadas.
+    """
+    for source in sources:
+        if os.path.isdir(source):
+            if os.path.isdir(os.path.join(source, "cur")) and os.path.isdir(
+                os.path.join(source, "new")
+            ):
+                yield from _iter_maildir(source, max_bytes)
+            else:
+                yield from _iter_eml_directory(source, max_bytes)
+        elif source.lower().endswith(".eml"):
+            yield source, _read_file(source, max_bytes)
+        else:
+            yield from _iter_mbox(source, max_bytes)
+
+
+def _iter_mbox(path: str, max_bytes: int) -> Iterator[Tuple[str, bytes]]:
+    """
+    Divide o mbox nas linhas "From " que seguem uma linha em branco,
+    lendo linha a linha; a chave é o deslocamento da mensagem no arquivo
+    """
+    with open(path, "rb") as f:
+        offset, start = 0, None
+        lines: List[bytes] = []
+        size, previous_blank = 0, True
+        for line in f:
+            line_offset, offset = offset, offset + len(line)
+            if previous_blank and line.startswith(b"From "):
+                if start is not None:
+                    yield f"{path}:{start}", b"".join(lines)
+                start, lines, size = line_offset, [], 0
+                previous_blank = False
+                continue
+
+            previous_blank = line in (b"\n", b"\r\n")
+            if start is None or size >= max_bytes:
+                continue
+            # desfaz o escape ">From " do formato mboxrd
+            if line.startswith(b">") and line.lstrip(b">").startswith(b"From "):
+                line = line[1:]
+            lines.append(line[: max_bytes - size])
+            size += len(line)
+
+        if start is not None:
+            yield f"{path}:{start}", b"".join(lines)
+
+
+def _iter_maildir(path: str, max_bytes: int) -> Iterator[Tuple[str, bytes]]:
+    for subdir in ("cur", "new"):
+        directory = os.path.join(path, subdir)
+        for name in sorted(os.listdir(directory)):
+            file_path = os.path.join(directory, name)
+            if not name.startswith(".") and os.path.isfile(file_path):
+                yield file_path, _read_file(file_path, max_bytes)
+
+
+def _iter_eml_directory(path: str, max_bytes: int) -> Iterator[Tuple[str, bytes]]:
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".eml"):
+                file_path = os.path.join(root, name)
+                yield file_path, _read_file(file_path, max_bytes)
+
+
+def _read_file(path: str, max_bytes: int) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(max_bytes)
+
+
+def _init_worker(budget_ms: Optional[float]) -> None:
+    """Cria o classificador uma vez por processo do pool"""
+    global _classifier, _budget_ms
+    from .financial_email_classifier import FinancialEmailClassifier
+
+    # os logs por mensagem do classificador poluiriam o progresso
+    logging.getLogger("utils").setLevel(logging.WARNING)
+
+    _classifier = FinancialEmailClassifier()
+    _budget_ms = budget_ms
+
+
+def _analyze_chunk(messages: List[Tuple[str, bytes]]) -> List[Dict[str, Any]]:
+    return [_analyze_message(key, raw) for key, raw in messages]
+
+
+def _analyze_message(key: str, raw: bytes) -> Dict[str, Any]:
+    row: Dict[str, Any] = {"key": key}
+    try:
+        parsed = parse_email(io.BytesIO(raw), len(raw), config.EML_MAX_BODY_BYTES)
+        row["subject"], text = parsed.subject, parsed.text
+        if not text.strip():
+            raise ValueError("Mensagem sem texto")
+
+        result = _classifier.analyze_email(text, _budget_ms)
+        row.update(
+            category=result["category"],
+            confidence=round(result["confidence"], 4),
+            method=result["method"],
+            generated_by=result["generated_by"],
+            response=result["response"],
+            suggested_actions=result["suggested_actions"],
+        )
+    except Exception as e:
+        row["error"] = str(e) or type(e).__name__
+    return row
+
+
+def _chunks(
+    messages: Iterator[Tuple[str, bytes]], size: int
+) -> Iterator[List[Tuple[str, bytes]]]:
+    chunk: List[Tuple[str, bytes]] = []
+    for message in messages:
+        chunk.append(message)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ResultWriter:
+    """Grava as linhas em JSONL ou CSV, anexando a uma saída existente"""
+
+    def __init__(self, path: str, output_format: str):
+        self.path = path
+        self.format = output_format
+        self._file = open(path, "a", encoding="utf-8", newline="")
+        self._csv = None
+        if output_format == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS)
+            if self._file.tell() == 0:
+                self._csv.writeheader()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self._csv is None:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            return
+
+        actions = row.get("suggested_actions")
+        self._csv.writerow(
+            {**row, "suggested_actions": "; ".join(actions) if actions else ""}
+        )
+
+    def sync(self) -> int:
+        """Descarrega a saída em disco e devolve o tamanho gravado"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class Checkpoint:
+    """
+    Progresso da execução: quantas mensagens já foram gravadas e o tamanho
+    da saída nesse ponto. Gravado de forma atômica (arquivo temporário +
+    rename) depois que a saída é descarregada em disco.
+    """
+
+    def __init__(self, path: str, sources: Sequence[str], output_format: str):
+        self.path = path
+        self.sources = [os.path.abspath(source) for source in sources]
+        self.format = output_format
+        self.processed = 0
+        self.output_bytes = 0
+
+    def load(self) -> bool:
+        """Carrega o progresso anterior; False se não houver checkpoint"""
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state["sources"] != self.sources or state["format"] != self.format:
+            raise ValueError(
+                f"O checkpoint {self.path} é de outra execução "
+                "(fontes ou formato diferentes); use --restart"
+            )
+        self.processed = state["processed"]
+        self.output_bytes = state["output_bytes"]
+        return True
+
+    def save(self, processed: int, output_bytes: int) -> None:
+        self.processed, self.output_bytes = processed, output_bytes
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "sources": self.sources,
+                    "format": self.format,
+                    "processed": processed,
+                    "output_bytes": output_bytes,
+                    "updated_at": time.time(),
+                },
+                f,
+            )
+        os.replace(temporary_path, self.path)
+
+
+def ingest(
+    sources: Sequence[str],
+    output: str,
+    output_format: str,
+    workers: int,
+    chunk_size: int = 16,
+    checkpoint_every: int = 500,
+    budget_ms: Optional[float] = None,
+    restart: bool = False,
+) -> Dict[str, Any]:
+    """
+    Analisa todas as mensagens das fontes e grava os resultados em
+    ``output``, retomando do checkpoint quando ele existir
+    """
+    checkpoint = Checkpoint(f"{output}.checkpoint.json", sources, output_format)
+    if restart and os.path.exists(checkpoint.path):
+        os.unlink(checkpoint.path)
+    if checkpoint.load():
+        # descarta as linhas gravadas depois do último checkpoint
+        with open(output, "r+b") as f:
+            f.truncate(checkpoint.output_bytes)
+        logger.info(f"Retomando após {checkpoint.processed} mensagens")
+    elif os.path.exists(output):
+        os.unlink(output)
+
+    messages = iter_messages(sources, config.UPLOAD_MAX_BYTES)
+    skipped = 0
+    for _ in range(checkpoint.processed):
+        if next(messages, None) is None:
+            break
+        skipped += 1
+
+    writer = ResultWriter(output, output_format)
+    categories: Counter = Counter()
+    errors = 0
+    processed = checkpoint.processed
+    analyzed = 0
+    started = last_report = time.perf_counter()
+    pending: deque = deque()
+    max_in_flight = workers * 4
+
+    def _drain_one() -> None:
+        nonlocal processed, analyzed, errors, last_report
+        for row in pending.popleft().result():
+            writer.write(row)
+            processed += 1
+            analyzed += 1
+            if "error" in row:
+                errors += 1
+            else:
+                categories[row["category"]] += 1
+            if processed % checkpoint_every == 0:
+                checkpoint.save(processed, writer.sync())
+
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+            last_report = now
+            logger.info(
+                f"{processed} mensagens ({analyzed / (now - started):.1f} msg/s)"
+            )
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(budget_ms,)
+    )
+    try:
+        for chunk in _chunks(messages, chunk_size):
+            pending.append(executor.submit(_analyze_chunk, chunk))
+            while len(pending) >= max_in_flight or (pending and pending[0].done()):
+                _drain_one()
+
+        while pending:
+            _drain_one()
+    finally:
+        # grava o que já saiu, inclusive em uma interrupção (Ctrl+C)
+        checkpoint.save(processed, writer.sync())
+        writer.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    seconds = time.perf_counter() - started
+    return {
+        "messages": processed,
+        "analyzed": analyzed,
+        "resumed_after": skipped,
+        "errors": errors,
+        "categories": dict(categories),
+        "seconds": round(seconds, 2),
+        "messages_per_second": round(analyzed / seconds, 1) if seconds else None,
+        "workers": workers,
+        "output": output,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Classifica em lote mensagens de arquivos mbox, Maildir e .eml"
+    )
+    parser.add_argument(
+        "sources", nargs="+", help="arquivos mbox, diretórios Maildir ou de .eml"
+    )
+    parser.add_argument("--output", required=True, help="arquivo .jsonl ou .csv")
+    parser.add_argument(
+        "--format",
+        choices=("jsonl", "csv"),
+        help="formato da saída (padrão: pela extensão de --output)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--chunk-size", type=int, default=16, help="mensagens por tarefa do pool"
+    )
+    parser.add_argument("--checkpoint-every", type=int, default=500)
+    parser.add_argument(
+        "--budget-ms", type=float, help="orçamento de latência por mensagem"
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="ignora o checkpoint e recomeça"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    output_format = args.format or (
+        "csv" if args.output.lower().endswith(".csv") else "jsonl"
+    )
+
+    try:
+        report = ingest(
+            args.sources,
+            args.output,
+            output_format,
+            workers=max(1, args.workers),
+            chunk_size=max(1, args.chunk_size),
+            checkpoint_every=max(1, args.checkpoint_every),
+            budget_ms=args.budget_ms,
+            restart=args.restart,
+        )
+    except KeyboardInterrupt:
+        logger.info("Interrompido; rode o mesmo comando para retomar")
+        return 130
+    except (OSError, ValueError) as e:
+        logger.error(str(e))
+        return 1
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
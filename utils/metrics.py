@@ -0,0 +1,261 @@
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def _format_labels(label_names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not label_names:
+        return ""
+    pairs = []
+    for name, value in zip(label_names, values):
+        escaped = (
+            str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        )
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Contador monotônico com rótulos"""
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for key, value in values:
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Histograma com rótulos. Cada observação custa uma busca binária e um
+    incremento sob o lock da métrica; as contagens cumulativas exigidas pelo
+    formato Prometheus só são calculadas na exportação.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...],
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # contagem por bucket (+Inf no fim), soma e total
+                series = [0.0] * (len(self.buckets) + 3)
+                self._series[key] = series
+            series[position] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted(
+                (key, list(series)) for key, series in self._series.items()
+            )
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        bucket_label_names = self.label_names + ("le",)
+        for key, series in snapshot:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(bucket_label_names, key + (le,))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de métricas do processo, exportado no formato texto do Prometheus"""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def counter(
+        self, name: str, documentation: str, label_names: Tuple[str, ...] = ()
+    ) -> Counter:
+        metric = Counter(name, documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "emailflow_stage_duration_seconds",
+    "Duração de cada etapa da análise (extração, pré-processamento, camadas de classificação e resposta)",
+    ("stage",),
+)
+RESULTS = registry.counter(
+    "emailflow_results_total",
+    "Análises concluídas por camada de classificação vencedora e origem da resposta",
+    ("method", "generated_by"),
+)
+ERRORS = registry.counter(
+    "emailflow_errors_total",
+    "Erros por etapa e tipo de exceção",
+    ("stage", "type"),
+)
+CASCADE_EXITS = registry.counter(
+    "emailflow_cascade_exits_total",
+    "Classificações por camada da cascata que deu a resposta final",
+    ("tier",),
+)
+CASCADE_ESCALATIONS = registry.counter(
+    "emailflow_cascade_escalations_total",
+    "Escaladas da cascata por camada consultada e motivo (uncertain, disagreement, unavailable)",
+    ("tier", "reason"),
+)
+CONDENSATION_TOKENS = registry.counter(
+    "emailflow_condensation_tokens_total",
+    "Tokens pré-processados antes (input) e depois (sent) da condensação do email",
+    ("kind",),
+)
+NEAR_DUPLICATE_LOOKUPS = registry.counter(
+    "emailflow_near_duplicate_lookups_total",
+    "Consultas ao índice de quase duplicatas por resultado (hit ou miss)",
+    ("result",),
+)
+JOBS = registry.counter(
+    "emailflow_jobs_total",
+    "Jobs assíncronos por evento (queued, rejected, done, failed, timeout)",
+    ("status",),
+)
+OPENAI_TOKENS = registry.counter(
+    "emailflow_openai_tokens_total",
+    "Tokens consumidos na OpenAI por modelo e tipo (prompt ou completion)",
+    ("model", "kind"),
+)
+
+
+def observe_stages(stages_ms: Dict[str, float]) -> None:
+    """Registra as durações (em ms) de cada etapa nos histogramas"""
+    for stage, duration_ms in stages_ms.items():
+        STAGE_SECONDS.observe(duration_ms / 1000.0, stage=stage)
+
+
+def record_result(method: str, generated_by: str) -> None:
+    RESULTS.inc(method=method, generated_by=generated_by)
+
+
+def record_cascade(exit_tier: str, escalations: List[Dict[str, str]]) -> None:
+    """Camada final e escaladas de uma classificação"""
+    CASCADE_EXITS.inc(tier=exit_tier)
+    for escalation in escalations:
+        CASCADE_ESCALATIONS.inc(tier=escalation["to"], reason=escalation["reason"])
+
+
+def record_condensation(tokens_before: int, tokens_after: int) -> None:
+    CONDENSATION_TOKENS.inc(tokens_before, kind="input")
+    CONDENSATION_TOKENS.inc(tokens_after, kind="sent")
+
+
+def record_near_duplicate(hit: bool) -> None:
+    NEAR_DUPLICATE_LOOKUPS.inc(result="hit" if hit else "miss")
+
+
+def record_job(status: str) -> None:
+    JOBS.inc(status=status)
+
+
+def record_error(stage: str, error: BaseException) -> None:
+    ERRORS.inc(stage=stage, type=type(error).__name__)
+
+
+def record_openai_usage(model: str, usage: Optional[Any]) -> None:
+    """Contabiliza os tokens informados no campo ``usage`` da resposta"""
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    if prompt_tokens:
+        OPENAI_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        OPENAI_TOKENS.inc(completion_tokens, model=model, kind="completion")
+
+
+def server_timing_header(stages_ms: Dict[str, float]) -> str:
+    """Monta o cabeçalho Server-Timing a partir das durações (em ms) por etapa"""
+    return ", ".join(
+        f"{stage};dur={duration_ms:.1f}" for stage, duration_ms in stages_ms.items()
+    )
+
+
+def render() -> str:
+    return registry.render()
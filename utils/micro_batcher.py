@@ -0,0 +1,92 @@
+import os
+import queue
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Agrupa chamadas concorrentes em lotes para uma função de inferência.
+
+    Cada thread chamadora envia um item e aguarda o seu próprio resultado.
+    Uma thread de fundo junta os itens por até ``max_wait_ms`` ou
+    ``max_batch_size`` itens e executa uma única chamada de ``batch_fn``,
+    que deve devolver uma lista de resultados na mesma ordem da entrada.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[tuple[Any, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def submit(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Envia um item para o próximo lote e aguarda o resultado"""
+        if self.max_batch_size == 1:
+            return self.batch_fn([item])[0]
+
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future.result(timeout=timeout)
+
+    def _ensure_worker(self) -> None:
+        """Inicia a thread de fundo, recriando-a após um fork do processo"""
+        pid = os.getpid()
+        if self._worker is not None and self._pid == pid:
+            return
+
+        with self._lock:
+            if self._worker is not None and self._pid == pid:
+                return
+            self._queue = queue.Queue()
+            self._pid = pid
+            self._worker = threading.Thread(
+                target=self._run, name="micro-batcher", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self) -> None:
+        pending = self._queue
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        batch.append(pending.get_nowait())
+                    else:
+                        batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            futures = [future for _, future in batch]
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError(
+                        f"Lote com {len(batch)} itens devolveu {len(results)} resultados"
+                    )
+            except Exception as e:
+                logger.error(f"Erro na execução do lote: {e}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                future.set_result(result)
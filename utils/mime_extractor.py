@@ -0,0 +1,239 @@
+import re
+import html
+import logging
+import binascii
+from email.header import decode_header, make_header
+from email.message import Message
+from email.parser import BytesHeaderParser
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_LINE_BYTES = 64 * 1024
+MAX_HEADER_BYTES = 256 * 1024
+TEXT_SUBTYPES = ("plain", "html")
+
+HTML_DROP_PATTERN = re.compile(
+    r"<(script|style|head)\b.*?</\1\s*>|<!--.*?-->", re.I | re.S
+)
+HTML_BREAK_PATTERN = re.compile(r"<(br|/p|/div|/tr|/h\d|li)\b[^>]*>", re.I)
+HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
+BLANK_PATTERN = re.compile(r"[ \t\r\f\v]+")
+BLANK_LINES_PATTERN = re.compile(r"\n\s*\n+")
+
+Boundary = Optional[Tuple[bytes, bool]]
+
+
+class ParsedEmail(NamedTuple):
+    subject: str
+    body: str
+    truncated: bool
+
+    @property
+    def text(self) -> str:
+        """Assunto e corpo, como texto único para a análise"""
+        return "\n".join(part for part in (self.subject, self.body) if part)
+
+
+def html_to_text(markup: str) -> str:
+    """Conversão rápida de HTML para texto por expressões regulares"""
+    markup = HTML_DROP_PATTERN.sub(" ", markup)
+    markup = HTML_BREAK_PATTERN.sub("\n", markup)
+    text = html.unescape(HTML_TAG_PATTERN.sub(" ", markup))
+    text = BLANK_PATTERN.sub(" ", text)
+    return BLANK_LINES_PATTERN.sub("\n\n", text).strip()
+
+
+def parse_email(stream: BinaryIO, max_bytes: int, max_body_bytes: int) -> ParsedEmail:
+    """
+    Extrai assunto e corpo de uma mensagem MIME lendo o fluxo linha a
+    linha, sem montar a árvore da mensagem em memória.
+
+    Prefere a parte text/plain e usa a text/html (convertida) só na falta
+    dela; anexos e partes binárias são pulados sem decodificação. Cada
+    corpo de texto é decodificado (base64 ou quoted-printable) até
+    ``max_body_bytes``, e a leitura para em ``max_bytes`` ou assim que a
+    parte text/plain termina. ``truncated`` indica que o limite de leitura
+    foi atingido antes do fim da mensagem.
+    """
+    parser = _MimeStreamParser(stream, max_bytes, max_body_bytes)
+    parser.parse()
+
+    body = parser.plain
+    if body is None and parser.html is not None:
+        body = html_to_text(parser.html)
+
+    return ParsedEmail(parser.subject, (body or "").strip(), parser.truncated)
+
+
+class _MimeStreamParser:
+    def __init__(self, stream: BinaryIO, max_bytes: int, max_body_bytes: int):
+        self.stream = stream
+        self.remaining = max_bytes
+        self.max_body_bytes = max_body_bytes
+        self.truncated = False
+        self.stopped = False
+        self.subject = ""
+        self.plain: Optional[str] = None
+        self.html: Optional[str] = None
+
+    def parse(self) -> None:
+        headers = self._read_headers()
+        self.subject = _decode_subject(headers.get("subject", ""))
+        self._parse_body(headers, [])
+
+    def _readline(self) -> bytes:
+        if self.stopped:
+            return b""
+        if self.remaining <= 0:
+            self.truncated = bool(self.stream.read(1))
+            self.stopped = True
+            return b""
+
+        line = self.stream.readline(min(MAX_LINE_BYTES, self.remaining))
+        self.remaining -= len(line)
+        return line
+
+    def _read_headers(self) -> Message:
+        """Lê o bloco de cabeçalhos até a linha em branco"""
+        block: List[bytes] = []
+        size = 0
+        while line := self._readline():
+            if line in (b"\r\n", b"\n"):
+                break
+            if size < MAX_HEADER_BYTES:
+                block.append(line)
+                size += len(line)
+        return BytesHeaderParser().parsebytes(b"".join(block))
+
+    def _parse_part(self, boundaries: List[bytes]) -> Boundary:
+        return self._parse_body(self._read_headers(), boundaries)
+
+    def _parse_body(self, headers: Message, boundaries: List[bytes]) -> Boundary:
+        """
+        Processa o corpo da parte e devolve a linha delimitadora que o
+        encerrou, (delimitador, fechamento), ou None no fim do fluxo
+        """
+        maintype = headers.get_content_maintype()
+        subtype = headers.get_content_subtype()
+        boundary = headers.get_param("boundary")
+
+        if maintype == "multipart" and isinstance(boundary, str):
+            delimiter = b"--" + boundary.encode("ascii", errors="ignore")
+            inner = boundaries + [delimiter]
+            match = self._skip_until(inner)
+            while match is not None:
+                matched, closing = match
+                if matched != delimiter:
+                    return match
+                if closing:
+                    return self._skip_until(boundaries)
+                match = self._parse_part(inner)
+            return None
+
+        if maintype == "message" and subtype == "rfc822":
+            return self._parse_part(boundaries)
+
+        if (
+            maintype == "text"
+            and subtype in TEXT_SUBTYPES
+            and headers.get_content_disposition() != "attachment"
+            and self.plain is None
+            and (subtype == "plain" or self.html is None)
+        ):
+            return self._collect_text(headers, subtype, boundaries)
+
+        return self._skip_until(boundaries)
+
+    def _skip_until(self, boundaries: List[bytes]) -> Boundary:
+        while line := self._readline():
+            match = _match_boundary(line, boundaries)
+            if match is not None:
+                return match
+        return None
+
+    def _collect_text(
+        self, headers: Message, subtype: str, boundaries: List[bytes]
+    ) -> Boundary:
+        encoding = str(headers.get("content-transfer-encoding", "")).strip().lower()
+        chunks: List[bytes] = []
+        size = 0
+        pending = b""
+        match = None
+
+        while line := self._readline():
+            match = _match_boundary(line, boundaries)
+            if match is not None:
+                break
+            if size >= self.max_body_bytes:
+                continue
+
+            if encoding == "base64":
+                pending += line.strip()
+                usable = len(pending) - len(pending) % 4
+                decoded = _decode_base64(pending[:usable])
+                pending = pending[usable:]
+            elif encoding == "quoted-printable":
+                decoded = binascii.a2b_qp(line.replace(b"\r\n", b"\n"))
+            else:
+                decoded = line
+
+            chunks.append(decoded[: self.max_body_bytes - size])
+            size += len(decoded)
+
+        if pending and size < self.max_body_bytes:
+            chunks.append(_decode_base64(pending + b"=" * (-len(pending) % 4)))
+
+        text = _decode_payload(b"".join(chunks), headers.get_content_charset())
+        if subtype == "plain":
+            self.plain = text
+            # a parte preferida já foi lida: o restante da mensagem é ignorado
+            self.stopped = True
+        else:
+            self.html = text
+        return match
+
+
+def _match_boundary(line: bytes, boundaries: List[bytes]) -> Boundary:
+    if not line.startswith(b"--"):
+        return None
+
+    stripped = line.rstrip()
+    for boundary in reversed(boundaries):
+        if stripped == boundary:
+            return boundary, False
+        if stripped == boundary + b"--":
+            return boundary, True
+    return None
+
+
+def _decode_base64(data: bytes) -> bytes:
+    try:
+        return binascii.a2b_base64(data)
+    except binascii.Error:
+        return b""
+
+
+def _decode_payload(payload: bytes, charset: Optional[str]) -> str:
+    """
+    Decodifica no charset declarado; o corte no limite de bytes pode partir
+    o último caractere, então um erro nele é ignorado antes dos fallbacks
+    """
+    for encoding in (charset, "utf-8"):
+        if not encoding:
+            continue
+        try:
+            return payload.decode(encoding)
+        except LookupError:
+            continue
+        except UnicodeDecodeError as e:
+            if e.start >= len(payload) - 4:
+                return payload.decode(encoding, errors="ignore")
+    return payload.decode("latin-1")
+
+
+def _decode_subject(value: str) -> str:
+    try:
+        return str(make_header(decode_header(value))).strip()
+    except Exception:
+        return str(value).strip()
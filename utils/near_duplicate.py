@@ -0,0 +1,167 @@
+import time
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+FINGERPRINT_BITS = 64
+BIT_SHIFTS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+HIGH_HASH_SEED = 0x9E3779B9
+
+
+def simhash(tokens: Sequence[str], ngram: int = 1) -> int:
+    """
+    Impressão digital SimHash de 64 bits sobre os tokens (e n-gramas até
+    ``ngram``), ponderados pela frequência. Textos quase iguais têm
+    impressões a poucos bits de distância (Hamming).
+    """
+    counts: Dict[int, int] = {}
+    for n in range(1, ngram + 1):
+        for i in range(len(tokens) - n + 1):
+            gram = (tokens[i] if n == 1 else " ".join(tokens[i : i + n])).encode(
+                "utf-8"
+            )
+            # dois crc32 com sementes diferentes formam um hash estável de 64 bits
+            hashed = zlib.crc32(gram) | (zlib.crc32(gram, HIGH_HASH_SEED) << 32)
+            counts[hashed] = counts.get(hashed, 0) + 1
+
+    if not counts:
+        return 0
+
+    hashes = np.fromiter(counts.keys(), dtype=np.uint64, count=len(counts))
+    weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+    bits = ((hashes[:, None] >> BIT_SHIFTS) & np.uint64(1)).astype(np.float64)
+    votes = weights @ (2.0 * bits - 1.0)
+
+    fingerprint = 0
+    for bit in np.flatnonzero(votes > 0):
+        fingerprint |= 1 << int(bit)
+    return fingerprint
+
+
+class NearDuplicateIndex:
+    """
+    Índice de resultados recentes por similaridade SimHash.
+
+    A similaridade é 1 - distância de Hamming / 64; ``threshold`` define a
+    distância máxima aceita (k). A impressão é dividida em k + 1 faixas de
+    bits: duas impressões a até k bits de distância coincidem em pelo menos
+    uma faixa, então a busca só compara os candidatos dessas faixas.
+
+    A memória é limitada: no máximo ``max_entries`` impressões, com
+    remoção da menos usada (LRU) e expiração após ``ttl_seconds``.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.875,
+        max_entries: int = 10000,
+        ttl_seconds: float = 3600,
+        min_tokens: int = 8,
+        enabled: bool = True,
+    ):
+        self.threshold = threshold
+        self.max_distance = max(0, int((1.0 - threshold) * FINGERPRINT_BITS))
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.enabled = enabled
+        self._bands = self._band_masks(self.max_distance + 1)
+        self._entries: "OrderedDict[int, Tuple[float, Any]]" = OrderedDict()
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in self._bands]
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _band_masks(count: int) -> List[Tuple[int, int]]:
+        """(deslocamento, máscara) de cada faixa, cobrindo os 64 bits"""
+        count = min(count, FINGERPRINT_BITS)
+        bands, start = [], 0
+        for band in range(count):
+            width = FINGERPRINT_BITS // count + (
+                1 if band < FINGERPRINT_BITS % count else 0
+            )
+            bands.append((start, (1 << width) - 1))
+            start += width
+        return bands
+
+    def fingerprint(self, tokens: Sequence[str]) -> Optional[int]:
+        """SimHash dos tokens, ou None se o texto for curto demais para comparar"""
+        if not self.enabled or len(tokens) < self.min_tokens:
+            return None
+        return simhash(tokens)
+
+    def lookup(self, fingerprint: Optional[int]) -> Optional[Tuple[float, Any]]:
+        """
+        (similaridade, valor) do vizinho mais próximo dentro do limiar que
+        ainda não expirou; os candidatos expirados encontrados são removidos
+        """
+        if fingerprint is None:
+            return None
+
+        now = time.time()
+        with self._lock:
+            candidates: Set[int] = set()
+            for (shift, mask), buckets in zip(self._bands, self._buckets):
+                candidates.update(buckets.get((fingerprint >> shift) & mask, ()))
+
+            best, best_distance = None, self.max_distance + 1
+            for candidate in candidates:
+                distance = (candidate ^ fingerprint).bit_count()
+                if distance > self.max_distance:
+                    continue
+                if self._entries[candidate][0] <= now:
+                    self._remove(candidate)
+                elif distance < best_distance:
+                    best, best_distance = candidate, distance
+
+            if best is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(best)
+            self._hits += 1
+            return 1.0 - best_distance / FINGERPRINT_BITS, self._entries[best][1]
+
+    def add(self, fingerprint: Optional[int], value: Any) -> None:
+        if fingerprint is None:
+            return
+
+        with self._lock:
+            if fingerprint in self._entries:
+                self._entries.move_to_end(fingerprint)
+            else:
+                for (shift, mask), buckets in zip(self._bands, self._buckets):
+                    buckets.setdefault((fingerprint >> shift) & mask, set()).add(
+                        fingerprint
+                    )
+            self._entries[fingerprint] = (time.time() + self.ttl_seconds, value)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "max_distance_bits": self.max_distance,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, fingerprint: int) -> None:
+        del self._entries[fingerprint]
+        for (shift, mask), buckets in zip(self._bands, self._buckets):
+            key = (fingerprint >> shift) & mask
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(fingerprint)
+                if not bucket:
+                    del buckets[key]
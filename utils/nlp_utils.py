@@ -1,14 +1,18 @@
 import os
 import logging
+import tempfile
 from werkzeug.datastructures import FileStorage
-from io import BytesIO
-import pdfplumber
 import re
 import nltk
+from functools import lru_cache
+from typing import BinaryIO, Callable, Iterable, Optional
 from nltk.stem import PorterStemmer
 from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from config import Config
+from .pdf_extractor import extract_pdf_text
+from .mime_extractor import parse_email
+from .nltk_data import NLTK_RESOURCES
 
 logger = logging.getLogger(__name__)
 config = Config()
@@ -19,22 +23,55 @@ URL_PATTERN = r"https?://\S+|www\.\S+"
 PHONE_PATTERN = r"\(\d{2}\)\s*\d{4,5}-?\d{4}"
 CPF_PATTERN = r"\b\d{2,3}\.\d{3}\.\d{3}-?\d{2}\b"
 PUNCTUATION_PATTERN = r"[^\w\sáàâãéèêíìîóòôõúùûç]"
-NUMBERS_PATTERN = r"\b\d+\b"
-WHITESPACE_PATTERN = r"\s+"
+FAST_TOKEN_PATTERN = r"\w+"
 
 MIN_TOKEN_LENGTH = config.MIN_TOKEN_LENGTH
 MIN_TEXT_LENGTH = config.MIN_TEXT_LENGTH
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 stemmer = PorterStemmer()
 
+if config.NLTK_DATA_DIR not in nltk.data.path:
+    nltk.data.path.insert(0, config.NLTK_DATA_DIR)
+
+
+def _ensure_nltk_resource(name: str, path: str) -> bool:
+    """
+    Verifica se o recurso NLTK já existe localmente e só faz o download
+    quando ele está ausente e o modo offline (NLTK_OFFLINE) está desligado
+    """
+    try:
+        nltk.data.find(path)
+        return True
+    except LookupError:
+        pass
+
+    if config.NLTK_OFFLINE:
+        logger.warning(
+            f"Recurso NLTK '{name}' não encontrado em {config.NLTK_DATA_DIR} "
+            "(modo offline; baixe com python -m utils.nltk_data)"
+        )
+        return False
+
+    if not nltk.download(name, quiet=True):
+        return False
+
+    try:
+        nltk.data.find(path)
+        return True
+    except LookupError:
+        return False
+
+
+PUNKT_AVAILABLE = _ensure_nltk_resource("punkt", NLTK_RESOURCES["punkt"])
+
 try:
-    nltk.download("punkt", quiet=True)
-    nltk.download("stopwords", quiet=True)
-    nltk.download("wordnet", quiet=True)
+    if not _ensure_nltk_resource("stopwords", NLTK_RESOURCES["stopwords"]):
+        raise LookupError("stopwords indisponível")
 
     stop_words: set[str] = set(stopwords.words("portuguese"))
 except Exception as e:
-    logger.warning(f"Erro ao baixar dados NLTK: {e}")
+    logger.warning(f"Erro ao carregar dados NLTK: {e}")
     stop_words: set[str] = {
         "de",
         "da",
@@ -118,34 +155,278 @@ def extract_text_from_file(file: FileStorage) -> str:
     """
     Lê o conteúdo de um arquivo enviado pelo formulário
     e retorna o texto como string.
-    Suporta .txt e .pdf
+    Suporta .txt, .pdf e .eml
     """
-    email_text = ""
+    filename_extension = _upload_extension(file)
+
+    if filename_extension == ".eml":
+        return _extract_eml(file.stream)
+
+    if filename_extension == ".pdf":
+        path = _spool_upload(file, suffix=".pdf")
+        try:
+            return _extract_pdf(path)
+        finally:
+            os.unlink(path)
+
+    content = file.read(config.UPLOAD_MAX_BYTES + 1)
+    if len(content) > config.UPLOAD_MAX_BYTES:
+        raise ValueError(_size_limit_message())
+    return _decode_text(content)
+
 
+def spool_upload(file: FileStorage) -> str:
+    """
+    Valida a extensão e copia o upload para um arquivo temporário, para
+    extração posterior com extract_text_from_spooled_file (ex.: em um job).
+    Quem chama é responsável por remover o arquivo.
+    """
+    return _spool_upload(file, suffix=_upload_extension(file))
+
+
+def extract_text_from_spooled_file(path: str) -> str:
+    """Extrai o texto de um upload gravado por spool_upload"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".pdf":
+        return _extract_pdf(path)
+    if extension == ".eml":
+        with open(path, "rb") as f:
+            return _extract_eml(f)
+
+    with open(path, "rb") as f:
+        return _decode_text(f.read())
+
+
+def _upload_extension(file: FileStorage) -> str:
     _, filename_extension = os.path.splitext(str(file.filename))
+    filename_extension = filename_extension.lower()
 
-    if not filename_extension or filename_extension.lower() not in ALLOWED_EXTENSIONS:
-        raise ValueError("Formato de arquivo não suportado. Use .txt ou .pdf")
+    if not filename_extension or filename_extension not in ALLOWED_EXTENSIONS:
+        raise ValueError("Formato de arquivo não suportado. Use .txt, .pdf ou .eml")
 
-    if filename_extension == ".pdf":
+    return filename_extension
+
+
+def _extract_pdf(path: str) -> str:
+    try:
+        return extract_pdf_text(path)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Erro ao ler o PDF: {e}")
+
+
+def _extract_eml(stream: BinaryIO) -> str:
+    """
+    Lê a mensagem em fluxo: anexos não são decodificados nem mantidos em
+    memória, e só o corpo de texto conta para o limite de decodificação
+    """
+    parsed = parse_email(stream, config.UPLOAD_MAX_BYTES, config.EML_MAX_BODY_BYTES)
+    if parsed.truncated and not parsed.body:
+        raise ValueError(_size_limit_message())
+    return parsed.text
+
+
+def _decode_text(content: bytes) -> str:
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
         try:
-            with pdfplumber.open(BytesIO(file.read())) as pdf:
-                for page in pdf.pages:
-                    email_text += page.extract_text() or " "
+            return content.decode("latin-1")
+        except UnicodeDecodeError:
+            return content.decode("utf-8", errors="ignore")
+
+
+def _spool_upload(file: FileStorage, suffix: str) -> str:
+    """
+    Copia o upload para um arquivo temporário em blocos, sem manter
+    o conteúdo inteiro em memória, respeitando o limite de tamanho
+    """
+    written = 0
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as spooled:
+        try:
+            while chunk := file.stream.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > config.UPLOAD_MAX_BYTES:
+                    raise ValueError(_size_limit_message())
+                spooled.write(chunk)
+        except BaseException:
+            spooled.close()
+            os.unlink(spooled.name)
+            raise
+
+    return spooled.name
+
+
+def _size_limit_message() -> str:
+    return (
+        f"Arquivo excede o limite de {config.UPLOAD_MAX_BYTES / (1024 * 1024):.1f} MB"
+    )
+
+
+IMPORTANT_WORDS: set[str] = {
+    "não",
+    "sim",
+    "só",
+    "mais",
+    "menos",
+    "muito",
+    "pouco",
+    "bom",
+    "boa",
+    "bem",
+    "mal",
+    "melhor",
+    "pior",
+    "dados",
+    "conta",
+    "caso",
+    "ajuda",
+    "como",
+    "tudo",
+    "valor",
+    "dinheiro",
+    "pagamento",
+    "saldo",
+    "extrato",
+    "cartão",
+    "banco",
+    "cliente",
+    "serviço",
+    "produto",
+    "investimento",
+    "aplicação",
+    "rendimento",
+    "taxa",
+    "juros",
+    "prazo",
+    "vencimento",
+    "boleto",
+    "transferência",
+    "depósito",
+    "saque",
+    "crédito",
+    "débito",
+    "financiamento",
+    "empréstimo",
+    "seguro",
+    "apólice",
+    "prêmio",
+    "sinistro",
+    "cobertura",
+    "beneficiário",
+}
+
+
+class TextPreprocessor:
+    """
+    Pipeline de pré-processamento reutilizável.
+
+    Compila os padrões uma única vez, remove e-mails, URLs, telefones e
+    CPFs (nessa ordem, como a versão original: cada remoção delimita a
+    seguinte) e guarda em um LRU limitado o resultado de
+    cada token (filtro de stop words + stemming). O tokenizador pode ser o
+    word_tokenize do NLTK ou um tokenizador rápido baseado em regex.
+
+    Sem os dados do punkt (e sem ``fast_tokenizer``), mantém o resultado da
+    versão original, que caía no tratamento de erro do word_tokenize: as
+    palavras filtradas, sem stemming.
+    """
+
+    def __init__(
+        self,
+        stop_words: set[str],
+        important_words: set[str] = IMPORTANT_WORDS,
+        fast_tokenizer: bool = False,
+        stem_cache_size: int = 50000,
+    ):
+        self.stop_words_filtered = frozenset(stop_words - important_words)
+        self.entity_patterns = [
+            re.compile(pattern)
+            for pattern in (EMAIL_PATTERN, URL_PATTERN, PHONE_PATTERN, CPF_PATTERN)
+        ]
+        self.punctuation_pattern = re.compile(PUNCTUATION_PATTERN)
+        self.fast_token_pattern = re.compile(FAST_TOKEN_PATTERN)
+        self.tokenize: Callable[[str], list[str]] = (
+            self.fast_token_pattern.findall
+            if fast_tokenizer or not PUNKT_AVAILABLE
+            else word_tokenize
+        )
+        self.stemming = fast_tokenizer or PUNKT_AVAILABLE
+        self.process_token = lru_cache(maxsize=stem_cache_size)(self._process_token)
+
+    def preprocess(self, email_text: str) -> list[str]:
+        """
+        Pré-processa texto removendo pontuações, números, e-mails e stop words.
+        Também aplica stemming. Mantém palavras importantes para o significado do texto.
+        """
+        if not email_text or not email_text.strip():
+            return []
+
+        if len(email_text.strip()) < MIN_TEXT_LENGTH:
+            return []
+
+        email_text = self._clean(email_text)
+
+        try:
+            processed_tokens: list[str] = []
+            process_token = self.process_token
+            for token in self.tokenize(email_text):
+                processed = process_token(token)
+                if processed:
+                    processed_tokens.append(processed)
+
+            return processed_tokens
+
         except Exception as e:
-            raise ValueError(f"Erro ao ler o PDF: {e}")
-    elif filename_extension == ".txt":
+            logger.error(f"Erro no processamento NLTK: {e}")
+            return [
+                word
+                for word in email_text.split()
+                if len(word) > MIN_TOKEN_LENGTH
+                and not word.isdecimal()
+                and word not in self.stop_words_filtered
+            ]
+
+    def preprocess_batch(self, texts: Iterable[str]) -> list[list[str]]:
+        """Pré-processa vários textos reaproveitando padrões e cache de tokens"""
+        preprocess = self.preprocess
+        return [preprocess(text) for text in texts]
+
+    def _clean(self, email_text: str) -> str:
+        email_text = email_text.lower().strip()
+        for pattern in self.entity_patterns:
+            email_text = pattern.sub(" ", email_text)
+        return self.punctuation_pattern.sub("", email_text)
+
+    def _process_token(self, token: str) -> Optional[str]:
+        """
+        Filtra e aplica stemming a um token. Tokens só com dígitos são
+        descartados aqui, equivalente à remoção de números por regex.
+        """
+        if (
+            len(token) <= MIN_TOKEN_LENGTH
+            or token.isdecimal()
+            or token in self.stop_words_filtered
+        ):
+            return None
+
+        if not self.stemming:
+            return token
+
         try:
-            email_text = file.read().decode("utf-8")
-        except UnicodeDecodeError:
-            try:
-                file.seek(0)
-                email_text = file.read().decode("latin-1")
-            except UnicodeDecodeError:
-                file.seek(0)
-                email_text = file.read().decode("utf-8", errors="ignore")
+            stemmed = str(stemmer.stem(token))
+        except Exception:
+            return token
+
+        return stemmed if len(stemmed) > MIN_TOKEN_LENGTH else None
+
 
-    return email_text
+preprocessor = TextPreprocessor(
+    stop_words,
+    fast_tokenizer=config.PREPROCESS_FAST_TOKENIZER,
+    stem_cache_size=config.PREPROCESS_STEM_CACHE_SIZE,
+)
 
 
 def preprocess_text(email_text: str) -> list[str]:
@@ -153,103 +434,9 @@ def preprocess_text(email_text: str) -> list[str]:
     Pré-processa texto removendo pontuações, números, e-mails e stop words.
     Também aplica stemming. Mantém palavras importantes para o significado do texto.
     """
-    if not email_text or not email_text.strip():
-        return []
-
-    if len(email_text.strip()) < MIN_TEXT_LENGTH:
-        return []
-
-    email_text = email_text.lower().strip()
-
-    email_text = re.sub(EMAIL_PATTERN, " ", email_text)
-    email_text = re.sub(URL_PATTERN, " ", email_text)
-
-    email_text = re.sub(PHONE_PATTERN, " ", email_text)
-    email_text = re.sub(CPF_PATTERN, " ", email_text)
-
-    email_text = re.sub(PUNCTUATION_PATTERN, "", email_text)
-    email_text = re.sub(NUMBERS_PATTERN, "", email_text)
-    email_text = re.sub(WHITESPACE_PATTERN, " ", email_text).strip()
-
-    important_words = {
-        "não",
-        "sim",
-        "só",
-        "mais",
-        "menos",
-        "muito",
-        "pouco",
-        "bom",
-        "boa",
-        "bem",
-        "mal",
-        "melhor",
-        "pior",
-        "dados",
-        "conta",
-        "caso",
-        "ajuda",
-        "como",
-        "tudo",
-        "valor",
-        "dinheiro",
-        "pagamento",
-        "saldo",
-        "extrato",
-        "cartão",
-        "banco",
-        "cliente",
-        "serviço",
-        "produto",
-        "investimento",
-        "aplicação",
-        "rendimento",
-        "taxa",
-        "juros",
-        "prazo",
-        "vencimento",
-        "boleto",
-        "transferência",
-        "depósito",
-        "saque",
-        "crédito",
-        "débito",
-        "financiamento",
-        "empréstimo",
-        "seguro",
-        "apólice",
-        "prêmio",
-        "sinistro",
-        "cobertura",
-        "beneficiário",
-    }
+    return preprocessor.preprocess(email_text)
 
-    stop_words_filtered = stop_words - important_words
 
-    try:
-        tokens = word_tokenize(email_text)
-        processed_tokens: list[str] = []
-
-        for token in tokens:
-            if (
-                token.strip()
-                and len(token) > MIN_TOKEN_LENGTH
-                and token not in stop_words_filtered
-            ):
-                try:
-                    stemmed: str = str(stemmer.stem(token))
-                    if stemmed and len(stemmed) > MIN_TOKEN_LENGTH:
-                        processed_tokens.append(stemmed)
-                except Exception:
-                    processed_tokens.append(token)
-
-        return processed_tokens
-
-    except Exception as e:
-        logger.error(f"Erro no processamento NLTK: {e}")
-        words = email_text.split()
-        return [
-            word
-            for word in words
-            if word and len(word) > MIN_TOKEN_LENGTH and word not in stop_words_filtered
-        ]
+def preprocess_batch(texts: Iterable[str]) -> list[list[str]]:
+    """Pré-processa uma lista de textos com o mesmo pipeline compilado"""
+    return preprocessor.preprocess_batch(texts)
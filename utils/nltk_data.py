@@ -0,0 +1,56 @@
+"""
+Baixa os dados do NLTK usados pela aplicação para NLTK_DATA_DIR.
+
+    python -m utils.nltk_data
+    python -m utils.nltk_data --dir /caminho/nltk_data
+
+Roda no build (``bin/post_compile`` no Heroku) ou uma vez no ambiente de
+desenvolvimento; em execução, com NLTK_OFFLINE=True (padrão), a aplicação
+só lê esse diretório e nunca tenta baixar nada.
+"""
+
+import sys
+import argparse
+from typing import Optional, Sequence
+
+NLTK_RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "stopwords": "corpora/stopwords",
+}
+
+
+def fetch(data_dir: str) -> bool:
+    """Baixa os recursos ausentes em ``data_dir``; True se todos estão lá"""
+    import nltk
+
+    if data_dir not in nltk.data.path:
+        nltk.data.path.insert(0, data_dir)
+
+    available = True
+    for name, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path, paths=[data_dir])
+            print(f"{name}: já presente em {data_dir}")
+            continue
+        except LookupError:
+            pass
+
+        if nltk.download(name, download_dir=data_dir, quiet=True):
+            print(f"{name}: baixado para {data_dir}")
+        else:
+            print(f"{name}: falha no download", file=sys.stderr)
+            available = False
+    return available
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Baixa os dados do NLTK")
+    parser.add_argument("--dir", default=Config.NLTK_DATA_DIR, help="destino")
+    args = parser.parse_args(argv)
+    return 0 if fetch(args.dir) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
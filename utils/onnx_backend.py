@@ -0,0 +1,213 @@
+import os
+import json
+import shutil
+import logging
+import threading
+import importlib.util
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+ONNX_AVAILABLE = (
+    importlib.util.find_spec("onnxruntime") is not None
+    and importlib.util.find_spec("tokenizers") is not None
+)
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILENAME = "model.int8.onnx"
+FP32_MODEL_FILENAME = "model.onnx"
+MAX_SEQUENCE_LENGTH = 512
+ONNX_OPSET = 17
+
+
+def model_directory(base_dir: str, model_name: str) -> str:
+    """Diretório do modelo exportado, um por modelo configurado"""
+    return os.path.join(base_dir, model_name.strip("/").replace("/", "--"))
+
+
+def export_quantized_model(model_name: str, output_dir: str) -> str:
+    """
+    Exporta o modelo de classificação para ONNX e aplica quantização
+    dinâmica int8. Só esta etapa precisa de torch e transformers; a
+    inferência usa apenas onnxruntime, tokenizers e numpy.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["exemplo de email"], return_tensors="pt")
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    fp32_path = os.path.join(output_dir, FP32_MODEL_FILENAME)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dict(sample),),
+            fp32_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+            dynamo=False,
+        )
+
+    model_path = os.path.join(output_dir, MODEL_FILENAME)
+    quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+    os.unlink(fp32_path)
+
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+    logger.info(f"Modelo {model_name} exportado para ONNX int8 em {output_dir}")
+    return model_path
+
+
+class OnnxSequenceClassifier:
+    """
+    Classificador de texto sobre ONNX Runtime com a mesma interface usada do
+    pipeline "sentiment-analysis" do transformers: recebe um texto ou uma
+    lista e devolve ``{"label", "score"}`` do rótulo mais provável. Os
+    textos são sempre truncados no comprimento máximo do modelo.
+
+    A sessão é criada por processo (após um fork, os threads internos do
+    ONNX Runtime não existem no filho), com número fixo de threads intra-op.
+    """
+
+    def __init__(self, model_dir: str, intra_op_threads: int = 1):
+        self.model_dir = model_dir
+        self.model_path = os.path.join(model_dir, MODEL_FILENAME)
+        self.intra_op_threads = intra_op_threads
+        model_config = self._read_json("config.json")
+        self.id2label = {int(i): label for i, label in model_config["id2label"].items()}
+        self.max_length = min(
+            MAX_SEQUENCE_LENGTH,
+            model_config.get("max_position_embeddings", MAX_SEQUENCE_LENGTH),
+        )
+        self.tokenizer = self._load_tokenizer()
+        self._session = None
+        self._session_pid: Optional[int] = None
+        self._input_names: List[str] = []
+        self._session_lock = threading.Lock()
+
+    def _read_json(self, filename: str) -> Dict[str, Any]:
+        with open(os.path.join(self.model_dir, filename), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load_tokenizer(self) -> Any:
+        """
+        Carrega o tokenizer.json salvo na exportação direto pela biblioteca
+        tokenizers, sem importar transformers (que carregaria o torch)
+        """
+        from tokenizers import Tokenizer
+
+        tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+        tokenizer_config = self._read_json("tokenizer_config.json")
+
+        model_max_length = tokenizer_config.get("model_max_length")
+        if isinstance(model_max_length, int) and model_max_length > 0:
+            self.max_length = min(self.max_length, model_max_length)
+
+        pad_token = tokenizer_config.get("pad_token") or "[PAD]"
+        if isinstance(pad_token, dict):
+            pad_token = pad_token["content"]
+        pad_id = tokenizer.token_to_id(pad_token)
+        tokenizer.enable_padding(pad_id=pad_id or 0, pad_token=pad_token)
+        # sempre trunca: o modelo não aceita sequências além de max_length
+        tokenizer.enable_truncation(max_length=self.max_length)
+        return tokenizer
+
+    def _get_session(self) -> Any:
+        pid = os.getpid()
+        if self._session is not None and self._session_pid == pid:
+            return self._session
+
+        with self._session_lock:
+            if self._session is None or self._session_pid != pid:
+                import onnxruntime
+
+                options = onnxruntime.SessionOptions()
+                options.intra_op_num_threads = self.intra_op_threads
+                options.inter_op_num_threads = 1
+                options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+                options.graph_optimization_level = (
+                    onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+                )
+                session = onnxruntime.InferenceSession(
+                    self.model_path,
+                    sess_options=options,
+                    providers=["CPUExecutionProvider"],
+                )
+                self._input_names = [i.name for i in session.get_inputs()]
+                self._session, self._session_pid = session, pid
+
+        return self._session
+
+    def __call__(
+        self,
+        texts: Union[str, List[str]],
+        batch_size: Optional[int] = None,
+        truncation: bool = True,
+    ) -> List[Dict[str, Any]]:
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        batch_size = batch_size or len(batch)
+
+        outputs: List[Dict[str, Any]] = []
+        for start in range(0, len(batch), batch_size):
+            outputs.extend(self._predict(batch[start : start + batch_size]))
+        return outputs
+
+    def _predict(self, texts: List[str]) -> List[Dict[str, Any]]:
+        session = self._get_session()
+        encodings = self.tokenizer.encode_batch(texts)
+        encoded = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array(
+                [e.attention_mask for e in encodings], dtype=np.int64
+            ),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        feeds = {name: encoded[name] for name in self._input_names if name in encoded}
+        logits = session.run(["logits"], feeds)[0]
+
+        shifted = logits - logits.max(axis=-1, keepdims=True)
+        probabilities = np.exp(shifted)
+        probabilities /= probabilities.sum(axis=-1, keepdims=True)
+
+        best = probabilities.argmax(axis=-1)
+        return [
+            {"label": self.id2label[int(i)], "score": float(probabilities[row, i])}
+            for row, i in enumerate(best)
+        ]
+
+
+def load_onnx_classifier(
+    model_name: str, base_dir: str, intra_op_threads: int
+) -> OnnxSequenceClassifier:
+    """
+    Carrega o modelo ONNX int8 do diretório de cache, exportando-o na
+    primeira vez (requer torch apenas nessa exportação)
+    """
+    output_dir = model_directory(base_dir, model_name)
+    if not os.path.exists(os.path.join(output_dir, MODEL_FILENAME)):
+        logger.info(f"Exportando {model_name} para ONNX (execução única)")
+        # exporta em um diretório temporário e renomeia, para que workers
+        # exportando ao mesmo tempo nunca vejam um modelo incompleto
+        staging_dir = f"{output_dir}.tmp-{os.getpid()}"
+        try:
+            export_quantized_model(model_name, staging_dir)
+            os.replace(staging_dir, output_dir)
+        except OSError:
+            if not os.path.exists(os.path.join(output_dir, MODEL_FILENAME)):
+                raise
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    return OnnxSequenceClassifier(output_dir, intra_op_threads)
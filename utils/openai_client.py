@@ -1,16 +1,33 @@
+import re
+import json
+import time
+import asyncio
 import openai
+import httpx
 import logging
-from typing import Dict, Optional, Any
+from typing import Dict, Iterator, Optional, Any
 from config import Config
+from .result_cache import result_cache
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from . import metrics
 
 logger = logging.getLogger(__name__)
+PROMPT_VERSION = "2"
 CONFIDENCE_HIGH = 0.9
 CONFIDENCE_LOW = 0.6
+REQUEST_ERRORS = (
+    openai.BadRequestError,
+    openai.NotFoundError,
+    openai.UnprocessableEntityError,
+    openai.ConflictError,
+)
+CATEGORY_PATTERN = re.compile(r"\b(improdutivo|produtivo)\b")
 
 SYSTEM_PROMPT_CLASSIFICATION = "Você é um especialista em classificação de emails corporativos. Seja preciso e conciso."
 SYSTEM_PROMPT_RESPONSE = (
     "Você é um assistente corporativo. Seja conciso e profissional."
 )
+SYSTEM_PROMPT_STRUCTURED = "Você é um especialista em classificação de emails corporativos e um assistente corporativo. Responda apenas com JSON válido."
 
 CLASSIFICATION_PROMPT = """Classifique este email como PRODUTIVO ou IMPRODUTIVO:
 
@@ -30,6 +47,13 @@ Email: {email_text}
 
 Responda de forma breve e profissional."""
 
+STRUCTURED_PROMPT = """Classifique este email como PRODUTIVO ou IMPRODUTIVO e gere uma resposta para ele:
+
+Email: {email_text}
+
+Responda apenas com um objeto JSON no formato:
+{{"categoria": "PRODUTIVO" ou "IMPRODUTIVO", "confianca": número entre 0 e 1, "justificativa": "motivo em uma frase", "resposta": "resposta concisa e profissional ao email"}}"""
+
 
 class OpenAIClient:
     """
@@ -38,77 +62,237 @@ class OpenAIClient:
 
     def __init__(self):
         self.client = None
+        self.async_client = None
         self.config = Config()
+        self.breaker = CircuitBreaker(
+            "openai",
+            failure_threshold=self.config.OPENAI_BREAKER_FAILURE_THRESHOLD,
+            open_seconds=self.config.OPENAI_BREAKER_OPEN_SECONDS,
+            max_open_seconds=self.config.OPENAI_BREAKER_MAX_OPEN_SECONDS,
+        )
+        # respostas de servidores alternativos (ex.: o servidor local de
+        # testes) não se misturam no cache com as da API oficial
+        base_url = self.config.OPENAI_BASE_URL or None
+        self.cache_scope = (
+            f"{self.config.OPENAI_MODEL}@{base_url}"
+            if base_url
+            else self.config.OPENAI_MODEL
+        )
 
         if self.config.OPENAI_API_KEY:
             try:
-                self.client = openai.OpenAI(api_key=self.config.OPENAI_API_KEY)
+                limits = httpx.Limits(
+                    max_connections=self.config.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=self.config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                )
+                # sem novas tentativas no SDK: o disjuntor e a cascata decidem
+                # o que fazer com 429, quota esgotada e timeouts
+                self.client = openai.OpenAI(
+                    api_key=self.config.OPENAI_API_KEY,
+                    base_url=base_url,
+                    max_retries=0,
+                    http_client=openai.DefaultHttpxClient(limits=limits),
+                )
+                if self.config.OPENAI_ASYNC_ENABLED:
+                    self.async_client = openai.AsyncOpenAI(
+                        api_key=self.config.OPENAI_API_KEY,
+                        base_url=base_url,
+                        max_retries=0,
+                        http_client=openai.DefaultAsyncHttpxClient(limits=limits),
+                    )
                 logger.info("Cliente OpenAI inicializado com sucesso!")
             except Exception as e:
                 logger.error(f"Erro ao inicializar cliente OpenAI: {e}")
                 self.client = None
+                self.async_client = None
         else:
             logger.warning(
                 "Chave da API OpenAI não encontrada. Usando classificação baseada em regras."
             )
 
-    def classify_email(self, email_text: str) -> Optional[Dict[str, Any]]:
+    def classify_email(
+        self, email_text: str, timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Classifica um email usando a API da OpenAI
         """
-        if not self.client:
+        if not self.client or not self._is_valid_for_classification(email_text):
             return None
 
+        return result_cache.get_or_compute(
+            self._classification_cache_key(email_text),
+            lambda: self._request_classification(email_text, timeout),
+        )
+
+    async def classify_email_async(
+        self, email_text: str, timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Versão assíncrona de classify_email, usando o pool de conexões do AsyncOpenAI
+        """
+        if not self.async_client or not self._is_valid_for_classification(email_text):
+            return None
+
+        cache_key = self._classification_cache_key(email_text)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self._create_completion_async(
+                self._classification_request(email_text, timeout)
+            )
+            result = self._parse_completion(response)
+        except Exception as e:
+            self._log_api_error(e, "classificação", "classificação baseada em regras")
+            return None
+
+        result_cache.set(cache_key, result)
+        return result
+
+    def _is_valid_for_classification(self, email_text: str) -> bool:
         if not email_text or not email_text.strip():
             logger.warning("Texto do email vazio para classificação")
-            return None
+            return False
 
         if len(email_text.strip()) < self.config.MIN_TEXT_LENGTH:
             logger.warning(
                 f"Texto muito curto para classificação: {len(email_text)} caracteres"
             )
-            return None
+            return False
+
+        return True
+
+    def _classification_cache_key(self, email_text: str) -> str:
+        return result_cache.make_key(
+            "openai-classify", self.cache_scope, PROMPT_VERSION, email_text
+        )
 
+    def _classification_request(
+        self, email_text: str, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        return {
+            "model": self.config.OPENAI_MODEL,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT_CLASSIFICATION},
+                {
+                    "role": "user",
+                    "content": CLASSIFICATION_PROMPT.format(email_text=email_text),
+                },
+            ],
+            "max_tokens": self.config.OPENAI_MAX_TOKENS,
+            "temperature": self.config.OPENAI_TEMPERATURE,
+            "timeout": self._timeout(timeout),
+        }
+
+    def _request_classification(
+        self, email_text: str, timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Executa a chamada de classificação na API da OpenAI
+        """
         try:
-            response = self.client.chat.completions.create(
-                model=self.config.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT_CLASSIFICATION},
-                    {
-                        "role": "user",
-                        "content": CLASSIFICATION_PROMPT.format(email_text=email_text),
-                    },
-                ],
-                max_tokens=self.config.OPENAI_MAX_TOKENS,
-                temperature=self.config.OPENAI_TEMPERATURE,
-                timeout=30,
+            response = self._create_completion(
+                self._classification_request(email_text, timeout)
             )
-
-            result_text = response.choices[0].message.content
-            if result_text:
-                return self._parse_classification_response(result_text.strip())
+            return self._parse_completion(response)
+        except Exception as e:
+            self._log_api_error(e, "classificação", "classificação baseada em regras")
             return None
 
-        except openai.RateLimitError as e:
-            logger.error(f"Rate limit excedido na classificação: {e}")
+    def _parse_completion(self, response: Any) -> Optional[Dict[str, Any]]:
+        result_text = response.choices[0].message.content
+        if result_text:
+            return self._parse_classification_response(result_text.strip())
+        return None
+
+    def analyze_structured(
+        self, email_text: str, timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Classifica e gera a resposta em uma única chamada, com saída em JSON
+        """
+        if not self.client or not self._is_valid_for_classification(email_text):
             return None
-        except openai.APIConnectionError as e:
-            logger.error(f"Erro de conexão com OpenAI na classificação: {e}")
+
+        return result_cache.get_or_compute(
+            self._structured_cache_key(email_text),
+            lambda: self._request_structured(email_text, timeout),
+        )
+
+    async def analyze_structured_async(
+        self, email_text: str, timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Versão assíncrona de analyze_structured
+        """
+        if not self.async_client or not self._is_valid_for_classification(email_text):
             return None
-        except openai.APIError as e:
-            if "insufficient_quota" in str(e):
-                logger.error(
-                    f"Quota insuficiente na OpenAI. Desabilitando OpenAI e usando classificação baseada em regras: {e}"
-                )
-            else:
-                logger.error(f"Erro da API OpenAI na classificação: {e}")
+
+        cache_key = self._structured_cache_key(email_text)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self._create_completion_async(
+                self._structured_request(email_text, timeout)
+            )
+            result = self._parse_structured_response(
+                response.choices[0].message.content or ""
+            )
+        except Exception as e:
+            self._log_api_error(e, "análise estruturada", "o fluxo de duas chamadas")
             return None
+
+        result_cache.set(cache_key, result)
+        return result
+
+    def _structured_cache_key(self, email_text: str) -> str:
+        return result_cache.make_key(
+            "openai-structured", self.cache_scope, PROMPT_VERSION, email_text
+        )
+
+    def _structured_request(
+        self, email_text: str, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        return {
+            "model": self.config.OPENAI_MODEL,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT_STRUCTURED},
+                {
+                    "role": "user",
+                    "content": STRUCTURED_PROMPT.format(email_text=email_text),
+                },
+            ],
+            "max_tokens": self.config.OPENAI_MAX_TOKENS * 4,
+            "temperature": self.config.OPENAI_TEMPERATURE,
+            "response_format": {"type": "json_object"},
+            "timeout": self._timeout(timeout),
+        }
+
+    def _request_structured(
+        self, email_text: str, timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Executa a chamada única de classificação + resposta na API da OpenAI
+        """
+        try:
+            response = self._create_completion(
+                self._structured_request(email_text, timeout)
+            )
+            return self._parse_structured_response(
+                response.choices[0].message.content or ""
+            )
         except Exception as e:
-            logger.error(f"Erro inesperado na classificação OpenAI: {e}")
+            self._log_api_error(e, "análise estruturada", "o fluxo de duas chamadas")
             return None
 
     def generate_response(
-        self, email_text: str, classification: Dict[str, Any]
+        self,
+        email_text: str,
+        classification: Dict[str, Any],
+        timeout: Optional[float] = None,
     ) -> Optional[str]:
         """
         Gera uma resposta usando a API da OpenAI
@@ -116,71 +300,367 @@ class OpenAIClient:
         if not self.client:
             return None
 
-        try:
-            category = classification.get("category", "improdutivo")
+        category = classification.get("category", "improdutivo")
+        return result_cache.get_or_compute(
+            self._response_cache_key(email_text, category),
+            lambda: self._request_response(email_text, category, timeout),
+        )
 
-            if category == "produtivo":
-                prompt = RESPONSE_PROMPT_PRODUCTIVE.format(email_text=email_text)
-            else:
-                prompt = RESPONSE_PROMPT_GENERAL.format(email_text=email_text)
-
-            response = self.client.chat.completions.create(
-                model=self.config.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT_RESPONSE},
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=self.config.OPENAI_MAX_TOKENS * 2,
-                temperature=0.5,
-                timeout=30,
+    async def generate_response_async(
+        self,
+        email_text: str,
+        classification: Dict[str, Any],
+        timeout: Optional[float] = None,
+    ) -> Optional[str]:
+        """
+        Versão assíncrona de generate_response, usando o pool de conexões do AsyncOpenAI
+        """
+        if not self.async_client:
+            return None
+
+        category = classification.get("category", "improdutivo")
+        cache_key = self._response_cache_key(email_text, category)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self._create_completion_async(
+                self._response_request(email_text, category, timeout)
             )
+            result_text = response.choices[0].message.content
+            result = result_text.strip() if result_text else None
+        except Exception as e:
+            self._log_api_error(e, "geração de resposta", "templates de resposta")
+            return None
+
+        result_cache.set(cache_key, result)
+        return result
+
+    def stream_response(
+        self,
+        email_text: str,
+        classification: Dict[str, Any],
+        timeout: Optional[float] = None,
+    ) -> Iterator[str]:
+        """
+        Gera a resposta em streaming, produzindo os trechos à medida que
+        chegam da API. Uma resposta em cache sai de uma vez só; a resposta
+        completa é guardada no cache ao final. Erros (inclusive o fim do
+        prazo no meio do stream) são registrados e relançados, para que quem
+        consome descarte o texto parcial.
+        """
+        if not self.client:
+            return
 
+        category = classification.get("category", "improdutivo")
+        cache_key = self._response_cache_key(email_text, category)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        request = {
+            **self._response_request(email_text, category, timeout),
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        deadline = time.monotonic() + request["timeout"]
+        chunks = []
+        try:
+            for delta in self._stream_completion(request, deadline):
+                chunks.append(delta)
+                yield delta
+        except Exception as e:
+            self._log_api_error(e, "geração de resposta", "templates de resposta")
+            raise
+
+        result_text = "".join(chunks).strip()
+        result_cache.set(cache_key, result_text or None)
+
+    def _response_cache_key(self, email_text: str, category: str) -> str:
+        return result_cache.make_key(
+            "openai-response",
+            self.cache_scope,
+            PROMPT_VERSION,
+            category,
+            email_text,
+        )
+
+    def _response_request(
+        self, email_text: str, category: str, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        if category == "produtivo":
+            prompt = RESPONSE_PROMPT_PRODUCTIVE.format(email_text=email_text)
+        else:
+            prompt = RESPONSE_PROMPT_GENERAL.format(email_text=email_text)
+
+        return {
+            "model": self.config.OPENAI_MODEL,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT_RESPONSE},
+                {"role": "user", "content": prompt},
+            ],
+            "max_tokens": self.config.OPENAI_MAX_TOKENS * 2,
+            "temperature": 0.5,
+            "timeout": self._timeout(timeout),
+        }
+
+    def _request_response(
+        self, email_text: str, category: str, timeout: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Executa a chamada de geração de resposta na API da OpenAI
+        """
+        try:
+            response = self._create_completion(
+                self._response_request(email_text, category, timeout)
+            )
             result_text = response.choices[0].message.content
             return result_text.strip() if result_text else None
-
-        except openai.RateLimitError as e:
-            logger.error(f"Rate limit excedido na geração de resposta: {e}")
+        except Exception as e:
+            self._log_api_error(e, "geração de resposta", "templates de resposta")
             return None
-        except openai.APIConnectionError as e:
-            logger.error(f"Erro de conexão com OpenAI na geração de resposta: {e}")
+
+    def _timeout(self, timeout: Optional[float]) -> float:
+        if timeout is None:
+            return self.config.OPENAI_TIMEOUT_SECONDS
+        return max(0.001, min(timeout, self.config.OPENAI_TIMEOUT_SECONDS))
+
+    def _create_completion(self, request: Dict[str, Any]) -> Any:
+        """
+        Executa uma chamada de chat completion passando pelo disjuntor
+        compartilhado entre classificação e geração de resposta
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Circuito OpenAI aberto")
+
+        try:
+            response = self.client.chat.completions.create(**request)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+
+        self.breaker.record_success()
+        metrics.record_openai_usage(request["model"], getattr(response, "usage", None))
+        return response
+
+    def _stream_completion(
+        self, request: Dict[str, Any], deadline: float
+    ) -> Iterator[str]:
+        """
+        Versão em streaming de _create_completion: produz o conteúdo de cada
+        trecho e só conta sucesso no disjuntor quando o stream termina
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Circuito OpenAI aberto")
+
+        try:
+            stream = self.client.chat.completions.create(**request)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+
+        usage = None
+        try:
+            with stream:
+                for chunk in stream:
+                    if chunk.usage:
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+                    if time.monotonic() > deadline:
+                        raise TimeoutError("Prazo da geração em streaming excedido")
+        except GeneratorExit:
+            # o consumidor desistiu (ex.: cliente desconectou)
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self._record_failure(e)
+            raise
+
+        self.breaker.record_success()
+        metrics.record_openai_usage(request["model"], usage)
+
+    async def _create_completion_async(self, request: Dict[str, Any]) -> Any:
+        """
+        Versão assíncrona de _create_completion, com o mesmo disjuntor
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Circuito OpenAI aberto")
+
+        try:
+            response = await self.async_client.chat.completions.create(**request)
+        except BaseException as e:
+            self._record_failure(e)
+            raise
+
+        self.breaker.record_success()
+        metrics.record_openai_usage(request["model"], getattr(response, "usage", None))
+        return response
+
+    def _record_failure(self, error: BaseException) -> None:
+        """
+        Alimenta o disjuntor: quota esgotada e rate limit abrem o circuito
+        imediatamente; erros da própria requisição (4xx) não dizem nada
+        sobre a saúde do serviço e só liberam a reserva
+        """
+        if "insufficient_quota" in str(error):
+            self.breaker.record_failure(
+                "insufficient_quota",
+                open_immediately=True,
+                open_seconds=self.config.OPENAI_BREAKER_QUOTA_OPEN_SECONDS,
+            )
+        elif isinstance(error, openai.RateLimitError):
+            self.breaker.record_failure(
+                "rate_limit",
+                open_immediately=True,
+                open_seconds=self._retry_after_seconds(error),
+            )
+        elif isinstance(error, (REQUEST_ERRORS, asyncio.CancelledError)):
+            self.breaker.release()
+        else:
+            self.breaker.record_failure(type(error).__name__)
+
+    def record_timeout(self) -> None:
+        """
+        Conta como falha uma chamada assíncrona cancelada por ter esgotado a
+        fatia do orçamento (o cancelamento em si só libera a reserva)
+        """
+        self.breaker.record_failure("timeout")
+
+    def _retry_after_seconds(self, error: openai.APIStatusError) -> Optional[float]:
+        try:
+            return float(error.response.headers.get("retry-after"))
+        except (AttributeError, TypeError, ValueError):
             return None
-        except openai.APIError as e:
-            if "insufficient_quota" in str(e):
+
+    def _log_api_error(self, error: Exception, stage: str, fallback: str) -> None:
+        """
+        Registra erros da API com a mesma distinção usada em todas as chamadas
+        """
+        metrics.record_error("openai", error)
+        if isinstance(error, CircuitOpenError):
+            logger.info(f"Circuito OpenAI aberto; {stage} usando {fallback}")
+        elif isinstance(error, openai.RateLimitError):
+            logger.error(f"Rate limit excedido na {stage}: {error}")
+        elif isinstance(error, openai.APIConnectionError):
+            logger.error(f"Erro de conexão com OpenAI na {stage}: {error}")
+        elif isinstance(error, openai.APIError):
+            if "insufficient_quota" in str(error):
                 logger.error(
-                    f"Quota insuficiente na OpenAI. Desabilitando OpenAI e usando templates de resposta: {e}"
+                    f"Quota insuficiente na OpenAI. Desabilitando OpenAI e usando {fallback}: {error}"
                 )
             else:
-                logger.error(f"Erro da API OpenAI na geração de resposta: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Erro inesperado na geração de resposta OpenAI: {e}")
-            return None
+                logger.error(f"Erro da API OpenAI na {stage}: {error}")
+        else:
+            logger.error(f"Erro inesperado na {stage} OpenAI: {error}")
 
     def _parse_classification_response(self, response_text: str) -> Dict[str, Any]:
         """
-        Processa a resposta da OpenAI de forma simplificada
+        Processa a resposta de classificação, aceitando JSON ou texto livre
         """
-        text = response_text.lower().strip()
+        data = self._load_json_object(response_text)
+        if data:
+            category = self._parse_category(
+                str(data.get("categoria", data.get("category", "")))
+            )
+        else:
+            category = self._parse_category(response_text)
 
-        if "produtivo" in text:
-            return {
-                "category": "produtivo",
-                "confidence": CONFIDENCE_HIGH,
-                "reasoning": f"Classificação: {response_text}",
-            }
-        elif "improdutivo" in text:
+        if category:
             return {
-                "category": "improdutivo",
+                "category": category,
                 "confidence": CONFIDENCE_HIGH,
                 "reasoning": f"Classificação: {response_text}",
             }
-        else:
-            return {
-                "category": "improdutivo",
-                "confidence": CONFIDENCE_LOW,
-                "reasoning": f"Classificação ambígua: {response_text}",
-            }
+
+        return {
+            "category": "improdutivo",
+            "confidence": CONFIDENCE_LOW,
+            "reasoning": f"Classificação ambígua: {response_text}",
+        }
+
+    def _parse_structured_response(
+        self, response_text: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Processa a resposta JSON do modo estruturado. Devolve None quando a
+        categoria não pode ser determinada, para que o fluxo de duas chamadas
+        seja usado como fallback.
+        """
+        data = self._load_json_object(response_text)
+        if not data:
+            logger.warning(f"Resposta estruturada inválida: {response_text[:200]}")
+            return None
+
+        category = self._parse_category(
+            str(data.get("categoria", data.get("category", "")))
+        )
+        if not category:
+            logger.warning(f"Categoria ausente na resposta estruturada: {data}")
+            return None
+
+        try:
+            confidence = float(data.get("confianca", data.get("confidence")))
+            if confidence > 1:
+                confidence /= 100
+            confidence = min(1.0, max(0.0, confidence))
+        except (TypeError, ValueError):
+            confidence = CONFIDENCE_HIGH
+
+        response = data.get("resposta", data.get("response"))
+        reasoning = data.get("justificativa", data.get("reasoning", ""))
+
+        return {
+            "category": category,
+            "confidence": confidence,
+            "reasoning": f"Classificação: {reasoning}" if reasoning else "",
+            "response": response.strip() if isinstance(response, str) else None,
+        }
+
+    def _load_json_object(self, response_text: str) -> Optional[Dict[str, Any]]:
+        """
+        Extrai um objeto JSON da resposta, tolerando texto ou blocos de
+        código ao redor do objeto
+        """
+        text = response_text.strip()
+        start = text.find("{")
+        end = text.rfind("}")
+        if start == -1 or end <= start:
+            return None
+
+        try:
+            data = json.loads(text[start : end + 1])
+        except ValueError:
+            return None
+
+        return data if isinstance(data, dict) else None
+
+    def _parse_category(self, text: str) -> Optional[str]:
+        """
+        Identifica a categoria por palavra inteira ("improdutivo" contém
+        "produtivo"); devolve None se nenhuma ou ambas aparecerem
+        """
+        categories = set(CATEGORY_PATTERN.findall(text.lower()))
+        if len(categories) == 1:
+            return categories.pop()
+        return None
 
     def is_available(self) -> bool:
-        """Verifica se o cliente OpenAI está disponível"""
-        return self.client is not None
+        """Verifica se o cliente OpenAI está disponível e o circuito permite chamadas"""
+        return self.client is not None and self.breaker.is_call_permitted()
+
+    def is_async_available(self) -> bool:
+        """Verifica se o cliente assíncrono da OpenAI está disponível"""
+        return self.async_client is not None and self.breaker.is_call_permitted()
+
+    def status(self) -> Dict[str, Any]:
+        """Estado do cliente e do disjuntor, para exposição na API"""
+        return {
+            "configured": self.client is not None,
+            "base_url": self.config.OPENAI_BASE_URL or None,
+            "async_enabled": self.async_client is not None,
+            "available": self.is_available(),
+            "circuit_breaker": self.breaker.snapshot(),
+        }
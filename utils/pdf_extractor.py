@@ -0,0 +1,154 @@
+import os
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from multiprocessing.connection import Connection
+from typing import Any, Optional, Tuple
+import pdfplumber
+from config import Config
+
+logger = logging.getLogger(__name__)
+config = Config()
+
+HARD_TIMEOUT_GRACE_SECONDS = 2.0
+
+_pool_lock = threading.Lock()
+_idle_workers: "Optional[queue.Queue[Optional[_PdfWorker]]]" = None
+_idle_workers_pid: Optional[int] = None
+
+
+def extract_pdf_pages(path: str, max_pages: int, max_chars: int, timeout: float) -> str:
+    """
+    Extrai o texto de um PDF em disco, parando ao atingir o limite de
+    páginas, a quantidade de texto suficiente para a classificação ou o
+    tempo limite (verificado entre páginas)
+    """
+    deadline = time.monotonic() + timeout
+    parts = []
+    collected = 0
+
+    with pdfplumber.open(path) as pdf:
+        for page_number, page in enumerate(pdf.pages):
+            if page_number >= max_pages:
+                break
+            if time.monotonic() > deadline:
+                logger.warning(
+                    f"Tempo limite na extração do PDF após {page_number} páginas"
+                )
+                break
+
+            text = page.extract_text() or " "
+            parts.append(text)
+            collected += len(text)
+            page.close()
+
+            if collected >= max_chars:
+                break
+
+    return "".join(parts)[:max_chars]
+
+
+class _PdfWorker:
+    """
+    Processo de extração com canal próprio: pode ser encerrado sozinho,
+    sem afetar as extrações em andamento nos demais processos
+    """
+
+    def __init__(self):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_worker_loop, args=(child_conn,), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def run(self, args: Tuple[Any, ...], timeout: float) -> str:
+        """Extrai no processo; TimeoutError se não responder em ``timeout``"""
+        self.conn.send(args)
+        if not self.conn.poll(timeout):
+            raise TimeoutError
+        status, payload = self.conn.recv()
+        if status == "error":
+            raise RuntimeError(payload)
+        return payload
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+def _worker_loop(conn: Connection) -> None:
+    while True:
+        try:
+            args = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send(("ok", extract_pdf_pages(*args)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+def _get_idle_workers() -> "queue.Queue[Optional[_PdfWorker]]":
+    """
+    Fila dos processos livres, com PDF_WORKERS posições (iniciados sob
+    demanda); recriada após um fork (ex.: workers do gunicorn)
+    """
+    global _idle_workers, _idle_workers_pid
+
+    pid = os.getpid()
+    with _pool_lock:
+        if _idle_workers is None or _idle_workers_pid != pid:
+            _idle_workers = queue.Queue()
+            for _ in range(config.PDF_WORKERS):
+                _idle_workers.put(None)
+            _idle_workers_pid = pid
+        return _idle_workers
+
+
+def extract_pdf_text(path: str) -> str:
+    """
+    Extrai o texto de um PDF em um dos PDF_WORKERS processos, com limite de
+    páginas, de texto e de tempo. O tempo limite só começa a contar quando
+    um processo fica livre; um processo travado é encerrado e substituído
+    sem afetar os demais. Com PDF_WORKERS=0 a extração roda no próprio
+    processo.
+    """
+    args = (
+        path,
+        config.PDF_MAX_PAGES,
+        config.PDF_MAX_CHARS,
+        config.PDF_TIMEOUT_SECONDS,
+    )
+
+    if config.PDF_WORKERS <= 0:
+        return extract_pdf_pages(*args)
+
+    idle_workers = _get_idle_workers()
+    worker = idle_workers.get()
+    try:
+        if worker is None or not worker.is_alive():
+            worker = _PdfWorker()
+        return worker.run(
+            args, timeout=config.PDF_TIMEOUT_SECONDS + HARD_TIMEOUT_GRACE_SECONDS
+        )
+    except TimeoutError:
+        logger.error("Extração do PDF excedeu o tempo limite; encerrando o processo")
+        worker.kill()
+        worker = None
+        raise ValueError(
+            f"Tempo limite de {config.PDF_TIMEOUT_SECONDS:.0f}s excedido na leitura do PDF"
+        )
+    except (EOFError, OSError):
+        logger.error("Processo de extração de PDF encerrado; será substituído")
+        worker.kill()
+        worker = None
+        raise ValueError("Falha no processo de leitura do PDF")
+    finally:
+        idle_workers.put(worker)
@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+config = Config()
+
+KEY_SEPARATOR = "\x1f"
+SQLITE_CLEANUP_INTERVAL = 256
+
+
+class ResultCache:
+    """
+    Cache endereçado por conteúdo para resultados de classificação e respostas.
+
+    A chave é um hash SHA-256 do namespace (ex.: "openai-classify"), do
+    modelo, da versão do prompt e do texto processado. Os valores ficam em
+    um LRU em memória com TTL e, opcionalmente, em um arquivo SQLite que
+    pode ser compartilhado por todos os workers do gunicorn na mesma máquina.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        sqlite_path: str = "",
+        enabled: bool = True,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = sqlite_path
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sqlite_sets = 0
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(namespace: str, *parts: Any) -> str:
+        """Gera a chave do cache a partir do namespace e das partes relevantes"""
+        raw = KEY_SEPARATOR.join([namespace, *(str(part) for part in parts)])
+        return f"{namespace}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        namespace = key.split(":", 1)[0]
+        now = time.time()
+
+        with self._lock:
+            value = None
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    value = None
+
+        if value is not None:
+            self._count(namespace, "memory_hits")
+            return value
+
+        value = self._sqlite_get(key, now)
+        if value is not None:
+            self._memory_set(key, value, now)
+            self._count(namespace, "disk_hits")
+            return value
+
+        self._count(namespace, "misses")
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        if not self.enabled or value is None:
+            return
+
+        now = time.time()
+        self._memory_set(key, value, now)
+        self._sqlite_set(key, value, now)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Devolve o valor em cache ou calcula e armazena (resultados None não são guardados)"""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = compute()
+        self.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de acertos e falhas, totais e por namespace"""
+        with self._lock:
+            namespaces = {name: dict(c) for name, c in self._counters.items()}
+            size = len(self._entries)
+
+        totals = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        for counters in namespaces.values():
+            for name, value in counters.items():
+                totals[name] = totals.get(name, 0) + value
+
+        hits = totals["memory_hits"] + totals["disk_hits"]
+        lookups = hits + totals["misses"]
+        return {
+            "enabled": self.enabled,
+            "entries": size,
+            "hits": hits,
+            "misses": totals["misses"],
+            "memory_hits": totals["memory_hits"],
+            "disk_hits": totals["disk_hits"],
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "namespaces": namespaces,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+        connection = self._connection()
+        if connection is not None:
+            with connection:
+                connection.execute("DELETE FROM cache")
+
+    def _count(self, namespace: str, counter: str) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(
+                namespace, {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+            )
+            counters[counter] += 1
+
+    def _memory_set(self, key: str, value: Any, now: float) -> None:
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Conexão SQLite por thread e por processo (seguro após fork)"""
+        if not self.sqlite_path:
+            return None
+
+        pid = os.getpid()
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and getattr(self._local, "pid", None) == pid:
+            return connection
+
+        try:
+            connection = sqlite3.connect(self.sqlite_path, timeout=1.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache SQLite indisponível ({self.sqlite_path}): {e}")
+            self.sqlite_path = ""
+            return None
+
+        self._local.connection = connection
+        self._local.pid = pid
+        return connection
+
+    def _sqlite_get(self, key: str, now: float) -> Optional[Any]:
+        connection = self._connection()
+        if connection is None:
+            return None
+
+        try:
+            row = connection.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao ler cache SQLite: {e}")
+            return None
+
+        return json.loads(row[0]) if row else None
+
+    def _sqlite_set(self, key: str, value: Any, now: float) -> None:
+        connection = self._connection()
+        if connection is None:
+            return
+
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (
+                        key,
+                        json.dumps(value, ensure_ascii=False),
+                        now + self.ttl_seconds,
+                    ),
+                )
+                self._sqlite_sets += 1
+                if self._sqlite_sets % SQLITE_CLEANUP_INTERVAL == 0:
+                    connection.execute(
+                        "DELETE FROM cache WHERE expires_at <= ?", (now,)
+                    )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Erro ao gravar cache SQLite: {e}")
+
+
+result_cache = ResultCache(
+    max_entries=config.CACHE_MAX_ENTRIES,
+    ttl_seconds=config.CACHE_TTL_SECONDS,
+    sqlite_path=config.CACHE_SQLITE_PATH,
+    enabled=config.CACHE_ENABLED,
+)
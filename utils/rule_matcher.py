@@ -0,0 +1,117 @@
+import re
+from typing import Dict, List, Tuple
+
+WORD_PATTERN = re.compile(r"\w+")
+VALID_WORD_PATTERN = re.compile(r"^\w+$")
+PHRASE_SEPARATOR = r"\s+"
+END_ANCHOR = r"\s*$"
+WHITESPACE_SEPARATOR = " "
+HYPHEN_SEPARATOR = "-"
+
+
+class KeywordMatcher:
+    """
+    Contador de padrões de palavras-chave em uma única passada pelo texto.
+
+    Recebe listas de padrões no formato ``\\b(alt1|alt2|...)\\b`` usadas
+    pelo classificador e as compila em um índice por primeira palavra.
+    O texto é tokenizado uma única vez e cada padrão conta as ocorrências
+    não sobrepostas exatamente como ``re.findall`` faria.
+    """
+
+    def __init__(self, patterns_by_category: Dict[str, List[str]]):
+        self.categories = list(patterns_by_category)
+        self.pattern_count = 0
+        self.index: Dict[
+            str, List[Tuple[int, str, Tuple[str, ...], Tuple[str, ...], bool]]
+        ] = {}
+
+        for category, patterns in patterns_by_category.items():
+            for pattern in patterns:
+                for words, separators, anchored in self._parse_pattern(pattern):
+                    self.index.setdefault(words[0], []).append(
+                        (self.pattern_count, category, words, separators, anchored)
+                    )
+                self.pattern_count += 1
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Conta as ocorrências por categoria em uma única tokenização"""
+        counts = dict.fromkeys(self.categories, 0)
+        tokens = [(m.group(), m.start(), m.end()) for m in WORD_PATTERN.finditer(text)]
+        next_allowed = [0] * self.pattern_count
+        index = self.index
+
+        for position, (word, _, _) in enumerate(tokens):
+            entries = index.get(word)
+            if not entries:
+                continue
+
+            for pattern_id, category, words, separators, anchored in entries:
+                if position < next_allowed[pattern_id]:
+                    continue
+                if self._matches_at(
+                    text, tokens, position, words, separators, anchored
+                ):
+                    counts[category] += 1
+                    next_allowed[pattern_id] = position + len(words)
+
+        return counts
+
+    def _matches_at(
+        self,
+        text: str,
+        tokens: List[Tuple[str, int, int]],
+        position: int,
+        words: Tuple[str, ...],
+        separators: Tuple[str, ...],
+        anchored: bool,
+    ) -> bool:
+        last = position + len(words) - 1
+        if last >= len(tokens):
+            return False
+
+        for offset in range(1, len(words)):
+            word, start, _ = tokens[position + offset]
+            if word != words[offset]:
+                return False
+
+            gap = text[tokens[position + offset - 1][2] : start]
+            if separators[offset - 1] == WHITESPACE_SEPARATOR:
+                if not gap.isspace():
+                    return False
+            elif gap != separators[offset - 1]:
+                return False
+
+        if anchored:
+            tail = text[tokens[last][2] :]
+            return not tail or tail.isspace()
+
+        return True
+
+    def _parse_pattern(
+        self, pattern: str
+    ) -> List[Tuple[Tuple[str, ...], Tuple[str, ...], bool]]:
+        if not (pattern.startswith(r"\b(") and pattern.endswith(r")\b")):
+            raise ValueError(f"Padrão não suportado: {pattern}")
+
+        alternatives = []
+        for alternative in pattern[3:-3].split("|"):
+            anchored = alternative.endswith(END_ANCHOR)
+            if anchored:
+                alternative = alternative[: -len(END_ANCHOR)]
+
+            words: List[str] = []
+            separators: List[str] = []
+            for phrase_word in alternative.split(PHRASE_SEPARATOR):
+                for i, part in enumerate(phrase_word.split(HYPHEN_SEPARATOR)):
+                    if not VALID_WORD_PATTERN.match(part):
+                        raise ValueError(f"Padrão não suportado: {pattern}")
+                    if words:
+                        separators.append(
+                            HYPHEN_SEPARATOR if i > 0 else WHITESPACE_SEPARATOR
+                        )
+                    words.append(part)
+
+            alternatives.append((tuple(words), tuple(separators), anchored))
+
+        return alternatives